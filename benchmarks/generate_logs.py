@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+'''
+Synthesizes Gaussian 16 .log and ORCA6 .out files for the benchmarks.
+
+The files are assembled from blocks of the logs under data/ and
+orca_data/ (the input echo, one optimization step, the frequency job,
+the ORCA optimization cycle, ...), so the line lengths and the density
+of lines the assessors look at are those of real outputs. Every file
+has a kind that decides how it ends: completed multi-Link1 jobs,
+oscillating or long optimizations, imaginary frequencies, the error
+terminations the assessors detect and jobs killed by SLURM. The
+target size of each file is drawn from a log-normal distribution, so
+a corpus has many small files and a few very large ones.
+
+    python benchmarks/generate_logs.py corpus/ --files 1000 --program g16
+'''
+
+from __future__ import annotations
+
+import re
+import math
+import random
+import argparse
+
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parents[1] / 'data'
+ORCA_DATA_DIR = Path(__file__).resolve().parents[1] / 'orca_data'
+
+G16_KINDS = ('completed', 'completed', 'completed', 'oscillating', 'long_optimization', 'imaginary_frequency',
+             'convergence_failure', 'erroneous_write', 'atomic_number', 'multiplicity', 'steps_exceeded',
+             'unterminated', 'oom_kill', 'preempted')
+
+ORCA_KINDS = ('completed', 'completed', 'completed', 'not_converged', 'zero_distance', 'multiplicity', 'unterminated')
+
+G16_ERROR_TERMINATION = ' Error termination via Lnk1e in /apps/gaussian16/C01/AVX/g16/l{link}.exe at Mon Sep 29 11:48:47 2025.\n'
+
+G16_ERRORS = {'convergence_failure': (502, ' Convergence failure -- run terminated.\n'),
+              'erroneous_write': (None, 'Erroneous write. Write -1 instead of 800.\nfd = 4\norig len = 800 left = 800\ng_write\n'),
+              'atomic_number': (301, ' Atomic number out of range for 6-31G basis set.\n'),
+              'multiplicity': (301, ' The combination of multiplicity 2 and    96 electrons is impossible.\n'),
+              'steps_exceeded': (103, ' Optimization stopped.\n    -- Number of steps exceeded,  NStep= 100\n')}
+
+SLURM_ERRORS = {'oom_kill': 'slurmstepd: error: Detected 1 oom_kill event in StepId=12345.batch. '
+                            'Some of your processes may have been killed by the cgroup out-of-memory handler.\n',
+                'preempted': 'slurmstepd: error: *** JOB 12345 ON notch001 CANCELLED AT 2025-09-29T11:48:47 DUE TO PREEMPTION ***\n'}
+
+ORCA_ERRORS = {'not_converged': '''
+                                   ERROR !!!
+       The optimization did not converge but reached the maximum
+       number of optimization cycles.
+''',
+               'zero_distance': '\nZero distance between atoms 3 and 7 in Cartesian2Internal\n',
+               'multiplicity': '\nError : multiplicity (1) is odd and number of electrons (97) is odd -> impossible\n'}
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('directory',
+                        help='Directory into which the files are written')
+
+    parser.add_argument('--program',
+                        choices=['g16', 'orca'],
+                        default='g16',
+                        help='Program whose output is synthesized (default=g16)')
+
+    parser.add_argument('--files',
+                        type=int,
+                        default=100,
+                        help='Number of files (default=100)')
+
+    parser.add_argument('--median-size',
+                        dest='median_size',
+                        type=float,
+                        default=64,
+                        help='Median target size of the files in KB (default=64)')
+
+    parser.add_argument('--max-size',
+                        dest='max_size',
+                        type=float,
+                        default=1024,
+                        help='Largest target size of a file in MB (default=1024)')
+
+    parser.add_argument('--seed',
+                        type=int,
+                        default=0,
+                        help='Seed of the random number generator (default=0)')
+
+    return parser.parse_args()
+
+def _split_lines(file: Path) -> list[str]:
+    return file.read_text(errors='replace').splitlines(keepends=True)
+
+class G16Template:
+    '''
+    Blocks of a real Gaussian 16 opt+freq log (data/james.log) from which
+    synthetic logs are assembled.
+
+    Attributes
+    ----------
+    head: str
+        Everything before the first SCF energy of the optimization
+        (input echo, geometry, basis set, ...)
+
+    step: str
+        One optimization step with format fields for the SCF energy, the
+        four convergence criteria and their YES/NO flags
+
+    converged: str
+        The last step of the optimization and its normal termination
+
+    freq: str
+        The Link1 frequency job including all "Frequencies --" blocks
+
+    termination: str
+        A normal termination line
+    '''
+    def __init__(self, file: Path = DATA_DIR / 'james.log'):
+        lines = _split_lines(file)
+        scf = [i for i, line in enumerate(lines) if line.startswith(' SCF Done:')]
+        link1 = next(i for i, line in enumerate(lines) if line.startswith(' Link1:'))
+        terminations = [i for i, line in enumerate(lines) if line.startswith(' Normal termination')]
+        last_opt_scf = max(i for i in scf if i < link1)
+
+        self.head = ''.join(lines[:scf[0]])
+        self.converged = ''.join(lines[last_opt_scf:terminations[0] + 1])
+        self.freq = ''.join(lines[link1:terminations[-1]])
+        self.termination = lines[terminations[-1]]
+
+        # Escape the template, then put fields where the values go
+        step = []
+        for line in lines[scf[0]:scf[1]]:
+            line = line.replace('{', '{{').replace('}', '}}')
+            if line.startswith(' SCF Done:'):
+                line = ' SCF Done:  E(RB3LYP) =  {energy:.9f}     A.U. after    8 cycles\n'
+            for i, label in enumerate(('Maximum Force', 'RMS     Force', 'Maximum Displacement', 'RMS     Displacement')):
+                if line.startswith(f' {label}'):
+                    threshold = line.split()[-2]
+                    line = f' {label:<20}{{v{i}:12.6f}}{threshold:>13}     {{f{i}}}\n'
+            step.append(line)
+        self.step = ''.join(step)
+
+    def make_step(self, energy: float, values: list[float]) -> str:
+        '''
+        Formats one optimization step. A criterion is converged when its
+        value is below 1e-4.
+        '''
+        flags = ['YES' if x < 1e-4 else 'NO ' for x in values]
+        return self.step.format(energy=energy,
+                                **{f'v{i}': x for i, x in enumerate(values)},
+                                **{f'f{i}': x for i, x in enumerate(flags)})
+
+class ORCATemplate:
+    '''
+    Blocks of a real ORCA6 geometry optimization
+    (orca_data/geometry_not_converged.out).
+
+    Attributes
+    ----------
+    head: str
+        Everything before the first optimization cycle
+
+    cycle: str
+        One optimization cycle with a format field for its number
+
+    footer: str
+        The timings and the normal termination lines
+    '''
+    def __init__(self, file: Path = ORCA_DATA_DIR / 'geometry_not_converged.out'):
+        lines = _split_lines(file)
+        cycles = [i for i, line in enumerate(lines) if 'GEOMETRY OPTIMIZATION CYCLE' in line]
+        timings = next(i for i, line in enumerate(lines) if line.startswith('Timings for individual modules'))
+
+        # The cycle banner starts one line above the title
+        self.head = ''.join(lines[:cycles[0] - 1])
+        cycle = ''.join(lines[cycles[0] - 1:cycles[1] - 1]).replace('{', '{{').replace('}', '}}')
+        self.cycle = re.sub(r'GEOMETRY OPTIMIZATION CYCLE\s+1 ', 'GEOMETRY OPTIMIZATION CYCLE {n:>3} ', cycle)
+        self.footer = ''.join(lines[timings:])
+
+def get_target_size(rng: random.Random, median_size: float, max_size: float) -> int:
+    '''
+    Draws a file size in bytes from a log-normal distribution with the
+    given median (KB), clipped to max_size (MB).
+    '''
+    size = rng.lognormvariate(math.log(median_size * 1024), 1.5)
+    return int(min(size, max_size * 1024 * 1024))
+
+def make_g16_log(file: Path,
+                 kind: str,
+                 size: int,
+                 rng: random.Random,
+                 template: G16Template) -> int:
+    '''
+    Writes a synthetic Gaussian 16 log of one of the G16_KINDS that is
+    about size bytes large (at least one optimization step) and returns
+    the number of bytes written. Completed jobs are multi-Link1 opt+freq
+    jobs.
+    '''
+    n_steps = max(1, (size - len(template.head) - len(template.freq)) // len(template.step))
+    if kind == 'oscillating':
+        n_steps = max(n_steps, 30)
+    elif kind == 'long_optimization':
+        n_steps = max(n_steps, 200)
+
+    with open(file, 'w') as outfile:
+        outfile.write(template.head)
+
+        # Link 301 errors happen before the first SCF
+        if kind in ('atomic_number', 'multiplicity'):
+            link, text = G16_ERRORS[kind]
+            outfile.write(text + G16_ERROR_TERMINATION.format(link=link))
+            return outfile.tell()
+
+        energy = -465.49 - rng.random() * 1e-3
+        values = [0.03 * rng.random() + 1e-3 for _ in range(4)]
+        for step in range(n_steps):
+            if kind == 'oscillating' and step >= n_steps // 3:
+                # Step back and forth between two geometries
+                values = [x * (1.4 if step % 2 else 1 / 1.4) for x in values]
+            else:
+                values = [min(max(x * rng.uniform(0.8, 1.2), 5e-4), 0.05) for x in values]
+            energy -= abs(rng.gauss(0, 1e-5))
+            outfile.write(template.make_step(energy, values))
+
+        if kind in ('convergence_failure', 'erroneous_write', 'steps_exceeded', 'oscillating'):
+            link, text = G16_ERRORS['steps_exceeded' if kind == 'oscillating' else kind]
+            outfile.write(text)
+            if link is not None:
+                outfile.write(G16_ERROR_TERMINATION.format(link=link))
+        elif kind in ('unterminated', 'oom_kill', 'preempted'):
+            # Killed in the middle of a step
+            outfile.write(template.step[:len(template.step) // 2])
+        else:
+            outfile.write(template.converged)
+            freq = template.freq
+            if kind == 'imaginary_frequency':
+                freq = re.sub(r'(?<= Frequencies --)(\s+)(\d)', r'\1-\2', freq, count=1)
+            outfile.write(freq)
+            outfile.write(template.termination)
+
+        n_bytes = outfile.tell()
+
+    if kind in SLURM_ERRORS:
+        with open(file.with_name(f'{file.stem}.12345.error'), 'w') as outfile:
+            outfile.write(SLURM_ERRORS[kind])
+
+    return n_bytes
+
+def make_orca_out(file: Path,
+                  kind: str,
+                  size: int,
+                  rng: random.Random,
+                  template: ORCATemplate) -> int:
+    '''
+    Writes a synthetic ORCA6 .out file of one of the ORCA_KINDS that is
+    about size bytes large (at least one optimization cycle) and returns
+    the number of bytes written.
+    '''
+    n_cycles = max(1, (size - len(template.head) - len(template.footer)) // len(template.cycle))
+    with open(file, 'w') as outfile:
+        outfile.write(template.head)
+        if kind in ('zero_distance', 'multiplicity'):
+            outfile.write(ORCA_ERRORS[kind])
+            return outfile.tell()
+
+        for n in range(1, n_cycles + 1):
+            outfile.write(template.cycle.format(n=n))
+
+        if kind == 'unterminated':
+            outfile.write(template.cycle[:len(template.cycle) // 2])
+            return outfile.tell()
+
+        if kind in ORCA_ERRORS:
+            outfile.write(ORCA_ERRORS[kind])
+        outfile.write(template.footer)
+        return outfile.tell()
+
+def make_corpus(directory: Path,
+                n_files: int,
+                program: str = 'g16',
+                median_size: float = 64,
+                max_size: float = 1024,
+                seed: int = 0) -> list[dict]:
+    '''
+    Writes n_files synthetic output files into directory.
+
+    Parameters
+    ----------
+    directory: Path
+        Existing directory for the files
+
+    n_files: int
+        Number of files
+
+    program: str
+        'g16' for Gaussian 16 .log files or 'orca' for ORCA6 .out files
+
+    median_size: float
+        Median target size in KB
+
+    max_size: float
+        Largest target size in MB
+
+    seed: int
+        Seed of the random number generator. The same arguments always
+        give the same corpus.
+
+    Returns
+    ----------
+    list[dict]
+        The path, kind and size of every file
+    '''
+    rng = random.Random(seed)
+    if program == 'g16':
+        template, kinds, suffix, make = G16Template(), G16_KINDS, '.log', make_g16_log
+    else:
+        template, kinds, suffix, make = ORCATemplate(), ORCA_KINDS, '.out', make_orca_out
+
+    files = []
+    for i in range(n_files):
+        kind = rng.choice(kinds)
+        file = directory / f'{kind}_{i:06d}{suffix}'
+        size = make(file, kind, get_target_size(rng, median_size, max_size), rng, template)
+        files.append({'path': file, 'kind': kind, 'size': size})
+    return files
+
+def main(args) -> None:
+    directory = Path(args.directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    files = make_corpus(directory,
+                        args.files,
+                        program=args.program,
+                        median_size=args.median_size,
+                        max_size=args.max_size,
+                        seed=args.seed)
+    total_size = sum(x['size'] for x in files) / 1024 / 1024
+    print(f'Wrote {len(files)} files ({total_size:.1f} MB) to {directory}')
+
+if __name__ == '__main__':
+    main(get_args())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+'''
+Compares the makespan of the old and the size-aware scheduling of
+checkGaussianLogFiles.py on a skewed distribution of file sizes.
+
+The old scheduler hands the files to Pool.starmap in discovery order
+with the default chunk size. The size-aware scheduler sorts the files
+largest first, sends large files alone and small files in batches
+(batch_tasks) and collects the results with imap_unordered.
+
+    python benchmarks/scheduling.py --workers 8
+'''
+
+from __future__ import annotations
+
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import functools
+import itertools
+import multiprocessing
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import logfileAssessor as g16
+
+DATA_DIR = Path(__file__).resolve().parents[1] / 'data'
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('--workers',
+                        type=int,
+                        default=multiprocessing.cpu_count(),
+                        help='Number of worker processes (default=number of CPUs)')
+
+    parser.add_argument('--small',
+                        type=int,
+                        default=400,
+                        help='Number of small log files (default=400)')
+
+    parser.add_argument('--large',
+                        type=int,
+                        default=2,
+                        help='Number of large log files (default=2)')
+
+    parser.add_argument('--large-size',
+                        dest='large_size',
+                        type=int,
+                        default=200,
+                        help='Approximate size of the large log files in MB (default=200)')
+
+    parser.add_argument('--repeats',
+                        type=int,
+                        default=3,
+                        help='Number of runs per scheduler. The fastest run is reported (default=3)')
+
+    return parser.parse_args()
+
+def make_files(directory: Path, n_small: int, n_large: int, large_size: int) -> list[Path]:
+    '''
+    Writes the benchmark files into directory and returns them in the
+    order in which a directory listing would plausibly return them, with
+    the large files last (the worst case for the old scheduler).
+    '''
+    files = []
+    small_sources = sorted(DATA_DIR.glob('*.log'))
+    for i, source in zip(range(n_small), itertools.cycle(small_sources)):
+        files.append(directory / f'small_{i:05d}.log')
+        shutil.copy(source, files[-1])
+
+    # Large files are a real optimization repeated until the size is reached
+    block = (DATA_DIR / 'oscillating_but_converges.log').read_bytes()
+    for i in range(n_large):
+        files.append(directory / f'large_{i:02d}.log')
+        with open(files[-1], 'wb') as outfile:
+            for _ in range(max(1, large_size * 1024 * 1024 // len(block))):
+                outfile.write(block)
+
+    return files
+
+def run_discovery_order(files: list[Path], workers: int) -> tuple[float, float]:
+    '''
+    Runs the old scheduler and returns the time to the first result and
+    the makespan in seconds.
+    '''
+    t1 = time.perf_counter()
+    with multiprocessing.Pool(workers) as p:
+        p.starmap(g16.evaluate_g16_logfile, zip(files, itertools.repeat(10), itertools.repeat(1e-5)))
+    makespan = time.perf_counter() - t1
+
+    # starmap only returns when every file is done
+    return makespan, makespan
+
+def run_size_aware(files: list[Path], workers: int) -> tuple[float, float]:
+    '''
+    Runs the size-aware scheduler and returns the time to the first
+    result and the makespan in seconds.
+    '''
+    t1 = time.perf_counter()
+    first = None
+    files = sorted(files, key=lambda x: x.stat().st_size, reverse=True)
+    with multiprocessing.Pool(workers) as p:
+        for _ in p.imap_unordered(functools.partial(g16.evaluate_batch, window=10, tolerance=1e-5),
+                                  g16.batch_tasks((file, None) for file in files),
+                                  chunksize=1):
+            if first is None:
+                first = time.perf_counter() - t1
+    return first, time.perf_counter() - t1
+
+def main(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        files = make_files(Path(tmp), args.small, args.large, args.large_size)
+        total_size = sum(file.stat().st_size for file in files) / 1024 / 1024
+        print(f'{len(files)} files, {total_size:.0f} MB, {args.workers} workers')
+
+        # Warm the page cache so both schedulers read from memory
+        for file in files:
+            file.read_bytes()
+
+        for name, run in (('discovery order', run_discovery_order), ('size-aware', run_size_aware)):
+            timings = [run(files, args.workers) for _ in range(args.repeats)]
+            first, makespan = min(timings, key=lambda x: x[1])
+            print(f'{name:<16} first result {first:7.2f} s    makespan {makespan:7.2f} s')
+
+if __name__ == '__main__':
+    main(get_args())
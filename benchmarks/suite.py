@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+'''
+Benchmarks checkGaussianLogFiles.py and checkORCALogFiles.py on
+synthetic corpora (see generate_logs.py) of increasing size.
+
+For every corpus, the full command line pipeline is timed in serial and
+with --parallel (as a subprocess with --dry, so nothing is moved), and
+the individual checks are timed in this process. Files/s, MB/s and the
+peak RSS are written to a JSON file. Pass the JSON file of an earlier
+version with --compare to see what got faster or slower.
+
+    python benchmarks/suite.py --counts 10 1000 --output new.json --compare baseline.json
+
+The corpora are written to a temporary directory (or --corpus-dir) and
+read once before the timings, so the page cache is warm. Note that
+100,000 files with the default sizes need a few GB of disk space.
+'''
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import argparse
+import tempfile
+import functools
+import subprocess
+
+from pathlib import Path
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import logfileAssessor as g16
+import checkORCALogFiles as orca
+
+from generate_logs import make_corpus
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+
+# Bump when the layout of the JSON file changes
+RESULTS_VERSION = 1
+
+# Runs a command and prints its peak RSS (KB). The RSS a child reports
+# includes the memory of the process that started it, so the pipelines
+# are started from this small process instead of from the benchmark.
+RUSAGE_WRAPPER = '''
+import os, sys, subprocess
+process = subprocess.Popen(sys.argv[1:], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+_, status, rusage = os.wait4(process.pid, 0)
+print(rusage.ru_maxrss)
+sys.exit(os.waitstatus_to_exitcode(status))
+'''
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('--counts',
+                        type=int,
+                        nargs='+',
+                        default=[10, 1000, 100000],
+                        help='Number of files of each corpus (default=10 1000 100000)')
+
+    parser.add_argument('--program',
+                        choices=['g16', 'orca'],
+                        nargs='+',
+                        default=['g16', 'orca'],
+                        help='Programs to benchmark (default=g16 orca)')
+
+    parser.add_argument('--median-size',
+                        dest='median_size',
+                        type=float,
+                        default=16,
+                        help='Median target size of the files in KB (default=16)')
+
+    parser.add_argument('--max-size',
+                        dest='max_size',
+                        type=float,
+                        default=1024,
+                        help='Largest target size of a file in MB (default=1024)')
+
+    parser.add_argument('--seed',
+                        type=int,
+                        default=0,
+                        help='Seed of the corpus generator (default=0)')
+
+    parser.add_argument('--repeats',
+                        type=int,
+                        default=1,
+                        help='Number of runs of every pipeline. The fastest run is reported (default=1)')
+
+    parser.add_argument('--no-checks',
+                        dest='checks',
+                        action='store_false',
+                        help='Only time the full pipelines')
+
+    parser.add_argument('--corpus-dir',
+                        dest='corpus_dir',
+                        help='Keep the corpora in this directory and reuse them on the next run')
+
+    parser.add_argument('--output',
+                        default='benchmark_results.json',
+                        help='JSON file for the results (default=benchmark_results.json)')
+
+    parser.add_argument('--compare',
+                        help='JSON file of an earlier run to compare with')
+
+    return parser.parse_args()
+
+def get_rate(seconds: float, n_files: int, n_bytes: int) -> dict:
+    '''
+    Gets the throughput of a timed run.
+    '''
+    seconds = max(seconds, 1e-9)
+    return {'seconds': round(seconds, 4),
+            'files_per_s': round(n_files / seconds, 2),
+            'mb_per_s': round(n_bytes / 1024 / 1024 / seconds, 2)}
+
+def get_corpus(directory: Path, program: str, n_files: int, args) -> tuple[list[Path], int]:
+    '''
+    Writes a corpus unless directory already holds one with the same
+    parameters. Returns the files and their total size in bytes.
+    '''
+    manifest = directory / 'corpus.json'
+    params = {'program': program, 'files': n_files, 'median_size': args.median_size,
+              'max_size': args.max_size, 'seed': args.seed}
+    if not manifest.exists() or json.loads(manifest.read_text())['params'] != params:
+        directory.mkdir(parents=True, exist_ok=True)
+        print(f'Writing {n_files} {program} files to {directory}...', flush=True)
+        files = make_corpus(directory, n_files, program=program, median_size=args.median_size,
+                            max_size=args.max_size, seed=args.seed)
+        manifest.write_text(json.dumps({'params': params, 'files': [x['path'].name for x in files]}))
+
+    files = [directory / x for x in json.loads(manifest.read_text())['files']]
+
+    # Warm the page cache so every run reads from memory
+    n_bytes = 0
+    for file in files:
+        n_bytes += len(file.read_bytes())
+    return files, n_bytes
+
+def run_pipeline(command: list[str], repeats: int) -> tuple[float, float]:
+    '''
+    Runs a command line repeatedly and returns the fastest wall time in
+    seconds and the peak RSS in MB of the largest process (the script or
+    one of its workers).
+    '''
+    timings = []
+    peak_rss = 0
+    for _ in range(repeats):
+        t1 = time.perf_counter()
+        process = subprocess.run([sys.executable, '-c', RUSAGE_WRAPPER, *command],
+                                 capture_output=True, text=True, cwd=REPO_DIR)
+        timings.append(time.perf_counter() - t1)
+        if process.returncode != 0:
+            raise RuntimeError(f'{" ".join(command)} exited with {process.returncode}')
+        peak_rss = max(peak_rss, int(process.stdout) / 1024)
+    return min(timings), peak_rss
+
+def get_pipelines(program: str, directory: Path) -> dict:
+    '''
+    Gets the command lines of the serial and parallel pipelines.
+    '''
+    if program == 'g16':
+        command = [sys.executable, str(REPO_DIR / 'checkGaussianLogFiles.py'), '-i', str(directory), '--dry', '--no-cache']
+    else:
+        command = [sys.executable, str(REPO_DIR / 'checkORCALogFiles.py'), '-i', str(directory), '--dry', '--no-cache']
+    return {'serial': command, 'parallel': [*command, '--parallel']}
+
+def time_g16_checks(files: list[Path]) -> dict:
+    '''
+    Times every stage of the G16 assessment separately on each file and
+    returns the total seconds per stage.
+    '''
+    timings = dict.fromkeys(['read', 'scan', 'tail', 'slurm', 'oscillation', 'frequencies', 'trajectory', 'judge', 'evaluate'], 0.0)
+    tail = functools.partial(g16.assess_g16_logfile_tail, check_frequency=False)
+    for file in files:
+        for name, func in (('read', Path.read_bytes),
+                           ('scan', g16.scan_logfile),
+                           ('tail', tail),
+                           ('slurm', g16.get_slurm_failure_reasons),
+                           ('frequencies', g16.read_frequencies),
+                           ('trajectory', g16.read_optimization_trajectory)):
+            t1 = time.perf_counter()
+            result = func(file)
+            timings[name] += time.perf_counter() - t1
+            if name == 'scan':
+                scan = result
+
+        t1 = time.perf_counter()
+        g16.check_oscillating_series(scan.max_force, scan.rms_force, scan.max_displacement, scan.rms_displacement,
+                                     window=10, tolerance=1e-5)
+        timings['oscillation'] += time.perf_counter() - t1
+
+        t1 = time.perf_counter()
+        g16.judge_g16_scan(file, scan, window=10, tolerance=1e-5)
+        timings['judge'] += time.perf_counter() - t1
+
+        t1 = time.perf_counter()
+        g16.evaluate_g16_logfile(file, window=10, tolerance=1e-5)
+        timings['evaluate'] += time.perf_counter() - t1
+    return timings
+
+def time_orca_checks(files: list[Path]) -> dict:
+    '''
+    Times the stages of the ORCA assessment separately on each file and
+    returns the total seconds per stage.
+    '''
+    timings = dict.fromkeys(['read', 'scan', 'tail', 'judge', 'evaluate'], 0.0)
+    tail = functools.partial(orca.assess_orca_out_file_tail, check_oscillation=False)
+    for file in files:
+        for name, func in (('read', Path.read_bytes),
+                           ('scan', functools.partial(g16.scan_logfile, scanner_class=orca.ORCALogScanner)),
+                           ('tail', tail)):
+            t1 = time.perf_counter()
+            result = func(file)
+            timings[name] += time.perf_counter() - t1
+            if name == 'scan':
+                scan = result
+
+        t1 = time.perf_counter()
+        orca.judge_orca_scan(file, scan, window=10, tolerance=1e-5)
+        timings['judge'] += time.perf_counter() - t1
+
+        t1 = time.perf_counter()
+        orca.evaluate_orca_out_file(file, window=10, tolerance=1e-5)
+        timings['evaluate'] += time.perf_counter() - t1
+    return timings
+
+def get_commit() -> str | None:
+    '''
+    Gets the commit of the benchmarked code or None outside of git.
+    '''
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: dict, baseline: dict) -> None:
+    '''
+    Prints the throughput and peak RSS of two runs side by side.
+    '''
+    print(f'\n{"":<38}{"baseline":>12}{"new":>12}{"change":>9}')
+    for program, corpora in results['results'].items():
+        for count, result in corpora.items():
+            old = baseline.get('results', {}).get(program, {}).get(count)
+            if old is None:
+                continue
+            rows = [(f'pipeline {mode}', result['pipeline'][mode], old['pipeline'].get(mode)) for mode in result['pipeline']]
+            rows.extend((f'check {name}', x, old.get('checks', {}).get(name)) for name, x in result.get('checks', {}).items())
+            for name, new, base in rows:
+                if base is None:
+                    continue
+                for metric in ('files_per_s', 'peak_rss_mb'):
+                    if metric not in new or metric not in base:
+                        continue
+                    change = (new[metric] / base[metric] - 1) * 100 if base[metric] else 0.0
+                    print(f'{program} {count:>7} {name:<20} {metric:<11}{base[metric]:>9.1f}{new[metric]:>12.1f}{change:>+8.1f}%')
+
+def main(args) -> None:
+    results = {'version': RESULTS_VERSION,
+               'created': datetime.now().isoformat(timespec='seconds'),
+               'commit': get_commit(),
+               'python': platform.python_version(),
+               'platform': platform.platform(),
+               'cpus': os.cpu_count(),
+               'corpus': {'median_size_kb': args.median_size, 'max_size_mb': args.max_size, 'seed': args.seed},
+               'results': {}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir = Path(args.corpus_dir) if args.corpus_dir else Path(tmp)
+
+        # Keep the assessment cache out of the user's cache
+        os.environ['XDG_CACHE_HOME'] = str(Path(tmp) / 'cache')
+
+        for program in args.program:
+            results['results'][program] = {}
+            for count in args.counts:
+                files, n_bytes = get_corpus(corpus_dir / f'{program}_{count}', program, count, args)
+                result = {'files': len(files), 'bytes': n_bytes, 'pipeline': {}}
+                print(f'{program} {count} files ({n_bytes / 1024 / 1024:.1f} MB)')
+
+                for mode, command in get_pipelines(program, corpus_dir / f'{program}_{count}').items():
+                    seconds, peak_rss = run_pipeline(command, args.repeats)
+                    result['pipeline'][mode] = {**get_rate(seconds, len(files), n_bytes), 'peak_rss_mb': round(peak_rss, 1)}
+                    print(f'    pipeline {mode:<12}{result["pipeline"][mode]["files_per_s"]:>10.1f} files/s'
+                          f'{result["pipeline"][mode]["mb_per_s"]:>10.1f} MB/s{peak_rss:>8.0f} MB peak RSS')
+
+                if args.checks:
+                    timings = time_g16_checks(files) if program == 'g16' else time_orca_checks(files)
+                    result['checks'] = {name: get_rate(seconds, len(files), n_bytes) for name, seconds in timings.items()}
+                    result['checks_peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+                    for name, x in result['checks'].items():
+                        print(f'    check {name:<15}{x["files_per_s"]:>10.1f} files/s{x["mb_per_s"]:>10.1f} MB/s')
+
+                results['results'][program][str(count)] = result
+
+    with open(args.output, 'w') as outfile:
+        json.dump(results, outfile, indent=1)
+    print(f'Wrote {args.output}')
+
+    if args.compare:
+        with open(args.compare) as infile:
+            compare(results, json.load(infile))
+
+if __name__ == '__main__':
+    main(get_args())
@@ -2,38 +2,85 @@
 # coding: utf-8
 
 '''
-Analyzes Gaussian .log files
+Analyzes ORCA6 .out files
 '''
 
 from __future__ import annotations
 
 import re
+import sys
 import time
-import math
-import shutil
-import logging
 import argparse
-import multiprocessing
 
 from pathlib import Path
+from typing import Iterable, Iterator
+
+from logfileAssessor import (LogScanner,
+                             Detector,
+                             Assessment,
+                             AssessmentCache,
+                             bcolors,
+                             evaluate_task,
+                             iter_evaluations,
+                             get_file_tail,
+                             get_log_stem,
+                             is_seekable,
+                             split_archive_member,
+                             get_directory_index,
+                             get_slurm_failure_reasons,
+                             scan_logfile,
+                             resume_scan,
+                             add_stage_time,
+                             check_oscillating_series,
+                             get_worker_count,
+                             parse_memory_size,
+                             parse_shard,
+                             print_line_by_line_analysis,
+                             run_assessment,
+                             merge_and_move,
+                             RUNNING_AGE,
+                             TERMINATION_BLOCK_SIZE)
 
 DESCRIPTION = '🦝 Analyzes ORCA 6 log files for common errors 🦝.'
 
-LINK_PATTERN = re.compile(r' Entering Link\s+\d+', re.DOTALL)
-INCOMPLETE_GEOM_OPT_PATTERN = re.compile(r'ERROR \!\!\!\n\s+The optimization did not converge but reached the maximum', re.DOTALL)
+XC_KERNEL_ERROR = 'Error: Invalid or unknown value for Exchange in DFT XC-Kernel. Please try using LIBXC instead!'
+INCOMPLETE_GEOM_OPT_MESSAGE = 'The optimization did not converge but reached the maximum'
 ZERO_DISTANCE_ERROR_PATTERN = re.compile(r'Zero distance between atoms \d+ and \d+ in Cartesian2Internal', re.DOTALL)
 MULTIPLICITY_ERROR_PATTERN = re.compile(r'multiplicity \(\d+\) .+ and number of electrons \(\d+\) .+ -> impossible')
+NORM_TERM_MESSAGE = '****ORCA TERMINATED NORMALLY****'
 
-class bcolors:
-    HEADER = '\033[95m'
-    OKBLUE = '\033[94m'
-    OKCYAN = '\033[96m'
-    OKGREEN = '\033[92m'
-    WARNING = '\033[93m'
-    FAIL = '\033[91m'
-    ENDC = '\033[0m'
-    BOLD = '\033[1m'
-    UNDERLINE = '\033[4m'
+# Banner on the line before INCOMPLETE_GEOM_OPT_MESSAGE when the optimization failed
+ERROR_BANNER = 'ERROR !!!'
+
+# Rows of the "Geometry convergence" table printed in every optimization cycle
+GEOMETRY_CONVERGENCE_ROW = re.compile(r'\s+(RMS|MAX) (gradient|step)\s+(\S+)\s+\S+\s+(?:YES|NO)\s*$')
+
+# Names of the rows in the order of the optimization criteria series
+ORCA_OPTIMIZATION_CRITERIA = ('MAX GRADIENT', 'RMS GRADIENT', 'MAX STEP', 'RMS STEP')
+
+# Prefilter fragments of the lines ORCALogScanner inspects itself. The
+# literals of its detectors (see ORCA_DETECTORS) are added to them. Plain
+# literals keep the search fast, nested groups make it several times slower.
+ORCA_SCAN_STRUCTURE = ('TERMINATED NORMALLY', 'Geometry convergence', 'RMS gradient ', 'MAX gradient ', 'RMS step ', 'MAX step ', re.escape(ERROR_BANNER))
+
+# Error signatures of ORCA6 .out files. Only the first error in this
+# order is reported (see get_orca_error). steps_exceeded only counts
+# below an ERROR !!! banner (see ORCALogScanner._inspect).
+ORCA_DETECTORS = (Detector('xc_kernel', re.escape(XC_KERNEL_ERROR), literal='XC-Kernel', once=True,
+                           message='Invalid/unknown value for Exchange in DFT XC-Kernel. Use LIBXC(<functional>)'),
+                  Detector('steps_exceeded', rf'^\s+{INCOMPLETE_GEOM_OPT_MESSAGE}', literal='did not converge but reached', once=True,
+                           message='incomplete geometry optimization'),
+                  Detector('zero_distance', ZERO_DISTANCE_ERROR_PATTERN.pattern, literal='Zero distance between', once=True),
+                  Detector('illegal_multiplicity', MULTIPLICITY_ERROR_PATTERN.pattern, literal='-> impossible', once=True))
+
+# A complete file has its normal termination on one of its last lines
+NORM_TERM_LAST_LINES = 2
+
+# Last messages of ORCA6 when it stops, see has_orca_terminated
+ORCA_TERMINATION_MESSAGES = (b'TERMINATED NORMALLY', b'error termination', b'aborting the run')
+
+# Suffixes of the files ORCA writes next to the input file, see get_orca_companion_files
+ORCA_COMPANION_SUFFIXES = ('bibtex', 'densitiesinfo', 'xyz', 'gbw', 'densities', 'hess')
 
 def get_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=DESCRIPTION,
@@ -48,6 +95,20 @@ def get_args() -> argparse.Namespace:
                         action='store_true',
                         help='Debug information\n\n')
 
+    parser.add_argument('-r', '--recursive',
+                        action='store_true',
+                        help='Analyzes .out files in all subdirectories of the input directory\n\n')
+
+    parser.add_argument('--include',
+                        action='append',
+                        default=None,
+                        help='Only analyzes .out files whose name matches this pattern.\nCan be given multiple times.\n\n')
+
+    parser.add_argument('--exclude',
+                        action='append',
+                        default=None,
+                        help='Skips files and directories whose name or relative path\nmatches this pattern. Can be given multiple times.\n\n')
+
     parser.add_argument('--line-by-line',
                         action='store_true',
                         help='Requests printing of line-by-line analysis of each file\n\n')
@@ -56,460 +117,654 @@ def get_args() -> argparse.Namespace:
                         action='store_true',
                         help='Disables creation of directories and file movement\n\n')
 
+    parser.add_argument('--journal',
+                        default=None,
+                        help='Journal of the file moves (default=<input>/assessment_moves.journal)\n\n')
+
+    parser.add_argument('--resume',
+                        action='store_true',
+                        help='Finishes the file moves of an interrupted run from the journal\n\n')
+
+    parser.add_argument('--undo',
+                        action='store_true',
+                        help='Moves the files of the last run back using the journal\n\n')
+
+    parser.add_argument('--move-threads',
+                        dest='move_threads',
+                        type=int,
+                        default=8,
+                        help='Maximum number of concurrent copies when files are moved\nto another file system (default=8)\n\n')
+
     parser.add_argument('-p', '--parallel',
                         action='store_true',
                         help='Uses multiprocessing to rapidly analyze files.\n\n')
 
+    parser.add_argument('-j', '--jobs',
+                        default=None,
+                        help='Number of worker processes or "auto" to use the CPUs allocated\nto this process (affinity, cgroup quota and SLURM). Implies\n--parallel unless 1. (default=auto with --parallel)\n\n')
+
+    parser.add_argument('--ionice',
+                        action='store_true',
+                        help='Lowers the I/O priority of the workers\n\n')
+
+    parser.add_argument('--max-memory',
+                        dest='max_memory',
+                        type=parse_memory_size,
+                        default=None,
+                        help='Memory budget of the files being assessed (e.g., 8G or 512M).\nFiles are only handed to the workers while their estimated\nmemory fits and larger files are streamed. (default=none)\n\n',
+                        metavar='SIZE')
+
     parser.add_argument('--deletechk',
                         action='store_true',
                         help='Deletes ALL large .chk files that have a corresponding log instead of moving them.\n\n')
 
+    parser.add_argument('--tail-first',
+                        action='store_true',
+                        help='Assess files from their last block and only read the full\nfile when the tail is ambiguous\n\n')
+
     parser.add_argument('-t', '--tolerance',
                         dest='tolerance',
                         required=False,
-                        default='1e-3',
-                        help='Sets the tolerance value for determining oscillating optimizations.\n\n')
-
-    args = parser.parse_args()
+                        type=float,
+                        default='1e-5',
+                        help='Sets the tolerance value for determining oscillating optimizations (default=1e-5).\n\n')
 
-    if args.parallel and args.line_by_line:
-        raise NotImplementedError('Cannot perform line-by-line analysis in parallel.')
-
-    if args.deletechk:
-        raise ValueError('--deletechk is not available for ORCA6LogAssesor')
+    parser.add_argument('-w', '--window',
+                        dest='window',
+                        required=False,
+                        type=int,
+                        default=10,
+                        help='Number of optimization cycles to look at when evaluating oscillations (default=10).\n\n')
 
-    return args
+    parser.add_argument('--no-oscillation-criteria',
+                        action='store_false',
+                        help='Disables detection of oscillating geometry convergence criteria\n\n')
 
-def set_single_proc_affinity():
-    '''
-    Restricts the CPU affinity of the current process to a single core.
+    parser.add_argument('--skip-running',
+                        dest='skip_running',
+                        action='store_true',
+                        help='Reports the files of jobs that are still running as RUNNING\nwithout reading or moving them. A file is running if it was\nmodified recently, it is open or it grows\n\n')
+
+    parser.add_argument('--running-jobs',
+                        dest='running_jobs',
+                        type=str,
+                        default=None,
+                        help='File with the output of squeue. Files whose SLURM job is\nlisted are running, all others go through the checks of\n--skip-running. Implies --skip-running\n\n')
+
+    parser.add_argument('--running-age',
+                        dest='running_age',
+                        type=float,
+                        default=RUNNING_AGE,
+                        help=f'Files modified less than this many seconds ago are running\nwith --skip-running (default={RUNNING_AGE})\n\n')
+
+    parser.add_argument('--no-cache',
+                        dest='cache',
+                        action='store_false',
+                        help='Disables reading and writing the assessment cache\n\n')
+
+    parser.add_argument('--rebuild-cache',
+                        action='store_true',
+                        help='Reassesses every file and overwrites its cached result\n\n')
+
+    parser.add_argument('--cache-file',
+                        dest='cache_file',
+                        default=None,
+                        help='SQLite file used as assessment cache\n(default=~/.cache/GaussianLogfileAssessor/assessments.sqlite)\n\n')
+
+    parser.add_argument('--detectors',
+                        default=None,
+                        help='JSON file with site-specific error detectors\n(default=~/.config/GaussianLogfileAssessor/detectors.json if it exists)\n\n')
+
+    parser.add_argument('--shard',
+                        type=parse_shard,
+                        default=None,
+                        help='Only analyzes shard I of N (e.g., 0/8) of the files and writes the\nresults to a partial result file instead of moving files.\nI is 0-based (0 <= I < N). Combine the partial results with\nthe merge subcommand. With --dry, the partial results are only\nwritten if --partial-file is given.\n\n',
+                        metavar='I/N')
+
+    parser.add_argument('--partial-file',
+                        dest='partial_file',
+                        default=None,
+                        help='Partial result file of --shard\n(default=<input>/assessment_shard_<I>_of_<N>.json)\n\n')
+
+    parser.add_argument('--watch',
+                        nargs='*',
+                        default=None,
+                        help='Keeps running and assesses .out files in the given directories\n(default=input) as soon as they stop changing\n\n',
+                        metavar='DIR')
+
+    parser.add_argument('--settle',
+                        type=float,
+                        default=60,
+                        help='Seconds a file must be unchanged before it is assessed in\nwatch mode (default=60)\n\n')
+
+    parser.add_argument('--poll-interval',
+                        dest='poll_interval',
+                        type=float,
+                        default=10,
+                        help='Seconds between checks for changed files in watch mode (default=10)\n\n')
+
+    parser.add_argument('--results-file',
+                        dest='results_file',
+                        default=None,
+                        help='Appends the results of watch mode to this file\n\n')
+
+    parser.add_argument('--format',
+                        choices=('text', 'jsonl', 'csv', 'tsv'),
+                        default='text',
+                        help='Writes one record per file to stdout as soon as it is assessed\n(jsonl, csv or tsv). All other output goes to stderr.\n(default=text)\n\n')
+
+    parser.add_argument('--profile',
+                        action='store_true',
+                        help='Prints the time and bytes of every stage of the assessment\nand the slowest files\n\n')
 
-    Limits script execution to the first available core, ensuring
-    that the script runs on a single processor. If the `psutil` module is
-    not installed, a warning is printed, and no restriction is applied.
+    parser.add_argument('--profile-top',
+                        dest='profile_top',
+                        type=int,
+                        default=10,
+                        help='Number of slowest files printed by --profile (default=10)\n\n')
 
-    Parameters
-    ----------
-    None
+    parser.add_argument('--profile-dump',
+                        dest='profile_dump',
+                        help='Reassesses the slowest files of --profile with cProfile\nand writes the statistics to this file (pstats format)\n\n')
 
-    Returns
-    ----------
-    None
-    '''
-    try:
-        import psutil
-        proc = psutil.Process()
-        proc.cpu_affinity([proc.cpu_affinity()[0]])
-    except ModuleNotFoundError:
-        print(f'[WARNING] psutil module was not found. Running on multiple cores!')
-        pass
-
-def get_file_text(file: Path) -> str:
-    '''
-    Reads the entire contents of a text file and returns it as a string.
+    args = parser.parse_args()
 
-    Parameters
-    ----------
-    file : Path
-        Path to the file to be read.
+    if args.shard is not None and args.watch is not None:
+        raise NotImplementedError('Cannot shard watch mode.')
 
-    Returns
-    ----------
-    str
-        The raw text content of the file.
+    if args.jobs is not None or args.parallel:
+        args.jobs = get_worker_count(args.jobs or 'auto')
+        args.parallel = args.jobs > 1
 
-    Raises
-    ----------
-    FileNotFoundError
-        If the specified file does not exist.
+    if args.parallel and args.line_by_line:
+        raise NotImplementedError('Cannot perform line-by-line analysis in parallel.')
 
-    UnicodeDecodeError
-        If the file cannot be decoded using UTF-8.
-    '''
-    with open(file, 'r', encoding='utf-8') as infile:
-        return infile.read()
+    if args.deletechk:
+        raise ValueError('--deletechk is not available for ORCA6LogAssesor')
 
-def get_job_start_line_numbers(text: str) -> list[int]:
-    '''
-    Identifies line numbers in a Gaussian log file where a new
-    computational job or link step begins.
+    if args.resume and args.undo:
+        raise ValueError('--resume and --undo cannot be combined.')
 
-    Parameters
-    ----------
-    text : str
-        The complete text of the Gaussian log file.
+    if args.watch is not None and args.line_by_line:
+        raise NotImplementedError('Cannot perform line-by-line analysis in watch mode.')
 
-    Returns
-    ----------
-    list[int]
-        A list of line numbers where new job steps or internal links
-        are initiated. Each of these lines should be followed by a
-        "Normal termination" line in a successfully completed calculation.
-    '''
-    lines = text.split('\n')
+    if args.profile_dump:
+        args.profile = True
 
-    # Lines after which a normal termination should appear
-    termination_indicator_lines = []
+    if args.watch is not None and args.profile:
+        raise NotImplementedError('Cannot profile watch mode.')
 
-    # Geometry Optimization Run
-    # THE OPTIMIZATION HAS CONVERGED
-    # ****ORCA TERMINATED NORMALLY****
+    return args
 
-    for i, line in enumerate(lines):
-        if re.match(LINK_PATTERN, line) is not None:
-            termination_indicator_lines.append(i)
-        elif re.match(PROCEDING_JOB_STEP_PATTERN, line) is not None:
-            termination_indicator_lines.append(i)
+def get_merge_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='checkORCALogFiles.py merge',
+                                     description='Combines the partial result files of a sharded run (--shard),\nprints the summary and moves the files.',
+                                     formatter_class=lambda prog: argparse.RawTextHelpFormatter(prog, 2, 40))
 
-    return termination_indicator_lines
+    parser.add_argument('partial_files',
+                        nargs='+',
+                        type=Path,
+                        help='Partial result files of all shards\n\n',
+                        metavar='PARTIAL')
 
-def get_job_error_line_numbers(text: str) -> list[int]:
-    '''
-    Gets the line numbers that indicate an error has
-    occured.
-    '''
-    lines = text.split('\n')
+    parser.add_argument('--dry',
+                        action='store_true',
+                        help='Disables creation of directories and file movement\n\n')
 
-    error_lines = []
+    parser.add_argument('--journal',
+                        default=None,
+                        help='Journal of the file moves (default=<input>/assessment_moves.journal)\n\n')
 
-    for i, line in enumerate(lines):
+    # ORCA6 does not write .chk files
+    parser.set_defaults(deletechk=False)
 
-        if re.match(FILEIO_ERROR_NON_EXISTENT_FILE, line) is not None:
-            error_lines.append(i)
+    return parser.parse_args(sys.argv[2:])
 
-        elif re.match(ERRORNEOUS_WRITE, line) is not None:
-            error_lines.append(i)
+class ORCALogScanner(LogScanner):
+    '''
+    LogScanner that collects everything evaluate_orca_out_file needs from
+    an ORCA6 .out file. The rows of the "Geometry convergence" table of
+    every optimization cycle fill the optimization criteria series: the
+    MAX and RMS gradient take the place of the forces and the MAX and RMS
+    step that of the displacements (see ORCA_OPTIMIZATION_CRITERIA).
 
-        elif re.match(N_STEPS_EXCEEDED, line) is not None:
-            error_lines.append(i)
+    Attributes
+    ----------
+    term_lines: list[int]
+        0-indexed line numbers of "ORCA TERMINATED NORMALLY" lines
 
-    return error_lines
+    n_cycles: int
+        Number of optimization cycles (geometry convergence tables)
 
-def get_termination_line_numbers(text: str) -> list[int]:
+    error_banner: int | None
+        0-indexed line number of the last ERROR !!! banner
     '''
-    Gets the line numbers that indicate a new link
-    or an internal job. Successful calculations should
-    have a "Normal termination" line after each of these.
+    PROGRAM = 'orca'
+    STRUCTURE = ORCA_SCAN_STRUCTURE
+    DETECTORS = ORCA_DETECTORS
+    STAGES = ('job/term lines', 'errors', 'optimization criteria')
+
+    def __init__(self):
+        super().__init__()
+        self.n_cycles = 0
+        self.error_banner = None
+
+    @staticmethod
+    def get_stage(line: str) -> str:
+        if 'TERMINATED NORMALLY' in line:
+            return 'job/term lines'
+        if 'Geometry convergence' in line or GEOMETRY_CONVERGENCE_ROW.match(line):
+            return 'optimization criteria'
+        return 'errors'
+
+    def _inspect(self, lineno: int, line: str) -> None:
+        '''
+        Applies the individual patterns to a line that passed the prefilter
+        and searches the remaining lines with the detectors.
+        '''
+        if NORM_TERM_MESSAGE in line:
+            self.term_lines.append(lineno)
+            self.events.append((lineno, 'NORM TERM\t\t'))
+        elif 'Geometry convergence' in line:
+            self.n_cycles += 1
+            self.events.append((lineno, 'OPT CYCLE\t\t'))
+        else:
+            match = GEOMETRY_CONVERGENCE_ROW.match(line)
+            if match is None:
+                if line.rstrip().endswith(ERROR_BANNER):
+                    self.error_banner = lineno
+
+                # The message only reports a failed optimization directly
+                # below the banner
+                elif INCOMPLETE_GEOM_OPT_MESSAGE in line and self.error_banner != lineno - 1:
+                    return
+                self._detect(lineno, line)
+                return
+
+            kind, item, raw = match.groups()
+            series = {('MAX', 'gradient'): self.max_force,
+                      ('RMS', 'gradient'): self.rms_force,
+                      ('MAX', 'step'): self.max_displacement,
+                      ('RMS', 'step'): self.rms_displacement}[kind, item]
+            try:
+                series.append(float(raw))
+            except ValueError:
+                pass
+
+def get_orca_error(scan: ORCALogScanner) -> str | None:
     '''
-    lines = text.split('\n')
-
-    # Lines after which a normal termination should appear
-    terms = []
-    for i, line in enumerate(lines):
-        if ' Normal termination of Gaussian 16' in line:
-            terms.append(i)
-    return terms
-
-def _is_logfile_complete(split_text: list[str]) -> bool:
-    if split_text == ['']:
-        return False
+    Gets the reason an ORCA6 calculation failed from the errors found by
+    a scanner or None if no error was found. Only the first error in the
+    order of the detectors (XC-kernel, incomplete geometry optimization,
+    zero distance, multiplicity, site-specific detectors) is reported.
+    '''
+    specific_reasons, error_lines = scan.get_detections()
+    if len(specific_reasons) != 0:
+        return specific_reasons[0]
 
-    if '****ORCA TERMINATED NORMALLY****' in split_text[-2] or '****ORCA TERMINATED NORMALLY****' in split_text[-3]:
-        return True
+    if len(error_lines) != 0:
+        return error_lines[0][1]
 
-    return False
+    return None
 
-def get_orca_out_files(parent_dir: Path) -> list[Path]:
+def is_orca_scan_complete(scan: ORCALogScanner) -> bool:
     '''
-    Given a directory (parent_dir), gets all the ORCA6 .out files
-    from that directory and returns a list of Path objects for the
-    files.
+    Whether the normal termination is on one of the last
+    NORM_TERM_LAST_LINES lines of the scanned file.
     '''
-    # Check if its a single file
-    if not parent_dir.is_dir():
-        if not parent_dir.suffix == '.out':
-            raise TypeError('Input must be a directory of ORCA6 .out files or a single .out file.')
-        files = [parent_dir]    # Convert to list for later logic
-    else:
-        files = [x for x in parent_dir.glob('*.out')] # Get all the log files
-
-    if len(files) == 0:
-        raise FileNotFoundError(f'No log files found in {parent_dir.absolute()}')
-
-    return files
-
-def evaluate_orca_out_file(file: Path) -> tuple[Path, None, str] | tuple[Path, str, str] | tuple[Path, None, None]:
+    return len(scan.term_lines) != 0 and scan.term_lines[-1] >= scan.n_lines - NORM_TERM_LAST_LINES
+
+def judge_orca_scan(file: Path,
+                    scan: ORCALogScanner,
+                    window: int,
+                    tolerance: float,
+                    check_oscillation: bool = True,
+                    stats: dict | None = None) -> tuple[bool, list]:
     '''
-    Evaluates an ORCA6 out file to determine whether it completed successfully,
-    encountered an error, or terminated abnormally.
+    Turns the result of an ORCALogScanner into the verdict returned by
+    evaluate_orca_out_file.
 
     Parameters
     ----------
     file : Path
-        Path to the ORCA6 .out file to be analyzed.
+        Path to the ORCA6 .out file that was scanned.
 
-    Returns
-    ----------
-    tuple[Path, None, str]
-        If the .out completed successfully, returns the file path and its text.
+    scan : ORCALogScanner
+        Scanner that consumed the whole file.
 
-    tuple[Path, str, str]
-        If the .out encountered an error, returns the file path, an error message,
-        and the file text.
+    stats : dict | None
+        Receives the time of each stage with --profile (see add_stage_time).
 
-    tuple[Path, None, None]
-        If the .out is incomplete or running, returns the file path and None values.
+    Returns
+    ----------
+    tuple[bool, list]
+        Whether or not the calculation completed successfully and the
+        reasons it failed (empty if it was successful).
     '''
-    try:
-        text = get_file_text(file)
-    except UnicodeDecodeError:
-        return file, 'UNICODE DECODE ERROR. CHECK FILE MANUALLY', None
-
-    split_text = text.split('\n')
+    failure_reasons = []
+
+    error = get_orca_error(scan)
+    if error is not None:
+        failure_reasons.append(error)
+
+    # Get the oscillation criteria, but don't return it yet
+    # since an oscillating optimization can eventually converge
+    if check_oscillation:
+        t1 = time.perf_counter()
+        is_oscillating, oscillation_reason = check_oscillating_series(scan.max_force,
+                                                                      scan.rms_force,
+                                                                      scan.max_displacement,
+                                                                      scan.rms_displacement,
+                                                                      window=window,
+                                                                      tolerance=tolerance,
+                                                                      first_steps=scan.first_steps,
+                                                                      names=ORCA_OPTIMIZATION_CRITERIA)
+        add_stage_time(stats, 'oscillation', time.perf_counter() - t1,
+                       8 * sum(map(len, (scan.max_force, scan.rms_force, scan.max_displacement, scan.rms_displacement))))
+
+        if is_oscillating:
+            failure_reasons.append(oscillation_reason)
+
+    if error is None and not is_orca_scan_complete(scan):
+        failure_reasons.append('is incomplete')
+
+    # Special case where oscillation is detected but
+    # the optimizer eventually reached a minimum
+    if len(failure_reasons) == 1 and 'is oscillating' in failure_reasons[0]:
+        failure_reasons = []
+
+    if len(failure_reasons) == 0:
+        return True, failure_reasons
+
+    # Matches of non-fatal detectors only explain why a file failed
+    warnings, warning_lines = scan.get_detections(fatal=False)
+    failure_reasons.extend(warnings)
+    if len(warning_lines) != 0:
+        failure_reasons.append('\t'.join([f'{line} (line {i})' for i, line in warning_lines]))
+
+    return False, failure_reasons
+
+def assess_orca_out_file_tail(file: Path,
+                              check_oscillation: bool = True,
+                              stats: dict | None = None) -> tuple[bool, list] | None:
+    '''
+    Attempts to assess an ORCA6 .out file from its last block only. The
+    tail is conclusive when it ends with a normal termination or contains
+    one of the errors after which ORCA stops. Oscillations can only be
+    found in the body, so failed files are left to the full scan when
+    they were requested.
 
-    # Check for libxc error
-    if 'Error: Invalid or unknown value for Exchange in DFT XC-Kernel. Please try using LIBXC instead!' in text:
-        return file, 'Invalid/unknown value for Exchange in DFT XC-Kernel. Use LIBXC(<functional>)', text
+    Returns
+    ----------
+    tuple[bool, list] | None
+        The same (is_complete, reasons) tuple as evaluate_orca_out_file
+        or None if the full file must be scanned.
+    '''
+    # Compressed files can only be read from the start
+    if not is_seekable(file):
+        return None
 
-    # Check for failed geometry optimization error
-    if len(re.findall(INCOMPLETE_GEOM_OPT_PATTERN, text)) != 0:
-        return file, 'incomplete geometry optimization', text
+    tail, is_whole_file = get_file_tail(file)
 
-    zero_distance_errors = re.findall(ZERO_DISTANCE_ERROR_PATTERN, text)
-    if zero_distance_errors:
-        return file, str(zero_distance_errors[0]), text
+    # Small files are cheaper to scan in full
+    if is_whole_file:
+        return None
 
-    multiplicity_errors = re.findall(MULTIPLICITY_ERROR_PATTERN, text)
-    if multiplicity_errors:
-        return file, str(multiplicity_errors[0]), text
+    # The banner of a failed optimization may have been cut off
+    if INCOMPLETE_GEOM_OPT_MESSAGE.encode() in tail[:tail.find(b'\n')]:
+        return None
 
+    scan = ORCALogScanner().feed_buffer(tail)
+    if stats is not None:
+        stats['bytes_scanned'] = stats.get('bytes_scanned', 0) + scan.n_bytes
 
-    # Check for this warning
-    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
-    # !   SERIOUS PROBLEM WITH INTERNALS - ANGLE IS APPROACHING 180 OR 0 DEGREES   !
-    # !                       REBUILDING A NEW SET OF INTERNALS                    !
-    # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+    error = get_orca_error(scan)
+    if error is None and is_orca_scan_complete(scan):
+        return True, []
 
-    if not _is_logfile_complete(split_text=split_text):
-        return file, 'is incomplete', text
+    if error is not None and not check_oscillation:
+        return False, [error]
 
-    return file, None, text
+    return None
 
-def print_analysis_and_move_files(failed: dict,
-                                  completed: list[Path],
-                                  files: list[Path],
-                                  parent_dir: Path,
-                                  delete_chk: bool = False) -> None:
+def evaluate_orca_out_file(file: Path,
+                           window: int,
+                           tolerance: float,
+                           line_by_line: bool = False,
+                           check_oscillation: bool = True,
+                           tail_first: bool = False,
+                           stats: dict | None = None) -> tuple[bool, list]:
     '''
-    Prints a colorful analysis of the processed G16 log files.
+    Evaluates an ORCA6 out file to determine whether it completed successfully,
+    encountered an error, or terminated abnormally. The file is memory-mapped
+    and scanned once as bytes by an ORCALogScanner, so it is never decoded
+    as a whole.
 
     Parameters
     ----------
-    failed: dict
-        Dictionary of Path:reason pairs where reason is a string
-        containing an explanation of what went wrong.
+    file : Path
+        Path to the ORCA6 .out file to be analyzed.
+
+    window : int
+        Number of optimization cycles used to detect oscillations.
 
-    completed: list[Path]
-        List of completed G16 .log files as pathlib.Path objects
+    tolerance : float
+        Tolerance used to detect oscillations.
 
-    files: list[Path]
-        List of all G16 .log files
+    line_by_line : bool
+        Print a line-by-line analysis of the file.
 
-    parent_dir: Path
-        Directory on which the script operated
+    check_oscillation : bool
+        Detect oscillating geometry convergence criteria.
 
-    delete_chk: bool
-        Whether to delete .chk files instead of moving them
+    tail_first : bool
+        Assess the last block of the file first. The full file is only
+        read if the tail is not conclusive (see assess_orca_out_file_tail).
+
+    stats : dict | None
+        The number of bytes scanned is added to its 'bytes_scanned' key.
 
     Returns
     ----------
-    None
+    tuple[bool, list]
+        Whether or not the calculation completed successfully and the
+        reasons it failed (empty if it was successful).
     '''
-    if not args.dry:
-        # Make the new folders
-        completed_dir = parent_dir / 'completed'
-        if not completed_dir.exists():
-            completed_dir.mkdir()
-        failed_dir = parent_dir / 'failed'
-        if not failed_dir.exists():
-            failed_dir.mkdir()
-
-    print('-----------------------FILES MOVED TO COMPLETED DIRECTORY-----------------------')
-    for file in completed:
-
-        # Define the input file that made the calculation
-        _input_file = file.with_suffix('.inp')
-        if not _input_file.exists():
-            _input_file = file.with_suffix('.orcainp')
-
-        # Define the additional files that we should move
-        files_to_move = [
-            file,
-            _input_file,
-            # Those with .orcainp.extension
-            Path(_input_file.parent / f'{_input_file.name}.bibtex'),
-            Path(_input_file.parent / f'{_input_file.name}.densitiesinfo'),
-            Path(_input_file.parent / f'{_input_file.name}.xyz'),
-            Path(_input_file.parent / f'{_input_file.name}.gbw'),
-            Path(_input_file.parent / f'{_input_file.name}.densities'),
-            Path(_input_file.parent / f'{_input_file.name}.hess'),
-
-            Path(_input_file.parent / f'{_input_file.stem}.slurm'),
-
-            # Those with stem.extension
-            Path(_input_file.parent / f'{_input_file.stem}.bibtex'),
-            Path(_input_file.parent / f'{_input_file.stem}.densitiesinfo'),
-            Path(_input_file.parent / f'{_input_file.stem}.xyz'),
-            Path(_input_file.parent / f'{_input_file.stem}.gbw'),
-            Path(_input_file.parent / f'{_input_file.stem}.densities'),
-            Path(_input_file.parent / f'{_input_file.stem}.hess'),
-        ]
-
-        # Move the files
-        for _ in files_to_move:
-            if _.exists():
-                print(f'{bcolors.OKGREEN}{_.name}{bcolors.ENDC}')
-                if not args.dry:
-                    shutil.move(parent_dir / _.name, completed_dir / _.name)
-
-    print('-------------------------FILES MOVED TO FAILED DIRECTORY------------------------')
-    for file in failed.keys():
-
-        # Define the input file that made the calculation
-        _input_file = file.with_suffix('.inp')
-        if not _input_file.exists():
-            _input_file = file.with_suffix('.orcainp')
-
-        # Define the additional files that we should move
-        files_to_move = [
-            file,
-            _input_file,
-            # Those with .orcainp.extension
-            Path(_input_file.parent / f'{_input_file.name}.bibtex'),
-            Path(_input_file.parent / f'{_input_file.name}.densitiesinfo'),
-            Path(_input_file.parent / f'{_input_file.name}.xyz'),
-            Path(_input_file.parent / f'{_input_file.name}.gbw'),
-            Path(_input_file.parent / f'{_input_file.name}.densities'),
-            Path(_input_file.parent / f'{_input_file.name}.hess'),
-
-            Path(_input_file.parent / f'{_input_file.stem}.slurm'),
-
-            # Those with stem.extension
-            Path(_input_file.parent / f'{_input_file.stem}.bibtex'),
-            Path(_input_file.parent / f'{_input_file.stem}.densitiesinfo'),
-            Path(_input_file.parent / f'{_input_file.stem}.xyz'),
-            Path(_input_file.parent / f'{_input_file.stem}.gbw'),
-            Path(_input_file.parent / f'{_input_file.stem}.densities'),
-            Path(_input_file.parent / f'{_input_file.stem}.hess'),
-        ]
-
-        # Move the files
-        for _ in files_to_move:
-            if _.exists():
-                print(f'{bcolors.FAIL}{_.name}{bcolors.ENDC}')
-                if not args.dry:
-                    shutil.move(parent_dir / _.name, failed_dir / _.name)
-
-    print('\n')
-    print(f'{bcolors.BOLD}TOTAL{bcolors.ENDC}:\t\t{len(files)}')
-    print(f'{bcolors.BOLD}COMPLETED{bcolors.ENDC}:\t{len(completed)} ({len(completed)} of {len(files)})')
-    print(f'{bcolors.BOLD}FAILED{bcolors.ENDC}:\t\t{len(failed)} ({len(failed)} of {len(files)})')
-    print('\n')
-
-def print_summary(failed: dict,
-                  completed: list[Path],
-                  files: list[Path]):
+    if tail_first and not line_by_line:
+        t1 = time.perf_counter()
+        verdict = assess_orca_out_file_tail(file, check_oscillation=check_oscillation, stats=stats)
+        add_stage_time(stats, 'tail', time.perf_counter() - t1, stats['bytes_scanned'] if stats else 0)
+        if verdict is not None:
+            return verdict
+
+    scan = scan_logfile(file, scanner_class=ORCALogScanner, stats=stats)
+    if stats is not None:
+        stats['bytes_scanned'] = stats.get('bytes_scanned', 0) + scan.n_bytes
+
+    if line_by_line:
+        print_line_by_line_analysis(file=file, scan=scan)
+
+    return judge_orca_scan(file,
+                           scan,
+                           window=window,
+                           tolerance=tolerance,
+                           check_oscillation=check_oscillation,
+                           stats=stats)
+
+def evaluate_orca_out_file_incremental(file: Path,
+                                       checkpoint: dict | None,
+                                       window: int,
+                                       tolerance: float,
+                                       check_oscillation: bool = True,
+                                       tail_first: bool = False,
+                                       stats: dict | None = None) -> tuple[tuple[bool, list], dict | None]:
     '''
-    Prints a colorful analysis of only the failed files including
-    a reason. Also prints a summary of all files (total number completed
-    or failed).
+    Same as evaluate_orca_out_file, but resumes scanning from a checkpoint
+    of a previous run when the file has only been appended to since then.
 
-    Parameters
+    Returns
     ----------
-    failed: dict
-        Dictionary of Path:reason pairs where reason is a string
-        containing an explanation of what went wrong.
-
-    completed: list[Path]
-        List of completed G16 .log files as pathlib.Path objects
+    tuple[tuple[bool, list], dict | None]
+        The (is_complete, reasons) tuple of evaluate_orca_out_file and
+        the checkpoint to pass to the next call.
+    '''
+    if tail_first:
+        t1 = time.perf_counter()
+        verdict = assess_orca_out_file_tail(file, check_oscillation=check_oscillation, stats=stats)
+        add_stage_time(stats, 'tail', time.perf_counter() - t1, stats['bytes_scanned'] if stats else 0)
+        if verdict is not None:
+            return verdict, checkpoint
+
+    scan, checkpoint = resume_scan(file, checkpoint, scanner_class=ORCALogScanner, stats=stats)
+    if stats is not None:
+        stats['bytes_scanned'] = stats.get('bytes_scanned', 0) + scan.n_bytes
+
+    return judge_orca_scan(file,
+                           scan,
+                           window=window,
+                           tolerance=tolerance,
+                           check_oscillation=check_oscillation,
+                           stats=stats), checkpoint
+
+def assess(path: Path | str,
+           window: int = 10,
+           tolerance: float = 1e-5,
+           check_oscillation: bool = True,
+           tail_first: bool = False,
+           profile: bool = False) -> Assessment:
+    '''
+    Assesses an ORCA6 .out file in this process. Nothing is printed or
+    moved. See logfileAssessor.assess for the parameters.
+    '''
+    return evaluate_task((Path(path), None),
+                         evaluate=evaluate_orca_out_file,
+                         profile=profile,
+                         window=window,
+                         tolerance=tolerance,
+                         check_oscillation=check_oscillation,
+                         tail_first=tail_first)[0]
+
+def iter_assess(paths: Iterable[Path | str],
+                workers: int | str = 1,
+                window: int = 10,
+                tolerance: float = 1e-5,
+                check_oscillation: bool = True,
+                tail_first: bool = False,
+                profile: bool = False,
+                line_by_line: bool = False,
+                cache: AssessmentCache | None = None,
+                rebuild_cache: bool = False,
+                ionice: bool = False,
+                run_stats: dict | None = None,
+                include: list[str] | None = None,
+                exclude: list[str] | None = None,
+                max_memory: int | None = None) -> Iterator[Assessment]:
+    '''
+    Assesses ORCA6 .out files and yields each assessment as soon as it is
+    done. See logfileAssessor.iter_assess for the parameters.
+    '''
+    yield from iter_evaluations(paths,
+                                {'evaluate': evaluate_orca_out_file,
+                                 'evaluate_incremental': evaluate_orca_out_file_incremental,
+                                 'window': window,
+                                 'tolerance': tolerance,
+                                 'check_oscillation': check_oscillation,
+                                 'tail_first': tail_first,
+                                 'profile': profile,
+                                 'line_by_line': line_by_line},
+                                workers=workers,
+                                cache=cache,
+                                rebuild_cache=rebuild_cache,
+                                ionice=ionice,
+                                run_stats=run_stats,
+                                suffix='.out',
+                                include=include,
+                                exclude=exclude,
+                                max_memory=max_memory)
+
+def get_orca_companion_files(file: Path) -> list[Path]:
+    '''
+    Gets the files that belong to an ORCA6 .out file and are moved with
+    it: its .inp (or .orcainp) input file, its .slurm file and the files
+    with the ORCA_COMPANION_SUFFIXES named after the input file or after
+    its stem.
 
-    files: list[Path]
-        List of all G16 .log files
+    Parameters
+    ----------
+    file : Path
+        Path to the ORCA6 .out file.
 
     Returns
     ----------
-    None
+    list[Path]
+        Existing companion files, looked up in the DirectoryIndex of the
+        directory. Empty for members of tar archives, which are never moved.
     '''
-    print('------------------------------------OVERVIEW------------------------------------')
-    if len(failed) != 0:
-        for file, reason in failed.items():
-            print(f'{bcolors.FAIL}{file.name}{bcolors.ENDC} failed because {reason}')
+    if split_archive_member(file) is not None:
+        return []
+    index = get_directory_index(file.parent)
 
-    print('\n')
-    print(f'{bcolors.BOLD}TOTAL{bcolors.ENDC}:\t\t{len(files)}')
-    print(f'{bcolors.BOLD}COMPLETED{bcolors.ENDC}:\t{len(completed)} ({len(completed)} of {len(files)})')
-    print(f'{bcolors.BOLD}FAILED{bcolors.ENDC}:\t\t{len(failed)} ({len(failed)} of {len(files)})')
-    print('\n')
+    # Define the input file that made the calculation
+    stem = get_log_stem(file)
+    input_name = f'{stem}.inp' if index.has(f'{stem}.inp') else f'{stem}.orcainp'
 
-def main(args) -> None:
+    # Those with .orcainp.extension and those with stem.extension
+    names = [input_name, *(f'{input_name}.{x}' for x in ORCA_COMPANION_SUFFIXES), f'{stem}.slurm']
+    names.extend(f'{stem}.{x}' for x in ORCA_COMPANION_SUFFIXES)
+    return [file.parent / x for x in dict.fromkeys(names) if index.has(x)]
+
+def has_orca_terminated(file: Path) -> bool:
     '''
-    Main function for running the script.
+    Checks whether ORCA6 is done writing an .out file, i.e., whether its
+    last block contains a normal or an error termination.
     '''
-    # Note the time
-    t1 = time.time()
-
-    # Input parsing
-    if args.input is None:
-        parent_dir = Path().cwd()
-    else:
-        parent_dir = Path(args.input)
+    tail, _ = get_file_tail(file, TERMINATION_BLOCK_SIZE)
+    return any(x in tail for x in ORCA_TERMINATION_MESSAGES)
 
-    if not args.parallel:
-        set_single_proc_affinity()
-
-    # Get the logfiles
-    files = get_orca_out_files(parent_dir)
-
-    # Sort into failed dicts with files as keys and reasons as values.
-    # Completed is just a list of Paths
-    failed = {}
-    completed = []
-    print(f'Analyzing {len(files)} files...')
+def is_orca_verdict_final(file: Path, result: tuple[bool, list]) -> bool:
+    '''
+    Checks whether the assessment of an ORCA6 .out file can no longer
+    change in watch mode. See logfileAssessor.is_verdict_final.
+    '''
+    if result[0]:
+        return True
+    return has_orca_terminated(file) or len(get_slurm_failure_reasons(file)) != 0
 
-    if len(files) >= 200:
-        print('This may take a minute.')
+def main(args) -> None:
+    '''
+    Main function for running the script.
+    '''
+    return run_assessment(args,
+                          {'window': args.window,
+                           'tolerance': args.tolerance,
+                           'check_oscillation': args.no_oscillation_criteria,
+                           'tail_first': args.tail_first},
+                          program='orca',
+                          suffix='.out',
+                          evaluate=evaluate_orca_out_file,
+                          evaluate_incremental=evaluate_orca_out_file_incremental,
+                          is_final=is_orca_verdict_final,
+                          get_companions=get_orca_companion_files)
+
+def merge_main(args) -> None:
+    '''
+    Main function of the merge subcommand.
+    '''
+    return merge_and_move(args, get_companions=get_orca_companion_files)
 
-    # Iterate through the files
-    if args.parallel:
-        with multiprocessing.Pool() as p:
-            results = p.map(evaluate_orca_out_file, files)
-            completed = [x[0] for x in results if x[1] is None]
-            failed = {x[0]: x[1] for x in results if x[1] is not None}
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['merge']:
+        _args = get_merge_args()
+        _main = merge_main
     else:
-        for file in files:
+        _args = get_args()
+        _main = main
 
-            file, logfile_assessment, file_text = evaluate_orca_out_file(file)
+    # Only color output that goes to a terminal
+    if not (sys.stderr if getattr(_args, 'format', 'text') != 'text' else sys.stdout).isatty():
+        bcolors.disable()
 
-            if args.line_by_line:
-                if file_text is None:
-                    print(f'Could not perform line-by-line analysis because {logfile_assessment}')
-                else:
-                    #print_line_by_line_analysis(file, file_text)
-                    print('LINE BY LINE ANALYSIS IS NOT AVAILABLE')
-
-            if logfile_assessment is None and file not in failed.keys():
-                completed.append(file)
-            else:
-                failed[file] = logfile_assessment
-
-    # Print out the overall analysis
-    if not args.dry:
-        print_analysis_and_move_files(failed,
-                                      completed=completed,
-                                      files=files,
-                                      parent_dir=parent_dir,
-                                      delete_chk=bool(args.deletechk))
-
-    print_summary(failed,
-                  completed=completed,
-                  files=files)
-
-    print(f'Total analysis time (s): {round(time.time() - t1,2)}')
-
-if __name__ == "__main__":
-    args = get_args()
-
-    if args.deletechk:
+    if _args.deletechk:
         print(f'{bcolors.FAIL}\n\nWARNING\tWARNING\tWARNING\tWARNING\n{bcolors.ENDC}')
         print(f'{bcolors.WARNING}You have selected to delete .chk files. This action is permanent.{bcolors.ENDC}')
         print(f'{bcolors.WARNING}This feature is experimental and has not been fully tested.{bcolors.ENDC}')
@@ -521,4 +776,4 @@ if __name__ == "__main__":
             print(f'Response was {response.casefold}. Exiting gracefully.')
             exit()
 
-    main(args)
\ No newline at end of file
+    _main(_args)
@@ -0,0 +1,5760 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+'''
+Engine of the log file assessors: scanners and detectors, reading of
+(compressed) log files and tar archives, the worker pool, the assessment
+cache, the move journal and the assess/iter_assess API. Shared by
+checkGaussianLogFiles.py and checkORCALogFiles.py.
+'''
+
+from __future__ import annotations
+
+import os
+import re
+import io
+import sys
+import csv
+import bz2
+import gzip
+import lzma
+import tarfile
+import contextlib
+import json
+import collections
+import time
+import heapq
+import pstats
+import cProfile
+import hashlib
+import math
+import mmap
+import shutil
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import sqlite3
+import fnmatch
+import argparse
+import functools
+import itertools
+import threading
+import multiprocessing
+import multiprocessing.pool
+
+from array import array
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, Iterable, Iterator, TextIO
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+try:
+    import zstandard
+except ModuleNotFoundError:
+    zstandard = None
+
+try:
+    import resource
+except ModuleNotFoundError:
+    resource = None
+
+LINK_PATTERN = re.compile(r' Entering Link\s+\d+', re.DOTALL)
+NORM_TERM_PATTERN = re.compile(r' Normal termination of Gaussian 16', re.DOTALL)
+PROCEDING_JOB_STEP_PATTERN = re.compile(r'\s+Link1:\s+Proceeding to internal job step number\s+', re.DOTALL)
+FILEIO_ERROR_NON_EXISTENT_FILE = re.compile(r'\s+FileIO operation on non-existent file', re.DOTALL)
+ILLEGAL_MULTIPLICITY = re.compile(r'The combination of multiplicity\s+\d+\s+and\s+\d+\s+electrons is impossible', re.DOTALL)
+CONVERGENCE_FAILURE = re.compile(r'Convergence failure -- run terminated\.', re.DOTALL)
+ERRORNEOUS_WRITE = re.compile(r'Erroneous write. Write\s+(-|)\d+\s+instead of \d+.',  re.DOTALL)
+FREQ_START_PATTERN = re.compile(r'(?<=\n Frequencies --)(.*?)(?=\n Red. masses --)', re.DOTALL)
+
+# Lines of the frequency sections. The high precision modes of
+# freq=HPModes ("Frequencies ---") are skipped since G16 prints every
+# mode again in the regular format afterwards.
+FREQUENCY_LINE_PATTERN = re.compile(r'\n (?:(Harmonic frequencies)|Frequencies --(?!-)(.*)|(Red\. masses --))')
+FREQUENCY_LINE_PATTERN_BYTES = re.compile(FREQUENCY_LINE_PATTERN.pattern.encode())
+N_STEPS_EXCEEDED = re.compile(r'\s+--\s+Number of steps exceeded,\s+NStep= \d+')
+
+MAX_FORCE_PATTERN = re.compile(r'(?<=Maximum Force)(.*?)(?=(?:NO|YES))')
+RMS_FORCE_PATTERN = re.compile(r'(?<=RMS     Force)(.*?)(?=(?:NO|YES))')
+MAX_DISPLACEMENT_PATTERN = re.compile(r'(?<=Maximum Displacement)(.*?)(?=(?:NO|YES))')
+RMS_DISPLACEMENT_PATTERN = re.compile(r'(?<=RMS     Displacement)(.*?)(?=(?:NO|YES))')
+OPTIMIZATION_CRITERIA = ('MAX FORCE', 'RMS FORCE', 'MAX DISPLACEMENT', 'RMS DISPLACEMENT')
+
+# One optimization step: the SCF energy or the "Converged?" table that
+# follows it. The displacement lines are missing from some tables.
+OPTIMIZATION_STEP_PATTERN = re.compile(r' SCF Done:\s+E\([^)]*\)\s+=\s+(\S+)|'
+                                       r' Maximum Force\s+(\S+)\s+\S+\s+(YES|NO)[ \t]*\r?\n'
+                                       r' RMS     Force\s+(\S+)\s+\S+\s+(YES|NO)[ \t]*\r?\n'
+                                       r'(?: Maximum Displacement\s+(\S+)\s+\S+\s+(YES|NO)[ \t]*\r?\n'
+                                       r' RMS     Displacement\s+(\S+)\s+\S+\s+(YES|NO))?')
+OPTIMIZATION_STEP_PATTERN_BYTES = re.compile(OPTIMIZATION_STEP_PATTERN.pattern.encode())
+
+# Prefilter fragments of the lines G16LogScanner inspects itself. The
+# literals of its detectors (see G16_DETECTORS) are added to them.
+G16_SCAN_STRUCTURE = ('Entering Link', 'Link1:', 'Normal termination', 'Harmonic frequencies', 'Frequencies --',
+                      r'Red\. masses --', 'Maximum Force', 'RMS     Force', 'Maximum Displacement', 'RMS     Displacement')
+
+# Severities of the detectors, see Detector
+DETECTOR_SEVERITIES = ('error', 'warning')
+
+# Number of bytes read from the end of a file by the tail-first assessment
+TAIL_BLOCK_SIZE = 64 * 1024
+
+# Suffixes of compressed log files (e.g., .log.gz) and of tar archives
+# of log files. Reading zstd needs the zstandard package.
+COMPRESSION_SUFFIXES = ('.gz', '.bz2', '.xz') + (('.zst',) if zstandard is not None else ())
+ARCHIVE_SUFFIXES = {'.tar': None, '.tar.gz': '.gz', '.tgz': '.gz', '.tar.bz2': '.bz2', '.tbz2': '.bz2',
+                    '.tar.xz': '.xz', '.txz': '.xz', **({'.tar.zst': '.zst'} if zstandard is not None else {})}
+
+# Number of bytes decompressed at a time when a log file is streamed
+STREAM_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Members of compressed tar archives are decompressed by the parent and
+# sent to the workers. At most ARCHIVE_BUFFER_SIZE bytes of them are in
+# flight. Members of ARCHIVE_STREAM_MEMBER_SIZE bytes or more are scanned
+# by the parent while decompressing instead.
+ARCHIVE_BUFFER_SIZE = 256 * 1024 * 1024
+ARCHIVE_STREAM_MEMBER_SIZE = 64 * 1024 * 1024
+
+# Memory needed to assess a log file on top of the bytes of the file that
+# are mapped or held in memory (see estimate_task_memory and --max-memory)
+SCAN_MEMORY_OVERHEAD = 16 * 1024 * 1024
+
+# Bump when a change to the assessment logic invalidates cached results
+CACHE_VERSION = 6
+
+# Cached results that have not been used for this long are evicted
+CACHE_MAX_AGE = 30 * 24 * 60 * 60
+
+# Writes to the cache are stored in one transaction after this many
+# writes or seconds (see AssessmentCache)
+CACHE_COMMIT_WRITES = 256
+CACHE_COMMIT_SECONDS = 5.0
+
+# Number of optimization steps kept per criterion in a scan checkpoint
+CHECKPOINT_SERIES_LENGTH = 1000
+
+# Number of bytes at the start of a file and before a checkpoint offset
+# that must be unchanged to resume scanning from that offset
+CHECKPOINT_DIGEST_SIZE = 4096
+
+# Machine-readable codes of the failure reasons, see get_reason_codes
+REASON_CODES = (('preempted', re.compile(r'^preempted$')),
+                ('oom_kill', re.compile(r'^oom_kill$')),
+                ('cancelled', re.compile(r'^cancelled$')),
+                ('atomic_number_out_of_range', re.compile(r'Atomic number out of range')),
+                ('convergence_failure', re.compile(r'Convergence failure')),
+                ('illegal_multiplicity', re.compile(r'combination of multiplicity|^multiplicity \(\d+\) .+ -> impossible')),
+                ('xc_kernel', re.compile(r'XC-Kernel')),
+                ('zero_distance', re.compile(r'^Zero distance between atoms')),
+                ('imaginary_frequency', re.compile(r'^imaginary freq')),
+                ('oscillation', re.compile(r'is oscillating')),
+                ('erroneous_write', re.compile(r'Erroneous write')),
+                ('fileio_non_existent_file', re.compile(r'FileIO operation on non-existent file')),
+                ('steps_exceeded', re.compile(r'Number of steps exceeded|^incomplete geometry optimization$')),
+                ('job_failed', re.compile(r'^job on line \d+ failed')),
+                ('not_terminated', re.compile(r'last job did not terminate normally|^is incomplete$')),
+                ('running', re.compile(r'^running \(')))
+
+# Line numbers given in failure reasons ('job on line 12 failed.', '... (line 40)')
+REASON_LINE_PATTERN = re.compile(r'\bline (\d+)')
+
+# Files smaller than SMALL_FILE_SIZE bytes are sent to the workers in
+# batches of up to SMALL_FILE_BATCH_SIZE bytes or SMALL_FILE_BATCH_LENGTH files
+SMALL_FILE_SIZE = 1024 * 1024
+SMALL_FILE_BATCH_SIZE = 8 * 1024 * 1024
+SMALL_FILE_BATCH_LENGTH = 64
+
+# Directories created by this script. Skipped when walking a tree.
+OUTPUT_DIRECTORIES = ('completed', 'failed')
+
+# Number of bytes at the end of a file searched for a termination line
+# when deciding whether a failed verdict is final in watch mode
+TERMINATION_BLOCK_SIZE = 4096
+
+# A log file is reported as running (see RunningClassifier) if it was
+# modified less than RUNNING_AGE seconds ago or grows within
+# RUNNING_GROWTH_INTERVAL seconds
+RUNNING_AGE = 300
+RUNNING_GROWTH_INTERVAL = 1.0
+
+# SLURM job IDs (1234 or 1234_5 for a task of an array job) in the names
+# of SLURM output and error files
+SLURM_JOB_ID_PATTERN = re.compile(r'\d+(?:_\d+)?')
+
+# First column of the lines of squeue output that list a job, including
+# the pending tasks of array jobs (1234_[5-9])
+JOB_LIST_ID_PATTERN = re.compile(r'^(\d+)(?:_(?:\d+|\[[^\]]*\]))?$')
+
+# inotify(7) event masks and the layout of struct inotify_event
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+INOTIFY_EVENT = struct.Struct('iIII')
+
+# ioprio_set(2) constants and system call numbers per architecture
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_BE = 2
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_SET_SYSCALLS = {'x86_64': 251, 'aarch64': 30, 'ppc64le': 273}
+
+class bcolors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKCYAN = '\033[96m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+    UNDERLINE = '\033[4m'
+
+    @classmethod
+    def disable(cls) -> None:
+        '''
+        Turns off colors, e.g., when the output is not a terminal.
+        '''
+        for name in ('HEADER', 'OKBLUE', 'OKCYAN', 'OKGREEN', 'WARNING', 'FAIL', 'ENDC', 'BOLD', 'UNDERLINE'):
+            setattr(cls, name, '')
+
+def set_single_proc_affinity():
+    '''
+    Restricts the CPU affinity of the current process to a single core.
+
+    Limits script execution to the first available core, ensuring
+    that the script runs on a single processor. If the `psutil` module is
+    not installed, a warning is printed, and no restriction is applied.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    ----------
+    None
+    '''
+    try:
+        import psutil
+        proc = psutil.Process()
+        proc.cpu_affinity([proc.cpu_affinity()[0]])
+    except ModuleNotFoundError:
+        print('[WARNING] psutil module was not found. Running on multiple cores!')
+
+def get_cgroup_cpu_limit() -> int | None:
+    '''
+    Gets the number of CPUs the cgroup CPU quota (e.g., set by SLURM or
+    Arbiter) allows this process to use. Both cgroup v2 (cpu.max) and v1
+    (cpu.cfs_quota_us) are read, and the strictest quota of the cgroup
+    and its parents is used.
+
+    Returns
+    ----------
+    int | None
+        The number of CPUs or None if there is no quota
+    '''
+    try:
+        with open('/proc/self/cgroup', 'r') as infile:
+            lines = infile.read().splitlines()
+    except OSError:
+        return None
+
+    quotas = []
+    for line in lines:
+        _, controllers, cgroup = line.split(':', 2)
+        if controllers == '':
+            root, files = Path('/sys/fs/cgroup'), ('cpu.max',)
+        elif 'cpu' in controllers.split(','):
+            root, files = Path('/sys/fs/cgroup') / controllers, ('cpu.cfs_quota_us', 'cpu.cfs_period_us')
+            if not root.exists():
+                root = Path('/sys/fs/cgroup/cpu')
+        else:
+            continue
+
+        directory = root / cgroup.lstrip('/')
+        while True:
+            try:
+                values = [value for file in files for value in (directory / file).read_text().split()]
+                quota, period = values[:2]
+                if quota not in ('max', '-1'):
+                    quotas.append(max(1, math.ceil(int(quota) / int(period))))
+            except (OSError, ValueError):
+                pass
+
+            if directory == root:
+                break
+            directory = directory.parent
+
+    if len(quotas) == 0:
+        return None
+    return min(quotas)
+
+def get_allowed_cpus() -> list[int]:
+    '''
+    Gets the CPUs in the affinity mask of this process.
+    '''
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+def get_worker_count(jobs: str) -> int:
+    '''
+    Gets the number of worker processes for the -j/--jobs option.
+
+    Parameters
+    ----------
+    jobs: str
+        A positive number or 'auto'. With 'auto', the number of workers
+        is the smallest of the CPUs in the affinity mask, the cgroup CPU
+        quota, SLURM_CPUS_PER_TASK and SLURM_CPUS_ON_NODE.
+
+    Returns
+    ----------
+    int
+        Number of worker processes
+    '''
+    if jobs != 'auto':
+        try:
+            n_workers = int(jobs)
+        except ValueError:
+            raise ValueError(f'--jobs must be a positive number or auto, not {jobs}.')
+        if n_workers < 1:
+            raise ValueError(f'--jobs must be a positive number or auto, not {jobs}.')
+        return n_workers
+
+    limits = [len(get_allowed_cpus()), get_cgroup_cpu_limit()]
+    for variable in ('SLURM_CPUS_PER_TASK', 'SLURM_CPUS_ON_NODE'):
+        try:
+            limits.append(int(os.environ[variable]))
+        except (KeyError, ValueError):
+            pass
+
+    return max(1, min(x for x in limits if x is not None))
+
+def lower_io_priority() -> bool:
+    '''
+    Moves the current process to the lowest priority of the best-effort
+    I/O scheduling class (like `ionice -c 2 -n 7`), so that reading many
+    log files does not slow down other users of a shared file system.
+    Uses psutil if it is installed and the ioprio_set system call on Linux
+    otherwise.
+
+    Returns
+    ----------
+    bool
+        Whether the priority was lowered
+    '''
+    try:
+        import psutil
+        psutil.Process().ionice(psutil.IOPRIO_CLASS_BE, value=7)
+        return True
+    except (ModuleNotFoundError, AttributeError, OSError):
+        pass
+
+    number = IOPRIO_SET_SYSCALLS.get(os.uname().machine)
+    libc_name = ctypes.util.find_library('c')
+    if number is None or libc_name is None:
+        return False
+
+    libc = ctypes.CDLL(libc_name, use_errno=True)
+    return libc.syscall(number, IOPRIO_WHO_PROCESS, 0, IOPRIO_CLASS_BE << IOPRIO_CLASS_SHIFT | 7) == 0
+
+def get_peak_memory() -> tuple[int, int] | None:
+    '''
+    Gets the peak resident set size of this process and of the largest
+    of its finished child processes (e.g., the workers of a closed pool).
+
+    Returns
+    ----------
+    tuple[int, int] | None
+        Both peaks in bytes or None where the resource module is missing
+        (Windows)
+    '''
+    if resource is None:
+        return None
+
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    unit = 1 if sys.platform == 'darwin' else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit)
+
+def init_worker(allowed_cpus: list[int],
+                counter,
+                ionice: bool,
+                site_detectors: dict | None = None) -> None:
+    '''
+    Initializer of the multiprocessing workers. Pins every worker to a
+    different CPU of allowed_cpus, optionally lowers its I/O priority and
+    sets the site-specific detectors of the parent.
+
+    Parameters
+    ----------
+    allowed_cpus: list[int]
+        CPUs of the parent process
+
+    counter: multiprocessing.Value
+        Shared counter that numbers the workers
+
+    ionice: bool
+        Whether to lower the I/O priority of the worker
+
+    site_detectors: dict | None
+        Site-specific detectors by program (see set_site_detectors)
+    '''
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+
+    if hasattr(os, 'sched_setaffinity') and len(allowed_cpus) != 0:
+        try:
+            os.sched_setaffinity(0, {allowed_cpus[index % len(allowed_cpus)]})
+        except OSError:
+            pass
+
+    if ionice:
+        lower_io_priority()
+
+    if site_detectors:
+        set_site_detectors(site_detectors)
+
+def get_pool(n_workers: int, ionice: bool = False) -> multiprocessing.pool.Pool:
+    '''
+    Makes a multiprocessing pool of n_workers processes, each pinned
+    to its own CPU and using the detectors of this process (see init_worker).
+    '''
+    return multiprocessing.Pool(n_workers,
+                                initializer=init_worker,
+                                initargs=(get_allowed_cpus(), multiprocessing.Value('i', 0), ionice, dict(_SITE_DETECTORS)))
+
+def get_file_text(file: Path) -> str:
+    '''
+    Reads the entire contents of a text file and returns it as a string.
+
+    Parameters
+    ----------
+    file : Path
+        Path to the file to be read.
+
+    Returns
+    ----------
+    str
+        The raw text content of the file.
+
+    Raises
+    ----------
+    FileNotFoundError
+        If the specified file does not exist.
+
+    UnicodeDecodeError
+        If the file cannot be decoded using UTF-8.
+    '''
+    with open(file, 'r', encoding='utf-8') as infile:
+        return infile.read()
+
+def get_compression(name: str) -> str | None:
+    '''
+    Gets the compression suffix (one of COMPRESSION_SUFFIXES) of the name
+    of a compressed log file or tar archive, or None if it is not compressed.
+    '''
+    for suffix, compression in ARCHIVE_SUFFIXES.items():
+        if name.endswith(suffix):
+            return compression
+    return next((x for x in COMPRESSION_SUFFIXES if name.endswith(x)), None)
+
+def get_uncompressed_name(name: str) -> str:
+    '''
+    Gets the name of a log file without its compression suffix
+    ('a.log.gz' -> 'a.log').
+    '''
+    compression = get_compression(name)
+    return name[:-len(compression)] if compression is not None and not is_archive_name(name) else name
+
+def get_log_stem(file: Path) -> str:
+    '''
+    Gets the stem of a log file without its compression suffix, which is
+    shared by its companion files ('a.log.gz' -> 'a').
+    '''
+    return Path(get_uncompressed_name(file.name)).stem
+
+def is_archive_name(name: str) -> bool:
+    '''
+    Whether a name is that of a tar archive (see ARCHIVE_SUFFIXES).
+    '''
+    return name.endswith(tuple(ARCHIVE_SUFFIXES))
+
+def is_logfile_name(name: str, suffix: str = '.log') -> bool:
+    '''
+    Whether a name is that of a log file ending in suffix, of a compressed
+    log file or of a tar archive that may contain log files.
+    '''
+    return get_uncompressed_name(name).endswith(suffix) or is_archive_name(name)
+
+def get_member_name(name: str) -> str:
+    '''
+    Normalizes the name of a tar archive member ('./a.log' -> 'a.log').
+    '''
+    return PurePosixPath(name.lstrip('/')).as_posix()
+
+def split_archive_member(file: Path) -> tuple[Path, str] | None:
+    '''
+    Splits the path of a member of a tar archive ('campaign.tar.gz/a.log')
+    into the archive and the name of the member.
+
+    Returns
+    ----------
+    tuple[Path, str] | None
+        The archive and the member name or None if file is not in an archive
+    '''
+    for archive in file.parents:
+        if is_archive_name(archive.name) and archive.is_file():
+            return archive, file.relative_to(archive).as_posix()
+    return None
+
+def is_selected_member(name: str,
+                       suffix: str = '.log',
+                       include: list[str] | None = None,
+                       exclude: list[str] | None = None) -> bool:
+    '''
+    Checks the name of a tar archive member against the suffix of the log
+    files and the include and exclude patterns (see is_selected).
+    '''
+    name = get_member_name(name)
+    return name.endswith(suffix) and is_selected(name.rsplit('/', 1)[-1], name, include, exclude)
+
+# Member offsets of the uncompressed tar archives read so far, see get_archive_index
+_ARCHIVE_INDEXES = {}
+
+def get_archive_index(archive: Path) -> dict[str, tuple[int, int]]:
+    '''
+    Gets the offset and size of every regular member of an uncompressed
+    tar archive. Only the headers of the members are read.
+
+    Parameters
+    ----------
+    archive: Path
+        Path to the .tar file
+
+    Returns
+    ----------
+    dict[str, tuple[int, int]]
+        Offset and size of the data of every member by name (see get_member_name)
+    '''
+    stat = archive.stat()
+    identity = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    if archive not in _ARCHIVE_INDEXES or _ARCHIVE_INDEXES[archive][0] != identity:
+        with tarfile.open(archive, 'r:') as tar:
+            index = {get_member_name(x.name): (x.offset_data, x.size) for x in tar if x.isreg()}
+        _ARCHIVE_INDEXES[archive] = (identity, index)
+    return _ARCHIVE_INDEXES[archive][1]
+
+def open_compressed(file: Path, compression: str) -> BinaryIO:
+    '''
+    Opens a compressed file as a decompressing binary stream.
+
+    Parameters
+    ----------
+    file: Path
+        Path to the compressed file
+
+    compression: str
+        One of COMPRESSION_SUFFIXES
+    '''
+    if compression == '.gz':
+        return gzip.open(file, 'rb')
+    if compression == '.bz2':
+        return bz2.open(file, 'rb')
+    if compression == '.xz':
+        return lzma.open(file, 'rb')
+    if compression == '.zst' and zstandard is not None:
+        return zstandard.ZstdDecompressor().stream_reader(open(file, 'rb'), closefd=True)
+    raise ValueError(f'Cannot decompress {file.name}. Reading {compression} files needs the zstandard package.')
+
+@contextlib.contextmanager
+def open_archive(archive: Path) -> Iterator[tarfile.TarFile]:
+    '''
+    Opens a (compressed) tar archive for reading its members in order
+    without seeking.
+    '''
+    compression = get_compression(archive.name)
+    with contextlib.ExitStack() as stack:
+        if compression is None:
+            yield stack.enter_context(tarfile.open(archive, 'r|'))
+        elif compression == '.zst':
+            yield stack.enter_context(tarfile.open(fileobj=stack.enter_context(open_compressed(archive, compression)), mode='r|'))
+        else:
+            yield stack.enter_context(tarfile.open(archive, f'r|{compression[1:]}'))
+
+# Log files without a path of their own that are being assessed, see provide_logfile
+_PROVIDED_LOGFILES = {}
+
+@contextlib.contextmanager
+def provide_logfile(file: Path, data: bytes | BinaryIO, size: int) -> Iterator[None]:
+    '''
+    Makes the contents of a member of a compressed tar archive available
+    under its path (see split_archive_member) to the functions that read
+    log files, so the archive is not decompressed again to reach it.
+
+    Parameters
+    ----------
+    file: Path
+        Path of the member
+
+    data: bytes | BinaryIO
+        Contents of the member or a stream of them
+
+    size: int
+        Number of bytes of the member
+    '''
+    _PROVIDED_LOGFILES[file] = (data, size)
+    try:
+        yield
+    finally:
+        del _PROVIDED_LOGFILES[file]
+
+# Log files that must be streamed instead of memory-mapped, see stream_logfile
+_STREAMED_LOGFILES = set()
+
+@contextlib.contextmanager
+def stream_logfile(file: Path) -> Iterator[None]:
+    '''
+    Makes the functions that read log files stream a plain file in chunks
+    of STREAM_CHUNK_SIZE bytes instead of memory-mapping it, so that the
+    memory needed to scan it does not grow with its size. The end of the
+    file can still be read on its own (see get_file_tail).
+    '''
+    _STREAMED_LOGFILES.add(file)
+    try:
+        yield
+    finally:
+        _STREAMED_LOGFILES.discard(file)
+
+def locate_logfile(file: Path) -> tuple[Path, int, int] | None:
+    '''
+    Locates the bytes of a log file on disk.
+
+    Returns
+    ----------
+    tuple[Path, int, int] | None
+        The file holding the bytes (the log file itself or its tar
+        archive), their offset and their number, or None if they are
+        compressed and can only be streamed (see open_logfile_stream).
+    '''
+    if file in _PROVIDED_LOGFILES or get_compression(file.name) is not None:
+        return None
+
+    member = split_archive_member(file)
+    if member is None:
+        return file, 0, file.stat().st_size
+
+    archive, name = member
+    if get_compression(archive.name) is not None:
+        return None
+    offset, size = get_archive_index(archive)[name]
+    return archive, offset, size
+
+def is_seekable(file: Path) -> bool:
+    '''
+    Whether the end of a log file can be read without reading all of it.
+    '''
+    provided = _PROVIDED_LOGFILES.get(file)
+    if provided is not None:
+        return isinstance(provided[0], bytes)
+    return locate_logfile(file) is not None
+
+def get_logfile_size(file: Path) -> int:
+    '''
+    Gets the number of bytes of a log file. Compressed files that are not
+    provided (see provide_logfile) count with their size on disk.
+    '''
+    provided = _PROVIDED_LOGFILES.get(file)
+    if provided is not None:
+        return provided[1]
+
+    location = locate_logfile(file)
+    if location is not None:
+        return location[2]
+
+    member = split_archive_member(file)
+    return (file if member is None else member[0]).stat().st_size
+
+def logfile_exists(file: Path) -> bool:
+    '''
+    Whether a log file or the archive of an archive member exists.
+    '''
+    return split_archive_member(file) is not None or file.exists()
+
+@contextlib.contextmanager
+def map_logfile(file: Path) -> Iterator[tuple[bytes | mmap.mmap, int, int] | None]:
+    '''
+    Memory-maps the bytes of a log file, which works for plain files and
+    members of uncompressed tar archives.
+
+    Yields
+    ----------
+    tuple[bytes | mmap.mmap, int, int] | None
+        A buffer and the offsets of the first and after the last byte of
+        the log file in it or None if the log file can only be streamed
+        (see open_logfile_stream)
+    '''
+    provided = _PROVIDED_LOGFILES.get(file)
+    if provided is not None:
+        yield (provided[0], 0, provided[1]) if isinstance(provided[0], bytes) else None
+        return
+
+    location = locate_logfile(file)
+    if location is None or file in _STREAMED_LOGFILES:
+        yield None
+        return
+
+    # Empty files cannot be mapped
+    path, offset, size = location
+    if size == 0:
+        yield b'', 0, 0
+        return
+
+    with open(path, 'rb') as infile:
+        with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer, offset, offset + size
+
+@contextlib.contextmanager
+def open_logfile_stream(file: Path) -> Iterator[BinaryIO]:
+    '''
+    Opens a log file as a binary stream, decompressing compressed files
+    and members of compressed tar archives on the fly. A member of a
+    compressed archive that is not provided (see provide_logfile) is
+    reached by decompressing the archive up to it.
+    '''
+    provided = _PROVIDED_LOGFILES.get(file)
+    if provided is not None:
+        yield io.BytesIO(provided[0]) if isinstance(provided[0], bytes) else provided[0]
+        return
+
+    compression = get_compression(file.name)
+    if compression is not None:
+        with open_compressed(file, compression) as stream:
+            yield stream
+        return
+
+    member = split_archive_member(file)
+    if member is None:
+        with open(file, 'rb') as stream:
+            yield stream
+        return
+
+    archive, name = member
+    with open_archive(archive) as tar:
+        for info in tar:
+            if info.isreg() and get_member_name(info.name) == name:
+                yield tar.extractfile(info)
+                return
+    raise FileNotFoundError(f'{name} not found in {archive}')
+
+def get_file_tail(file: Path, block_size: int = TAIL_BLOCK_SIZE) -> tuple[bytes, bool]:
+    '''
+    Reads the last block of a file without reading the rest of it. The
+    file must be seekable (see is_seekable).
+
+    Parameters
+    ----------
+    file : Path
+        Path to the file to be read.
+
+    block_size : int
+        Number of bytes to read from the end of the file.
+
+    Returns
+    ----------
+    tuple[bytes, bool]
+        The raw bytes of the last block starting at the first complete
+        line and whether those bytes are the entire file.
+    '''
+    provided = _PROVIDED_LOGFILES.get(file)
+    if provided is not None:
+        data = provided[0]
+        if len(data) <= block_size:
+            return data, True
+        block = data[-block_size:]
+    else:
+        path, offset, size = locate_logfile(file)
+        with open(path, 'rb') as infile:
+            if size <= block_size:
+                infile.seek(offset)
+                return infile.read(size), True
+            infile.seek(offset + size - block_size)
+            block = infile.read(block_size)
+
+    # Drop the (possibly partial) line the block starts in
+    return block[block.find(b'\n') + 1:], False
+
+def get_job_start_line_numbers(split_text: list(str)) -> list[int]:
+    '''
+    Identifies line numbers in a Gaussian log file where a new
+    computational job or link step begins.
+
+    Parameters
+    ----------
+    text : str
+        The complete text of the Gaussian log file.
+
+    Returns
+    ----------
+    list[int]
+        A list of line numbers where new job steps or internal links
+        are initiated. Each of these lines should be followed by a
+        "Normal termination" line in a successfully completed calculation.
+    '''
+
+    return [i for i, line in enumerate(split_text) if LINK_PATTERN.match(line) or PROCEDING_JOB_STEP_PATTERN.match(line)]
+
+def get_job_error_line_numbers(text: str) -> list[int]:
+    '''
+    Gets the line numbers that indicate an error has
+    occured.
+    '''
+    lines = text.split('\n')
+
+    error_lines = []
+
+    return [i for i, line in enumerate(lines) if FILEIO_ERROR_NON_EXISTENT_FILE.match(line) or ERRORNEOUS_WRITE.match(line) or N_STEPS_EXCEEDED.match(line)]
+
+def get_termination_line_numbers(split_text: list[str]) -> list[int]:
+    '''
+    Gets the line numbers that indicate a new link
+    or an internal job. Successful calculations should
+    have a "Normal termination" line after each of these.
+    '''
+
+    # Lines after which a normal termination should appear
+    terms = []
+
+    for i, line in enumerate(split_text):
+        if ' Normal termination of Gaussian 16' in line:
+            terms.append(i)
+    return terms
+
+def get_n_normal_terminations(text: str) -> int:
+    '''
+    Counts the number of normal terminations in a Gaussian 16 log file.
+
+    Parameters
+    ----------
+    text : str
+        The raw text content of a Gaussian 16 log file.
+
+    Returns
+    ----------
+    int
+        The number of occurrences of the "Normal termination" pattern.
+    '''
+    return len(re.findall(NORM_TERM_PATTERN, text))
+
+def get_n_links(text: str) -> int:
+    '''
+    Counts the number of link steps in a Gaussian 16 log file.
+
+    Parameters
+    ----------
+    text : str
+        The raw text content of a Gaussian 16 log file.
+
+    Returns
+    ----------
+    int
+        The number of link steps found in the log file.
+    '''
+    return len(re.findall(LINK_PATTERN, text))
+
+def get_frequencies(text: str | bytes | mmap.mmap) -> list[array]:
+    '''
+    Parses the frequency sections of a Gaussian 16 log file with a single
+    pass over the text. A "Frequencies --" line is only used once the
+    "Red. masses --" line of its block was written.
+
+    Parameters
+    ----------
+    text : str | bytes | mmap.mmap
+        The raw text content of a Gaussian 16 log file.
+
+    Returns
+    ----------
+    list[array]
+        The vibrational frequencies (cm**-1) of every frequency section
+        (one per freq job) in the order in which they appear. Imaginary
+        frequencies are negative.
+    '''
+    pattern = FREQUENCY_LINE_PATTERN if isinstance(text, str) else FREQUENCY_LINE_PATTERN_BYTES
+    sections = []
+    pending = None
+    for match in pattern.finditer(text):
+        header, values, red_masses = match.groups()
+        if header is not None:
+            if not sections or len(sections[-1]) != 0:
+                sections.append(array('d'))
+        elif values is not None:
+            pending = values
+        elif red_masses is not None and pending is not None:
+            if not sections:
+                sections.append(array('d'))
+            sections[-1].extend(_to_float(x) for x in pending.split())
+            pending = None
+
+    return [x for x in sections if len(x) != 0]
+
+def read_frequencies(file: Path) -> list[array]:
+    '''
+    Parses the frequency sections of a Gaussian 16 log file (see
+    get_frequencies). The file is memory-mapped instead of read where
+    possible (see map_logfile) and decompressed otherwise.
+    '''
+    with map_logfile(file) as mapped:
+        if mapped is not None:
+            buffer, start, end = mapped
+            return get_frequencies(buffer if (start, end) == (0, len(buffer)) else buffer[start:end])
+
+    with open_logfile_stream(file) as stream:
+        return get_frequencies(stream.read())
+
+def get_imaginary_frequencies(frequencies: Iterable[float], threshold: float = 0.0) -> list[float]:
+    '''
+    Gets the imaginary (negative) frequencies of a frequency section.
+
+    Parameters
+    ----------
+    frequencies : Iterable[float]
+        Frequencies (cm**-1) of one frequency section.
+
+    threshold : float
+        Imaginary frequencies smaller in magnitude than this are ignored
+        as numerical noise. With the default of 0, a frequency of exactly
+        0 also counts as imaginary.
+
+    Returns
+    ----------
+    list[float]
+        The imaginary frequencies in the order in which they appear.
+    '''
+    return [x for x in frequencies if x <= -threshold]
+
+def get_imaginary_frequency_reason(sections: Iterable[Iterable[float]], threshold: float = 0.0) -> str | None:
+    '''
+    Gets the failure reason for the first frequency section (see
+    get_frequencies) with imaginary frequencies or None.
+    '''
+    for frequencies in sections:
+        imaginary = get_imaginary_frequencies(frequencies, threshold=threshold)
+        if len(imaginary) == 1:
+            return f'imaginary freq {imaginary[0]}'
+        if len(imaginary) > 1:
+            return f'imaginary freq {imaginary[0]} ({len(imaginary)} imaginary modes)'
+    return None
+
+def has_imaginary_frequency(text: str, threshold: float = 0.0) -> tuple[bool, float]:
+    '''
+    Determines if the Gaussian log file contains any imaginary frequencies.
+
+    Parameters
+    ----------
+    text : str
+        The raw text content of a Gaussian 16 log file.
+
+    threshold : float
+        Imaginary frequencies smaller in magnitude than this are ignored.
+
+    Returns
+    ----------
+    tuple[bool, float]
+        - A boolean value indicating whether an imaginary frequency is present
+          in any frequency section.
+        - The first imaginary frequency (if present) or else the lowest frequency
+          of the first frequency section as a float. Returns 0.0 if there is no
+          frequency section.
+    '''
+    sections = get_frequencies(text)
+    for frequencies in sections:
+        imaginary = get_imaginary_frequencies(frequencies, threshold=threshold)
+        if imaginary:
+            return True, imaginary[0]
+
+    # Return False and 0.0 if no frequency section is found
+    if not sections:
+        return False, 0.0
+    return False, sections[0][0]
+
+def has_frequency_section(text: str) -> bool:
+    '''
+    Determines if the Gaussian log file contains a frequency section.
+
+    Parameters
+    ----------
+    text : str
+        The raw text content of a Gaussian 16 log file.
+
+    Returns
+    ----------
+    bool
+        True if the log file contains a complete "Frequencies --" block,
+        False otherwise.
+    '''
+    return len(get_frequencies(text)) != 0
+
+def print_line_by_line_analysis(file: Path, scan: LogScanner):
+    '''
+    Prints a line-by-line analysis of a log file including
+    link entries, internal job steps, normal terminations,
+    and some errors.
+
+    Parameters
+    ----------
+    file : Path
+        Path to the log file being analyzed.
+    scan : LogScanner
+        Scanner that has already consumed the log file.
+
+    Returns
+    -------
+    None
+    '''
+    # Print centered file header
+    len_file_name = len(file.name)
+    spacer = (80 - len_file_name) / 2
+    print('-' * math.ceil(spacer) + file.name + '-' * math.floor(spacer))
+
+    if isinstance(scan, G16LogScanner):
+        print(f'\tNumber of link statements\t\t{scan.n_links}')
+    print(f'\tNumber of termination statements:\t{len(scan.term_lines)}\n')
+
+    print('\tLine-by-line analysis:')
+    for i, label in scan.events:
+        print(f'\t\t{label}\t{i + 1}')
+
+    print('\n')
+
+class DirectoryIndex:
+    '''
+    Index of the entries of a single directory built with one os.scandir
+    call. Used to look up the companion files of a G16 .log file
+    (.com, .chk, .wfn, SLURM .out and .error files) without globbing the
+    directory or calling .exists() for every log file.
+
+    SLURM .error and .out files are indexed under every prefix of their
+    name that is followed by a '.', so 'job.1234.error' is found for the
+    stems 'job' and 'job.1234'.
+
+    Parameters
+    ----------
+    directory: Path
+        Directory to index
+
+    names: Iterable[str] | None
+        Entries of the directory if they are already known (e.g., from
+        walking a tree). The directory is scanned if None.
+
+    mtime_ns: int | None
+        Modification time of the directory taken before names were
+        listed. An index built from names without it is rebuilt on its
+        first lookup by get_directory_index.
+    '''
+    def __init__(self, directory: Path, names: Iterable[str] | None = None, mtime_ns: int | None = None):
+        self.directory = directory
+        self.mtime_ns = mtime_ns
+        self.names = set()
+        self.error_files = {}
+        self.out_files = {}
+
+        if names is None:
+            # Taken before the listing, so a change made while listing
+            # makes the index stale instead of silently incomplete
+            self.mtime_ns = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as entries:
+                names = [entry.name for entry in entries]
+
+        for name in names:
+            self.names.add(name)
+
+            for is_companion, companions in ((name.endswith('error'), self.error_files),
+                                             ('out' in name, self.out_files)):
+                if not is_companion:
+                    continue
+                dot = name.find('.')
+                while dot != -1:
+                    companions.setdefault(name[:dot], []).append(name)
+                    dot = name.find('.', dot + 1)
+
+    def has(self, name: str) -> bool:
+        '''
+        Whether the directory contained an entry with this name.
+        '''
+        return name in self.names
+
+    def get_slurm_error_file(self, file: Path) -> Path | None:
+        '''
+        Gets the only <stem>.*error file of a log file or None.
+        '''
+        files = self.error_files.get(get_log_stem(file), [])
+        if len(files) != 1:
+            return None
+        return self.directory / files[0]
+
+    def get_slurm_out_file(self, file: Path) -> Path | None:
+        '''
+        Gets the only <stem>.*out* file of a log file or None.
+        '''
+        files = self.out_files.get(get_log_stem(file), [])
+        if len(files) != 1:
+            return None
+        return self.directory / files[0]
+
+# Directory indexes built so far, see get_directory_index
+_DIRECTORY_INDEXES = {}
+
+def get_directory_index(directory: Path, refresh: bool = False) -> DirectoryIndex:
+    '''
+    Gets the DirectoryIndex of a directory, building it on first use and
+    rebuilding it whenever the mtime of the directory changed (i.e., an
+    entry was created, renamed or removed). Costs one stat per call.
+
+    Parameters
+    ----------
+    directory: Path
+        Directory to index
+
+    refresh: bool
+        Rebuild the index even if the mtime of the directory did not
+        change (e.g., on file systems with a coarse mtime)
+
+    Returns
+    -------
+    DirectoryIndex
+        Index of the directory
+    '''
+    index = _DIRECTORY_INDEXES.get(directory)
+    if refresh or index is None or index.mtime_ns != os.stat(directory).st_mtime_ns:
+        index = _DIRECTORY_INDEXES[directory] = DirectoryIndex(directory)
+    return index
+
+def get_slurm_out_file(file: Path) -> Path | None:
+    '''
+    Identifies the SLURM output file corresponding to a given job file.
+
+    Parameters
+    ----------
+    file : Path
+        Path to the SLURM job submission file.
+
+    Returns
+    -------
+    Path or None
+        The matched SLURM error file if exactly one match is found;
+        otherwise, None. Always None for members of tar archives.
+    '''
+    if split_archive_member(file) is not None:
+        return None
+    return get_directory_index(file.parent).get_slurm_out_file(file)
+
+def get_slurm_error_file(file: Path) -> Path | None:
+    '''
+    Identifies the SLURM error file corresponding to a given job file
+    by matching the file stem in the filename.
+
+    Parameters
+    ----------
+    file : Path
+        Path to the Gaussian16 .log file.
+
+    Returns
+    -------
+    Path or None
+        The matched SLURM error file if exactly one match is found;
+        otherwise, None. Always None for members of tar archives.
+    '''
+    if split_archive_member(file) is not None:
+        return None
+    return get_directory_index(file.parent).get_slurm_error_file(file)
+
+def get_companion_files(file: Path, include_chk: bool = True) -> list[Path]:
+    '''
+    Gets the files that belong to a G16 .log file and are moved with it.
+
+    Parameters
+    ----------
+    file : Path
+        Path to the Gaussian16 .log file.
+
+    include_chk : bool
+        Whether to include .chk files and the additional kraken-formatted
+        files.
+
+    Returns
+    -------
+    list[Path]
+        Existing .com, .chk, _sp_ra.chk, _sp_rc.chk, _sp_solv.chk and .wfn
+        files. Empty for members of tar archives, which are never moved.
+    '''
+    if split_archive_member(file) is not None:
+        return []
+    index = get_directory_index(file.parent)
+
+    stem = get_log_stem(file)
+    names = [f'{stem}.com']
+    if include_chk:
+        names.append(f'{stem}.chk')
+
+        # Additional checks for kraken-formatted chk files
+        names.extend([f'{stem}_sp_ra.chk',
+                      f'{stem}_sp_rc.chk',
+                      f'{stem}_sp_solv.chk',
+                      f'{stem}.wfn'])
+
+    return [file.parent / name for name in names if index.has(name)]
+
+def job_preempted(slurm_error_file: Path) -> bool:
+    '''
+    Checks whether a SLURM job was preempted based on the last line
+    of the associated SLURM error file.
+
+    Parameters
+    ----------
+    slurm_error_file : Path
+        Path to the SLURM error file.
+
+    Returns
+    -------
+    bool
+        True if the last line contains 'PREEMPTION'; False otherwise.
+    '''
+    with open(slurm_error_file, 'r', encoding='utf-8') as infile:
+        lines = infile.readlines()
+
+    if 'PREEMPTION' in lines[-1]:
+        return True
+    return False
+
+def slurm_oom_kill(slurm_error_file: Path) -> bool:
+    '''
+    Checks whether a SLURM job was terminated due to an out-of-memory (OOM)
+    event by searching for 'oom_kill' in the last line of the SLURM error file.
+
+    Parameters
+    ----------
+    slurm_error_file : Path
+        Path to the SLURM error file.
+
+    Returns
+    -------
+    bool
+        True if 'oom_kill' is found in the last line; False otherwise.
+    '''
+    with open(slurm_error_file, 'r') as infile:
+        lines = infile.readlines()
+
+    if 'oom_kill' in lines[-1]:
+        return True
+
+    return False
+
+def job_cancelled(slurm_error_file: Path) -> bool:
+    '''
+    Checks whether a SLURM job was cancelled by inspecting the last line
+    of the SLURM error file.
+
+    Parameters
+    ----------
+    slurm_error_file : Path
+        Path to the SLURM error file.
+
+    Returns
+    -------
+    bool
+        True if the last line contains 'CANCELLED'; False otherwise.
+    '''
+    with open(slurm_error_file, 'r') as infile:
+        lines = infile.readlines()
+
+    if 'CANCELLED' in lines[-1]:
+        return True
+    return False
+
+def get_slurm_failure_reasons(file: Path) -> list[str]:
+    '''
+    Gets the reasons a job failed outside of G16 from the SLURM
+    error file that belongs to a G16 .log file.
+
+    Parameters
+    ----------
+    file : Path
+        Path to the Gaussian16 .log file.
+
+    Returns
+    -------
+    list[str]
+        Any of 'preempted', 'oom_kill' and 'cancelled'. Empty if
+        no SLURM error file was found.
+    '''
+    reasons = []
+
+    slurm_error_file = get_slurm_error_file(file=file)
+    if slurm_error_file is None:
+        return reasons
+
+    if job_preempted(slurm_error_file):
+        reasons.append('preempted')
+
+    if slurm_oom_kill(slurm_error_file):
+        reasons.append('oom_kill')
+
+    if job_cancelled(slurm_error_file):
+        reasons.append('cancelled')
+
+    return reasons
+
+def get_slurm_job_ids(file: Path) -> list[str]:
+    '''
+    Gets the SLURM job IDs of a G16 .log file from the names of its SLURM
+    output and error files (e.g., 'job.1234.out' or 'job_1234.error').
+    The slurm-<job id>.out files of a directory are not used, as they
+    cannot be told apart when several jobs write to the same directory.
+
+    Parameters
+    ----------
+    file : Path
+        Path to the Gaussian16 .log file.
+
+    Returns
+    -------
+    list[str]
+        Job IDs such as '1234' or '1234_5'. Empty if none were found.
+    '''
+    if split_archive_member(file) is not None:
+        return []
+
+    stem = get_log_stem(file)
+    job_ids = []
+    for slurm_file in (get_slurm_out_file(file), get_slurm_error_file(file)):
+        if slurm_file is None:
+            continue
+        match = SLURM_JOB_ID_PATTERN.search(slurm_file.name, len(stem))
+        if match is not None and match.group(0) not in job_ids:
+            job_ids.append(match.group(0))
+    return job_ids
+
+def read_job_list(file: Path) -> set[str]:
+    '''
+    Reads the IDs of the queued and running SLURM jobs from squeue output
+    saved to a file (e.g., `squeue --me > jobs.txt` or `squeue -h -o %i`).
+    The first column of every line that starts with a job ID is used, so
+    header lines are skipped. Pending tasks of array jobs (1234_[5-9])
+    are listed with the ID of the array.
+
+    Parameters
+    ----------
+    file : Path
+        Path to the job list.
+
+    Returns
+    -------
+    set[str]
+        IDs of the jobs in the list
+    '''
+    job_ids = set()
+    with open(file, 'r', encoding='utf-8') as infile:
+        for line in infile:
+            fields = line.split()
+            if len(fields) == 0:
+                continue
+            match = JOB_LIST_ID_PATTERN.match(fields[0])
+            if match is None:
+                continue
+            job_ids.add(match.group(1) if '[' in fields[0] else fields[0])
+    return job_ids
+
+def get_open_files(directories: Iterable[Path] | None = None) -> set[tuple[int, int]]:
+    '''
+    Gets the device and inode numbers of the files held open by the
+    processes of the current user on this node. Only the file descriptors
+    whose target lies below one of directories are stat'ed, the others are
+    only read with readlink. Empty where /proc is not available.
+
+    Parameters
+    ----------
+    directories: Iterable[Path] | None
+        Only files below these directories are reported
+        (default=all files)
+
+    Returns
+    -------
+    set[tuple[int, int]]
+        (st_dev, st_ino) of the open files
+    '''
+    open_files = set()
+    try:
+        pids = [x for x in os.listdir('/proc') if x.isdigit()]
+    except OSError:
+        return open_files
+
+    # Targets of the file descriptors are real paths
+    prefixes = None
+    if directories is not None:
+        prefixes = tuple(os.path.join(os.path.realpath(x), '') for x in directories)
+
+    uid = os.getuid()
+    for pid in pids:
+        try:
+            if os.stat(f'/proc/{pid}').st_uid != uid:
+                continue
+            with os.scandir(f'/proc/{pid}/fd') as entries:
+                for entry in entries:
+                    try:
+                        if prefixes is not None and not os.readlink(entry.path).startswith(prefixes):
+                            continue
+                        stat = os.stat(entry.path)
+                    except OSError:
+                        continue
+                    open_files.add((stat.st_dev, stat.st_ino))
+        except OSError:
+            continue
+    return open_files
+
+class RunningClassifier:
+    '''
+    Holds back the log files of jobs that are still running so that they
+    are neither read in full nor moved (see --skip-running). Only metadata
+    is used. The signals are checked from cheapest to most expensive:
+
+    1. The SLURM job IDs of the file (see get_slurm_job_ids) and the job
+       list. Files whose job is in the list are running. All other files
+       go on to the checks below.
+    2. A modification time less than max_age seconds ago
+    3. The file or its .chk file being held open by a process of the
+       current user on this node
+    4. Growth of the file within growth_interval seconds. This also
+       catches files whose modification time is off because the clocks
+       of the nodes differ.
+
+    Compressed log files and members of tar archives are never running.
+
+    Parameters
+    ----------
+    job_ids: set[str] | None
+        IDs of the queued and running SLURM jobs (see read_job_list)
+
+    max_age: float
+        Files modified less than this many seconds ago are running
+
+    growth_interval: float
+        Seconds between the two stats of the growth check
+
+    directories: Iterable[Path] | None
+        Directories the files are in or below. Limits the open file
+        check to them (default=all files, see get_open_files).
+
+    Attributes
+    ----------
+    running: list[Assessment]
+        Assessments with the verdict 'running' of the files held back
+    '''
+    def __init__(self,
+                 job_ids: set[str] | None = None,
+                 max_age: float = RUNNING_AGE,
+                 growth_interval: float = RUNNING_GROWTH_INTERVAL,
+                 directories: Iterable[Path] | None = None):
+        self.job_ids = job_ids
+        self.max_age = max_age
+        self.growth_interval = growth_interval
+        self.directories = None if directories is None else list(directories)
+        self.running = []
+        self.open_files = None
+
+    def filter(self, files: Iterable[Path]) -> Iterator[Path]:
+        '''
+        Yields the files that are not running. Files that pass the other
+        checks are yielded growth_interval seconds after they were first
+        seen, so the whole run is delayed by up to that much. Files that
+        grew before their interval ended are held without waiting.
+        '''
+        pending = collections.deque()
+        for file in files:
+            if is_archive_name(file.name) or get_compression(file.name) is not None:
+                yield file
+                continue
+
+            try:
+                stat = file.stat()
+            except OSError:
+                yield file
+                continue
+
+            reason = self.get_reason(file, stat)
+            if reason is not None:
+                self.hold(file, stat, reason)
+            else:
+                pending.append((time.monotonic() + self.growth_interval, file, stat))
+
+            while pending and pending[0][0] <= time.monotonic():
+                yield from self.release(*pending.popleft())
+
+        # Only wait for the files that did not grow yet
+        pending = collections.deque(x for x in pending if self.is_unchanged(*x))
+        while pending:
+            time.sleep(max(0.0, pending[0][0] - time.monotonic()))
+            yield from self.release(*pending.popleft())
+
+    def get_reason(self, file: Path, stat: os.stat_result) -> str | None:
+        '''
+        Checks the signals that do not need a second stat and returns the
+        reason the file is running or None.
+        '''
+        if self.job_ids is not None:
+            for job_id in get_slurm_job_ids(file):
+                if job_id in self.job_ids or job_id.split('_')[0] in self.job_ids:
+                    return f'running (SLURM job {job_id} is in the job list)'
+
+        age = time.time() - stat.st_mtime
+        if age < self.max_age:
+            return f'running (modified {max(0.0, age):.0f} s ago)'
+
+        if self.open_files is None:
+            self.open_files = get_open_files(self.directories)
+        chk_file = file.with_name(f'{get_log_stem(file)}.chk')
+        for _file in (file, chk_file):
+            if _file is chk_file and not get_directory_index(file.parent).has(chk_file.name):
+                continue
+            try:
+                _stat = stat if _file is file else _file.stat()
+            except OSError:
+                continue
+            if (_stat.st_dev, _stat.st_ino) in self.open_files:
+                return f'running ({_file.name} is open)'
+        return None
+
+    def release(self, due: float, file: Path, stat: os.stat_result) -> Iterator[Path]:
+        '''
+        Yields a file unless it changed since its first stat.
+        '''
+        if self.is_unchanged(due, file, stat):
+            yield file
+
+    def is_unchanged(self, due: float, file: Path, stat: os.stat_result) -> bool:
+        '''
+        Checks whether a file still exists and did not change since its
+        first stat. Files that changed are held.
+        '''
+        try:
+            new_stat = file.stat()
+        except OSError:
+            return False
+
+        if (new_stat.st_size, new_stat.st_mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            self.hold(file, new_stat, f'running (grew by {new_stat.st_size - stat.st_size} bytes within {self.growth_interval:g} s)')
+            return False
+        return True
+
+    def hold(self, file: Path, stat: os.stat_result, reason: str) -> None:
+        '''
+        Records a running file.
+        '''
+        self.running.append(Assessment(file, completed=None, reasons=[reason], size=stat.st_size))
+
+def is_selected(name: str,
+                relative_path: str,
+                include: list[str] | None = None,
+                exclude: list[str] | None = None) -> bool:
+    '''
+    Checks a file or directory against the include and exclude patterns
+    of the command line (fnmatch syntax).
+
+    Parameters
+    ----------
+    name: str
+        Name of the file or directory
+
+    relative_path: str
+        Path of the file or directory relative to the input directory
+
+    include: list[str] | None
+        Patterns of which the name must match at least one. Not applied
+        if None. Pass None for directories.
+
+    exclude: list[str] | None
+        Patterns of which neither the name nor the relative path may
+        match any
+
+    Returns
+    ----------
+    bool
+        Whether the file or directory is selected
+    '''
+    if exclude is not None:
+        for pattern in exclude:
+            if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative_path, pattern):
+                return False
+
+    if include is not None:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in include)
+
+    return True
+
+def _is_selected_logfile(name: str,
+                         relative_path: str,
+                         include: list[str] | None = None,
+                         exclude: list[str] | None = None) -> bool:
+    '''
+    Checks a (compressed) log file or tar archive against the include and
+    exclude patterns (see is_selected). The include patterns are not
+    applied to archives, whose members are checked on their own (see
+    is_selected_member).
+    '''
+    if is_archive_name(name):
+        return is_selected(name, relative_path, None, exclude)
+    return is_selected(get_uncompressed_name(name), relative_path, include, exclude)
+
+def get_logfiles(parent_dir: Path,
+                 include: list[str] | None = None,
+                 exclude: list[str] | None = None,
+                 suffix: str = '.log') -> list[Path]:
+    '''
+    Given a directory (parent_dir), gets all the Gaussian16 logfiles
+    (or other files ending in suffix, e.g., '.out' for ORCA) from that
+    directory and returns a list of Path objects for the files.
+    Compressed log files and tar archives are included (see
+    is_logfile_name). The include patterns are matched against the
+    uncompressed names and are applied to the members of archives later.
+    '''
+    # Check if its a single file
+    if not parent_dir.is_dir():
+        if not is_logfile_name(parent_dir.name, suffix):
+            raise TypeError(f'Input must be a directory of {suffix} files or a single {suffix} file.')
+        files = [parent_dir]    # Convert to list for later logic
+    else:
+        files = [x for x in parent_dir.glob('*')
+                 if is_logfile_name(x.name, suffix) and _is_selected_logfile(x.name, x.name, include, exclude)] # Get all the log files
+
+    if len(files) == 0:
+        raise FileNotFoundError(f'No log files found in {parent_dir.absolute()}')
+
+    return files
+
+def _scan_directory(directory: Path,
+                    parent_dir: Path,
+                    include: list[str] | None,
+                    exclude: list[str] | None,
+                    suffix: str = '.log') -> tuple[Path, int, list[str], list[Path], list[Path]]:
+    '''
+    Lists one directory for iter_logfiles.
+
+    Returns
+    ----------
+    tuple[Path, int, list[str], list[Path], list[Path]]
+        The directory, its mtime_ns before listing, the names of all of
+        its entries, its selected log files and its selected
+        subdirectories
+    '''
+    names, files, subdirs = [], [], []
+    mtime_ns = os.stat(directory).st_mtime_ns
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            names.append(entry.name)
+            relative_path = os.path.relpath(entry.path, parent_dir)
+
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in OUTPUT_DIRECTORIES and is_selected(entry.name, relative_path, None, exclude):
+                    subdirs.append(Path(entry.path))
+            elif is_logfile_name(entry.name, suffix) and _is_selected_logfile(entry.name, relative_path, include, exclude):
+                files.append(Path(entry.path))
+
+    return directory, mtime_ns, names, files, subdirs
+
+def iter_logfiles(parent_dir: Path,
+                  include: list[str] | None = None,
+                  exclude: list[str] | None = None,
+                  max_workers: int | None = None,
+                  suffix: str = '.log') -> Iterator[Path]:
+    '''
+    Walks the directory tree below parent_dir and yields its Gaussian16
+    .log files as soon as they are found. Directories are listed with
+    os.scandir by a pool of threads so that slow (network) file systems
+    are listed concurrently. The completed and failed directories made
+    by this script and symlinked directories are not entered.
+
+    The listing of every directory is also used to build its
+    DirectoryIndex, so the companion file lookups do not list it again.
+
+    Parameters
+    ----------
+    parent_dir: Path
+        Root of the tree. A single .log file is yielded as is.
+
+    include: list[str] | None
+        fnmatch patterns of which a .log file name must match one
+
+    exclude: list[str] | None
+        fnmatch patterns for names or relative paths of files and
+        directories that are skipped
+
+    max_workers: int | None
+        Number of threads listing directories
+
+    suffix: str
+        Suffix of the log files (e.g., '.out' for ORCA)
+
+    Yields
+    ----------
+    Path
+        Gaussian16 .log files in no particular order
+    '''
+    if not parent_dir.is_dir():
+        yield from get_logfiles(parent_dir, suffix=suffix)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_scan_directory, parent_dir, parent_dir, include, exclude, suffix)}
+        while len(futures) != 0:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                directory, mtime_ns, names, files, subdirs = future.result()
+                for subdir in subdirs:
+                    futures.add(executor.submit(_scan_directory, subdir, parent_dir, include, exclude, suffix))
+
+                _DIRECTORY_INDEXES[directory] = DirectoryIndex(directory, names, mtime_ns)
+                yield from files
+
+def has_atomic_number_out_of_basis_set(split_text: list[str]) -> tuple[bool, str] | tuple[bool, None]:
+    '''
+    Checks whether any line in the input text indicates an atomic number
+    outside the supported range of the basis set.
+
+    Parameters
+    ----------
+    split_text: list of str
+        Lines of text
+
+    Returns
+    -------
+    tuple of bool and Optional[str]
+        - True and the first offending line if such a message is found.
+        - False and None otherwise.
+    '''
+    for line in split_text:
+        if 'Atomic number out of range for' in line:
+            return True, line.strip()
+    return False, None
+
+def has_illegal_multiplicity(text: str) -> tuple[bool, str] | tuple[bool, None]:
+    '''
+    Checks for an illegal spin multiplicity message in G16 output text.
+
+    Parameters
+    ----------
+    text : str
+        Full contents of a Gaussian .log file.
+
+    Returns
+    -------
+    tuple of bool and Optional[str]
+        - True and the matched error message if found.
+        - False and None otherwise.
+    '''
+    match = re.search(ILLEGAL_MULTIPLICITY, text)
+    if match:
+        return True, re.sub(r'\s+', ' ', match.group(0))
+    return False, None
+
+class OptimizationTrajectory:
+    '''
+    Optimization steps of a Gaussian 16 log file stored in compact
+    arrays (8 bytes per value and 1 byte per step for the flags) instead
+    of lists of Python floats. Values that could not be read (e.g.,
+    asterisks printed for a bad step) are NaN.
+
+    Attributes
+    ----------
+    energy: array
+        SCF energy (Hartree) of every step
+
+    max_force, rms_force, max_displacement, rms_displacement: array
+        Optimization criteria of every step
+
+    converged: array
+        Bit i of every step is set if criterion i (in the order of
+        OPTIMIZATION_CRITERIA) is converged (YES)
+    '''
+    __slots__ = ('energy', 'max_force', 'rms_force', 'max_displacement', 'rms_displacement', 'converged')
+
+    def __init__(self):
+        self.energy = array('d')
+        self.max_force = array('d')
+        self.rms_force = array('d')
+        self.max_displacement = array('d')
+        self.rms_displacement = array('d')
+        self.converged = array('B')
+
+    def __len__(self) -> int:
+        return len(self.converged)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({len(self)} steps)'
+
+    def append(self, energy: float, values: Iterable[float], flags: Iterable[bool]) -> None:
+        '''
+        Adds a step with its energy, the values of the four optimization
+        criteria and whether each of them is converged.
+        '''
+        self.energy.append(energy)
+        for series, value in zip(self.series, values):
+            series.append(value)
+        self.converged.append(sum(1 << i for i, flag in enumerate(flags) if flag))
+
+    @property
+    def series(self) -> tuple[array, array, array, array]:
+        '''
+        The four optimization criteria series in the order of OPTIMIZATION_CRITERIA.
+        '''
+        return self.max_force, self.rms_force, self.max_displacement, self.rms_displacement
+
+    def is_converged(self, step: int) -> bool:
+        '''
+        Whether all four criteria of a step are converged.
+        '''
+        return self.converged[step] == 0b1111
+
+    def to_numpy(self) -> dict:
+        '''
+        Gets the arrays as NumPy arrays that share the memory of the
+        trajectory (no copy is made). Requires NumPy.
+        '''
+        if np is None:
+            raise ModuleNotFoundError('numpy is required for OptimizationTrajectory.to_numpy')
+        return {key: np.frombuffer(getattr(self, key), dtype=np.uint8 if key == 'converged' else np.float64)
+                for key in self.__slots__}
+
+def _to_float(raw: str | bytes | None) -> float:
+    '''
+    Converts a number printed by G16 to a float or NaN if it cannot be read.
+    '''
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        return math.nan
+
+def get_optimization_trajectory(text: str | bytes | mmap.mmap) -> OptimizationTrajectory:
+    '''
+    Extracts the optimization steps of a Gaussian 16 log file with a
+    single pass over the text. Every "Converged?" table is parsed at once
+    together with the SCF energy printed before it.
+
+    Parameters
+    ----------
+    text: str | bytes | mmap.mmap
+        Raw text of a Gaussian16 log file
+
+    Returns
+    ----------
+    OptimizationTrajectory
+        The energies, optimization criteria and convergence flags of
+        every optimization step.
+    '''
+    pattern = OPTIMIZATION_STEP_PATTERN if isinstance(text, str) else OPTIMIZATION_STEP_PATTERN_BYTES
+    trajectory = OptimizationTrajectory()
+    energy = math.nan
+    for match in pattern.finditer(text):
+        if match.group(1) is not None:
+            energy = _to_float(match.group(1))
+            continue
+        trajectory.append(energy,
+                          [_to_float(x) for x in match.group(2, 4, 6, 8)],
+                          [x in ('YES', b'YES') for x in match.group(3, 5, 7, 9)])
+        energy = math.nan
+    return trajectory
+
+def read_optimization_trajectory(file: Path) -> OptimizationTrajectory:
+    '''
+    Extracts the optimization steps of a Gaussian 16 log file (see
+    get_optimization_trajectory). The file is memory-mapped, so it is
+    never loaded into memory as a whole, unless it is compressed (see
+    map_logfile).
+
+    Parameters
+    ----------
+    file : Path
+        Path to the Gaussian16 .log file.
+
+    Returns
+    ----------
+    OptimizationTrajectory
+        The energies, optimization criteria and convergence flags of
+        every optimization step.
+    '''
+    with map_logfile(file) as mapped:
+        if mapped is not None:
+            buffer, start, end = mapped
+            return get_optimization_trajectory(buffer if (start, end) == (0, len(buffer)) else buffer[start:end])
+
+    with open_logfile_stream(file) as stream:
+        return get_optimization_trajectory(stream.read())
+
+def get_optimization_data(text: str) -> tuple[list[float], list[float], list[float], list[float]]:
+    '''
+    Extracts Maximum Force, RMS Force, Maximum Displacement, and RMS Displacement
+    from a Gaussian log file.
+
+    Parameters
+    ----------
+    text: str
+        Raw text of Gaussian16 log file
+
+    Returns
+    ----------
+    tuple[list[float], list[float], list[float], list[float]]
+        The Maximum Force, RMS Force, Maximum Displacement and RMS Displacement
+        series. Values that could not be read (e.g., asterisks which might
+        indicate a bad step from the optimizer) are left out.
+
+    Notes
+    ----------
+    - Use get_optimization_trajectory to keep the SCF energies and convergence
+      flags and to store the steps in compact arrays.
+    '''
+    trajectory = get_optimization_trajectory(text)
+    return tuple([x for x in series if not math.isnan(x)] for series in trajectory.series)
+
+def detect_alternation(series: Iterable[float],
+                       window: int = 10,
+                       tolerance: float = 1e-4) -> tuple[bool, set]:
+    '''
+    Detects if values in the last `window` steps alternate between two or more values.
+    '''
+    if len(series) < window:
+        return False, None  # Not enough data
+
+    return detect_oscillations([series], window=window, tolerance=tolerance)[0] is not None, set(series[-window:])
+
+def _get_steady_windows_numpy(series: list[Iterable[float]],
+                              window: int,
+                              tolerance: float):
+    '''
+    Tests every `window` wide window of every series at once. The series
+    are right-aligned in a 2-D array padded with NaN on the left, so the
+    windows that touch the padding compare as not steady.
+
+    Returns a boolean array with one row per series and one column per
+    window (indexed by the step the window starts at) and the number of
+    padded steps of each series.
+    '''
+    lengths = [len(x) for x in series]
+    n_steps = max(lengths)
+    values = np.full((len(series), n_steps), np.nan)
+    for i, x in enumerate(series):
+        values[i, n_steps - lengths[i]:] = x
+
+    # The change of the step size between consecutive steps
+    with np.errstate(invalid='ignore'):
+        unsteady = ~(np.abs(np.diff(np.abs(np.diff(values, axis=1)), axis=1)) < tolerance)
+
+    # Count the unsteady steps inside every window with a cumulative sum
+    width = window - 2
+    counts = np.zeros((len(series), unsteady.shape[1] + 1), dtype=np.int64)
+    np.cumsum(unsteady, axis=1, out=counts[:, 1:])
+    if width > 0:
+        steady = counts[:, width:] == counts[:, :-width]
+    else:
+        steady = np.ones((len(series), n_steps - max(window, 1) + 1), dtype=bool)
+
+    padding = [n_steps - x for x in lengths]
+    steady &= np.arange(steady.shape[1]) >= np.array(padding)[:, None]
+    return steady, padding
+
+def _get_steady_windows_python(series: Iterable[float],
+                               window: int,
+                               tolerance: float) -> list[bool]:
+    '''
+    Pure Python version of _get_steady_windows_numpy for a single series
+    that is used when NumPy is not installed.
+    '''
+    diffs = [abs(series[i] - series[i - 1]) for i in range(1, len(series))]
+    unsteady = [not abs(diffs[i] - diffs[i - 1]) < tolerance for i in range(1, len(diffs))]
+
+    width = window - 2
+    if width <= 0:
+        return [True] * (len(series) - max(window, 1) + 1)
+
+    counts = [0, *itertools.accumulate(unsteady)]
+    return [counts[i + width] == counts[i] for i in range(len(counts) - width)]
+
+def detect_oscillations(series: list[Iterable[float]],
+                        window: int = 10,
+                        tolerance: float = 1e-4) -> list[tuple[int, int] | None]:
+    '''
+    Slides a window of `window` steps over the full history of one or
+    more optimization criteria series and finds the oscillation each of
+    them ends with. A window oscillates if the absolute change between
+    consecutive steps stays the same (within `tolerance`) over the whole
+    window, i.e., the optimizer keeps stepping back and forth.
+
+    All series are tested in a single vectorized pass if NumPy is
+    installed.
+
+    Parameters
+    ----------
+    series: list[Iterable[float]]
+        Optimization criteria series (e.g., max force, rms force,
+        max displacement and rms displacement). They do not need to be
+        of the same length.
+
+    window: int
+        Number of steps that must oscillate.
+
+    tolerance: float
+        Largest change of the step size that still counts as oscillating.
+
+    Returns
+    ----------
+    list[tuple[int, int] | None]
+        For every series, the index of the step at which the oscillation
+        started and the number of steps it lasted if the last `window`
+        steps of the series oscillate, else None.
+    '''
+    results = []
+    if np is not None and any(len(x) >= window for x in series):
+        steady, padding = _get_steady_windows_numpy(series, window, tolerance)
+        for row, pad in zip(steady, padding):
+            if not row[-1]:
+                results.append(None)
+                continue
+            breaks = np.flatnonzero(~row)
+            onset = (int(breaks[-1]) + 1 if breaks.size else 0) - pad
+            results.append((onset, row.shape[0] + window - 1 - pad - onset))
+        return results
+
+    for x in series:
+        if len(x) < window:
+            results.append(None)
+            continue
+        steady = _get_steady_windows_python(x, window, tolerance)
+        if not steady[-1]:
+            results.append(None)
+            continue
+        onset = len(steady) - 1
+        while onset > 0 and steady[onset - 1]:
+            onset -= 1
+        results.append((onset, len(x) - onset))
+    return results
+
+def check_oscillating_optimization_criteria(text: str,
+                                            window: int = 10,
+                                            tolerance: float = 1e-4) -> tuple[bool, None] | tuple[bool, str]:
+    '''
+    Tests whether an optimization is oscillating
+    '''
+    # Get the match criteria
+    max_force, rms_force, max_displacement, rms_displacement = get_optimization_data(text=text)
+
+    return check_oscillating_series(max_force,
+                                    rms_force,
+                                    max_displacement,
+                                    rms_displacement,
+                                    window=window,
+                                    tolerance=tolerance)
+
+def check_oscillating_series(max_force: list[float],
+                             rms_force: list[float],
+                             max_displacement: list[float],
+                             rms_displacement: list[float],
+                             window: int = 10,
+                             tolerance: float = 1e-4,
+                             first_steps: Iterable[int] = (0, 0, 0, 0),
+                             names: Iterable[str] = OPTIMIZATION_CRITERIA) -> tuple[bool, None] | tuple[bool, str]:
+    '''
+    Tests whether an optimization is oscillating given the
+    already extracted optimization criteria series. The reason
+    gives the optimization step at which the oscillation started
+    and how many steps it lasted. first_steps is the number of steps
+    that were dropped from the start of each series (see
+    LogScanner.get_state) and names are the names of the series
+    used in the reason.
+    '''
+    if not max_force:
+        return False, 'no optimization data for max force'
+    if not rms_force:
+        return False, 'no optimization data for rms force'
+    if not max_displacement:
+        return False, 'no optimization data for max displacement'
+    if not rms_displacement:
+        return False, 'no optimization data for rms displacement'
+
+    # Check all series for oscillation at once
+    series = (max_force, rms_force, max_displacement, rms_displacement)
+    oscillations = detect_oscillations(series, window=window, tolerance=tolerance)
+    for name, values, first_step, oscillation in zip(names, series, first_steps, oscillations):
+        if oscillation is not None:
+            onset, duration = oscillation
+            return True, (f'{name} is oscillating between {set(values[-window:])} '
+                          f'since step {first_step + onset + 1} ({duration} steps)')
+
+    return False, None
+
+def has_convergence_error(text: str) -> tuple[bool, str] | tuple[bool, None]:
+    '''
+    Checks for an convergence failure message in G16 output text.
+
+    Parameters
+    ----------
+    text : str
+        Full contents of a Gaussian .log file.
+
+    Returns
+    -------
+    tuple of bool and Optional[str]
+        - True and the matched error message if found.
+        - False and None otherwise.
+    '''
+    match = re.search(CONVERGENCE_FAILURE, text)
+    if match:
+        return True, re.sub(r'\s+', ' ', match.group(0))
+    return False, None
+
+def _parse_criterion_value(raw: str) -> float | None:
+    '''
+    Converts the text captured by one of the optimization criteria
+    patterns into a float. Returns None for values containing asterisks
+    (a bad step from the optimizer) or for empty captures.
+    '''
+    tokens = raw.split()
+    if not tokens or '*' in tokens[0]:
+        return None
+    return float(tokens[0])
+
+def get_pattern_literal(pattern: str) -> str | None:
+    r'''
+    Gets the longest text that every match of a regular expression
+    contains literally, such as 'Number of steps exceeded,' for
+    r'\s+--\s+Number of steps exceeded,\s+NStep= \d+'. Groups, character
+    classes and optional characters are skipped.
+
+    Parameters
+    ----------
+    pattern: str
+        Regular expression
+
+    Returns
+    ----------
+    str | None
+        The literal or None if it is shorter than 3 characters or the
+        pattern is an alternation at its top level.
+    '''
+    runs = ['']
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            escaped = pattern[i + 1:i + 2]
+            if depth == 0 and escaped and not escaped.isalnum():
+                runs[-1] += escaped
+            elif depth == 0:
+                runs.append('')
+            i += 2
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            runs.append('')
+        elif depth != 0:
+            pass
+        elif char == '|':
+            return None
+        elif char == '[':
+            # Skip the character class
+            i += 1
+            if pattern[i:i + 1] == '^':
+                i += 1
+            if pattern[i:i + 1] == ']':
+                i += 1
+            while i < len(pattern) and pattern[i] != ']':
+                i += 2 if pattern[i] == '\\' else 1
+            runs.append('')
+        elif char in '*?{':
+            # The preceding character is optional
+            runs[-1] = runs[-1][:-1]
+            runs.append('')
+            if char == '{':
+                i = pattern.find('}', i)
+                if i == -1:
+                    break
+        elif char in '+.^$':
+            runs.append('')
+        else:
+            runs[-1] += char
+        i += 1
+
+    literal = max(runs, key=len)
+    return literal if len(literal) >= 3 else None
+
+class Detector:
+    '''
+    Declarative description of an error signature in a log file. The
+    detectors of a LogScanner are compiled into its prefilter and into a
+    single alternation (see LogScanner.compile_detectors), so every line
+    is searched once no matter how many detectors there are.
+
+    Parameters
+    ----------
+    name: str
+        Reason code of the matches (see get_reason_codes)
+
+    pattern: str
+        Regular expression searched in the lines that contain literal.
+        '^' anchors it at the start of the line. Named groups are not
+        allowed.
+
+    literal: str | None
+        Text that every matching line contains, used by the prefilter
+        (default=derived from pattern, see get_pattern_literal)
+
+    severity: str
+        One of DETECTOR_SEVERITIES
+
+    fatal: bool
+        Whether a match fails the file. The matches of other detectors
+        are only reported, prefixed with their severity, for files that
+        failed anyway.
+
+    once: bool
+        Only keep the first match and report it as a reason of its own
+        instead of together with the other error lines
+
+    message: str | None
+        Reason reported for a match (default=the stripped matched text,
+        with its whitespace collapsed for detectors with once)
+    '''
+    __slots__ = ('name', 'pattern', 'literal', 'severity', 'fatal', 'once', 'message')
+
+    def __init__(self,
+                 name: str,
+                 pattern: str,
+                 literal: str | None = None,
+                 severity: str = 'error',
+                 fatal: bool = True,
+                 once: bool = False,
+                 message: str | None = None):
+        if severity not in DETECTOR_SEVERITIES:
+            raise ValueError(f'Severity of detector {name} must be one of {", ".join(DETECTOR_SEVERITIES)}, not {severity}')
+        try:
+            compiled = re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f'Invalid pattern of detector {name}: {e}') from e
+        if compiled.groupindex:
+            raise ValueError(f'Pattern of detector {name} must not contain named groups')
+        if literal is None:
+            literal = get_pattern_literal(pattern)
+            if literal is None:
+                raise ValueError(f'Cannot derive a literal from the pattern of detector {name}. Set its literal.')
+
+        self.name = name
+        self.pattern = pattern
+        self.literal = literal
+        self.severity = severity
+        self.fatal = fatal
+        self.once = once
+        self.message = message
+
+    def __repr__(self) -> str:
+        return f'Detector({self.name!r}, {self.pattern!r})'
+
+    @property
+    def label(self) -> str:
+        '''
+        Label of the matches in the line-by-line analysis.
+        '''
+        label = self.name.upper().replace('_', ' ')
+        return label + '\t' * max(1, 3 - len(label) // 8)
+
+    def to_dict(self) -> dict:
+        '''
+        Gets the detector as a dict of the arguments of Detector.
+        '''
+        return {key: getattr(self, key) for key in self.__slots__}
+
+# Site-specific detectors by program (see set_site_detectors)
+_SITE_DETECTORS = {}
+
+def get_default_detector_file() -> Path:
+    '''
+    Gets the default location of the site-specific detectors, honoring
+    XDG_CONFIG_HOME if it is set.
+    '''
+    config_home = os.environ.get('XDG_CONFIG_HOME')
+    if not config_home:
+        config_home = Path.home() / '.config'
+    return Path(config_home) / 'GaussianLogfileAssessor' / 'detectors.json'
+
+def load_detectors(file: Path) -> dict[str, list[Detector]]:
+    '''
+    Reads site-specific detectors from a JSON file of the form
+
+        {"detectors": [{"program": "g16",
+                        "name": "link_9999",
+                        "pattern": "Error termination request processed by link 9999",
+                        "severity": "error",
+                        "fatal": true}]}
+
+    Every entry takes the arguments of Detector. "program" is "g16"
+    (default) or "orca".
+
+    Parameters
+    ----------
+    file: Path
+        JSON file with the detectors
+
+    Returns
+    ----------
+    dict[str, list[Detector]]
+        Detectors by program
+    '''
+    with open(file, 'r', encoding='utf-8') as infile:
+        config = json.load(infile)
+
+    detectors = {}
+    for entry in config.get('detectors', []):
+        entry = dict(entry)
+        program = entry.pop('program', 'g16')
+        try:
+            detectors.setdefault(program, []).append(Detector(**entry))
+        except TypeError as e:
+            raise ValueError(f'Invalid detector in {file}: {e}') from e
+    return detectors
+
+def get_site_detectors(program: str | None = None) -> list[Detector]:
+    '''
+    Gets the site-specific detectors of a program or of all programs.
+    '''
+    if program is None:
+        return [x for detectors in _SITE_DETECTORS.values() for x in detectors]
+    return list(_SITE_DETECTORS.get(program, ()))
+
+def set_site_detectors(detectors: dict[str, Iterable[Detector]]) -> None:
+    '''
+    Replaces the site-specific detectors and recompiles the detectors
+    of every LogScanner class. The detectors of the workers are set by
+    get_pool.
+
+    Parameters
+    ----------
+    detectors: dict[str, Iterable[Detector]]
+        Detectors by program (see load_detectors)
+    '''
+    _SITE_DETECTORS.clear()
+    _SITE_DETECTORS.update({program: tuple(x) for program, x in detectors.items()})
+
+    scanner_classes = [LogScanner]
+    while scanner_classes:
+        scanner_class = scanner_classes.pop()
+        if 'DETECTORS' in vars(scanner_class) and scanner_class.PROGRAM is not None:
+            scanner_class.compile_detectors()
+        scanner_classes.extend(scanner_class.__subclasses__())
+
+class LogScanner:
+    '''
+    Streaming state machine that collects everything the assessment of a
+    log file needs in a single pass over its lines. Every program adds a
+    subclass with the prefilter fragments of the lines it inspects itself
+    (STRUCTURE and _inspect), its error signatures (DETECTORS) and the
+    profiling stages of its inspection (STAGES and get_stage).
+
+    Lines are fed in order with `feed`. Most lines are rejected by a single
+    search with TRIGGER, the alternation of the STRUCTURE fragments and the
+    literals of the detectors. The few remaining lines are inspected by the
+    individual patterns and searched once with MATCHER, the alternation of
+    the patterns of all detectors (see compile_detectors).
+
+    Attributes
+    ----------
+    n_lines: int
+        Number of lines consumed so far
+
+    job_lines: list[int]
+        0-indexed line numbers where a job starts
+
+    term_lines: list[int]
+        0-indexed line numbers of normal termination lines
+
+    matches: list[tuple[int, str, str]]
+        0-indexed line numbers, detector names and reasons of the
+        matches of the detectors (see get_detections)
+
+    max_force, rms_force, max_displacement, rms_displacement: list[float]
+        Optimization criteria series in the order they appear
+
+    first_steps: list[int]
+        Number of steps dropped from the start of each optimization
+        criteria series when the state was checkpointed
+
+    events: list[tuple[int, str]]
+        Labelled events used for the line-by-line printout
+
+    n_bytes: int
+        Number of bytes consumed by this scanner object. Not part of
+        the checkpointed state.
+
+    stop_at_fatal: bool
+        Stop consuming input after the first match of a fatal detector
+        (see --first-reason). Such a scanner must not be checkpointed.
+
+    stopped: bool
+        Whether the scanner stopped because of stop_at_fatal
+    '''
+    PROGRAM = None
+    STRUCTURE = ()
+    DETECTORS = ()
+    STAGES = ('errors',)
+
+    # Set on the instance to stop early
+    stop_at_fatal = False
+    stopped = False
+
+    # Set by compile_detectors
+    ACTIVE_DETECTORS = ()
+    TRIGGER = None
+    TRIGGER_BYTES = None
+    MATCHER = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'DETECTORS' in vars(cls) and cls.PROGRAM is not None:
+            cls.compile_detectors()
+
+    def __init__(self):
+        self.n_bytes = 0
+        self.n_lines = 0
+        self.job_lines = []
+        self.term_lines = []
+        self.matches = []
+        self.max_force = []
+        self.rms_force = []
+        self.max_displacement = []
+        self.rms_displacement = []
+        self.first_steps = [0, 0, 0, 0]
+        self.events = []
+
+    def feed(self, lines: Iterable[str]) -> LogScanner:
+        '''
+        Consumes lines of a log file. Can be called repeatedly; line
+        numbers continue from the previous call.
+
+        Parameters
+        ----------
+        lines: Iterable[str]
+            Lines of the log file (with or without trailing newlines)
+
+        Returns
+        ----------
+        LogScanner
+            The scanner itself so calls can be chained
+        '''
+        trigger = self.TRIGGER.search
+        lineno = self.n_lines
+        for line in lines:
+            if trigger(line) is not None:
+                self._inspect(lineno, line)
+            lineno += 1
+            self.n_bytes += len(line)
+            if self.stopped:
+                break
+        self.n_lines = lineno
+        return self
+
+    def feed_buffer(self,
+                    buffer: bytes | mmap.mmap,
+                    start: int = 0,
+                    end: int | None = None) -> LogScanner:
+        '''
+        Consumes the raw bytes of a log file, such as a memory map of
+        the whole file. The prefilter runs directly on the bytes and
+        only the lines that pass it are decoded (invalid UTF-8 is
+        replaced), so the file is never decoded as a whole.
+
+        Parameters
+        ----------
+        buffer: bytes | mmap.mmap
+            Raw contents of the log file
+
+        start: int
+            Offset of the first byte to consume. Must be a line boundary.
+
+        end: int | None
+            Offset after the last byte to consume (default=end of buffer)
+
+        Returns
+        ----------
+        LogScanner
+            The scanner itself so calls can be chained
+        '''
+        search = self.TRIGGER_BYTES.search
+        if end is None:
+            end = len(buffer)
+        lineno = self.n_lines
+        counted = start
+        pos = start
+        while True:
+            match = search(buffer, pos, end)
+            if match is None:
+                break
+
+            # Find the boundaries of the line containing the match
+            line_start = max(buffer.rfind(b'\n', start, match.start()) + 1, start)
+            line_end = buffer.find(b'\n', match.end(), end)
+            if line_end == -1:
+                line_end = end
+
+            lineno += buffer[counted:line_start].count(b'\n')
+            counted = line_start
+
+            self._inspect(lineno, buffer[line_start:line_end].decode('utf-8', errors='replace'))
+            pos = line_end + 1
+
+            # The rest of the buffer is not even counted
+            if self.stopped:
+                self.n_lines = lineno + 1
+                self.n_bytes += min(pos, end) - start
+                return self
+
+        lineno += buffer[counted:end].count(b'\n')
+        if end > start and buffer[end - 1:end] != b'\n':
+            lineno += 1
+        self.n_lines = lineno
+        self.n_bytes += max(0, end - start)
+        return self
+
+    def feed_stream(self,
+                    stream: BinaryIO,
+                    chunk_size: int = STREAM_CHUNK_SIZE) -> LogScanner:
+        '''
+        Consumes the raw bytes of a log file from a binary stream, such as
+        a decompressing one (see open_logfile_stream). The bytes are fed
+        to feed_buffer in chunks of complete lines, so only about
+        chunk_size bytes are held in memory at a time.
+
+        Parameters
+        ----------
+        stream: BinaryIO
+            Stream of the raw contents of the log file
+
+        chunk_size: int
+            Number of bytes read from the stream at a time
+
+        Returns
+        ----------
+        LogScanner
+            The scanner itself so calls can be chained
+        '''
+        pending = b''
+        while True:
+            chunk = self._read(stream, chunk_size)
+            if len(chunk) == 0:
+                break
+
+            # Keep the partial last line for the next chunk
+            chunk = pending + chunk
+            complete = chunk.rfind(b'\n') + 1
+            self.feed_buffer(chunk, end=complete)
+            if self.stopped:
+                return self
+            pending = chunk[complete:]
+
+        return self.feed_buffer(pending)
+
+    def _read(self, stream: BinaryIO, size: int) -> bytes:
+        '''
+        Reads the next chunk of a stream for feed_stream.
+        '''
+        return stream.read(size)
+
+    def get_state(self) -> dict:
+        '''
+        Gets the state of the scanner as a JSON-serializable dict. The
+        optimization criteria series are truncated to their last
+        CHECKPOINT_SERIES_LENGTH values. Lists are copied, so feeding the
+        scanner afterwards does not change the state.
+        '''
+        state = {key: list(value) if isinstance(value, list) else value for key, value in vars(self).items()}
+        del state['n_bytes']
+        for i, key in enumerate(('max_force', 'rms_force', 'max_displacement', 'rms_displacement')):
+            state['first_steps'][i] += max(0, len(state[key]) - CHECKPOINT_SERIES_LENGTH)
+            state[key] = state[key][-CHECKPOINT_SERIES_LENGTH:]
+        return state
+
+    @classmethod
+    def from_state(cls, state: dict) -> LogScanner:
+        '''
+        Restores a scanner from the output of get_state. The state is not
+        modified by feeding the scanner, so a checkpoint can be resumed
+        more than once.
+        '''
+        scanner = cls()
+        for key, value in state.items():
+            setattr(scanner, key, list(value) if isinstance(value, list) else value)
+        scanner.matches = [tuple(x) for x in scanner.matches]
+        scanner.events = [tuple(x) for x in scanner.events]
+        return scanner
+
+    @classmethod
+    def compile_detectors(cls) -> None:
+        '''
+        Compiles the DETECTORS of the class and the site-specific
+        detectors of its PROGRAM (see set_site_detectors) into the
+        prefilter (TRIGGER and TRIGGER_BYTES) and into MATCHER.
+        '''
+        cls.ACTIVE_DETECTORS = tuple(cls.DETECTORS) + tuple(get_site_detectors(cls.PROGRAM))
+        fragments = list(cls.STRUCTURE) + [re.escape(x.literal) for x in cls.ACTIVE_DETECTORS]
+        cls.TRIGGER = re.compile('|'.join(dict.fromkeys(fragments)))
+        cls.TRIGGER_BYTES = re.compile(cls.TRIGGER.pattern.encode())
+        cls.MATCHER = None
+        if len(cls.ACTIVE_DETECTORS) != 0:
+            cls.MATCHER = re.compile('|'.join(f'(?P<d{i}>{x.pattern})' for i, x in enumerate(cls.ACTIVE_DETECTORS)))
+
+    def get_detections(self, fatal: bool = True) -> tuple[list[str], list[tuple[int, str]]]:
+        '''
+        Gets the reasons of the matches of the fatal or of the non-fatal
+        detectors. Reasons of non-fatal detectors are prefixed with their
+        severity.
+
+        Returns
+        ----------
+        tuple[list[str], list[tuple[int, str]]]
+            The reasons of the detectors with once, in the order of the
+            detectors, and the 0-indexed line numbers and reasons of the
+            matches of the other detectors, in the order of the file.
+        '''
+        detectors = {x.name: x for x in self.ACTIVE_DETECTORS}
+        first = {}
+        lines = []
+        for lineno, name, reason in self.matches:
+            detector = detectors.get(name)
+            if detector is None or detector.fatal != fatal:
+                continue
+            if not fatal:
+                reason = f'{detector.severity}: {reason}'
+            if detector.once:
+                first.setdefault(name, reason)
+            else:
+                lines.append((lineno, reason))
+        return [first[x] for x in detectors if x in first], lines
+
+    def get_first_fatal_reason(self) -> str | None:
+        '''
+        Gets the reason of the first match of a fatal detector in the
+        order of the file, formatted like the reasons of evaluate_g16_logfile,
+        or None.
+        '''
+        detectors = {x.name: x for x in self.ACTIVE_DETECTORS}
+        for lineno, name, reason in self.matches:
+            detector = detectors.get(name)
+            if detector is None or not detector.fatal:
+                continue
+            return reason if detector.once else f'{reason} (line {lineno})'
+        return None
+
+    def _detect(self, lineno: int, line: str) -> None:
+        '''
+        Searches a line that passed the prefilter for the first match of
+        any detector.
+        '''
+        if self.MATCHER is None:
+            return
+        match = self.MATCHER.search(line)
+        if match is None:
+            return
+        detector = self.ACTIVE_DETECTORS[int(match.lastgroup[1:])]
+        if detector.once and any(name == detector.name for _, name, _ in self.matches):
+            return
+        if detector.message is not None:
+            reason = detector.message
+        elif detector.once:
+            reason = ' '.join(match.group(0).split())
+        else:
+            reason = match.group(0).strip()
+        self.matches.append((lineno, detector.name, reason))
+        self.events.append((lineno, detector.label))
+        if self.stop_at_fatal and detector.fatal:
+            self.stopped = True
+
+    @staticmethod
+    def get_stage(line: str) -> str:
+        '''
+        Gets the profiling stage (one of STAGES) of the detector that
+        inspects a line that passed the prefilter.
+        '''
+        return 'errors'
+
+    def _inspect(self, lineno: int, line: str) -> None:
+        '''
+        Applies the individual patterns to a line that passed the prefilter.
+        '''
+        self._detect(lineno, line)
+
+# Error signatures of Gaussian 16 log files. The reasons of the
+# detectors with once are reported in this order.
+G16_DETECTORS = (Detector('atomic_number_out_of_range', r'Atomic number out of range for.*', once=True),
+                 Detector('convergence_failure', CONVERGENCE_FAILURE.pattern, once=True),
+                 Detector('illegal_multiplicity', ILLEGAL_MULTIPLICITY.pattern, literal='combination of multiplicity', once=True),
+                 Detector('fileio_non_existent_file', f'^{FILEIO_ERROR_NON_EXISTENT_FILE.pattern}.*', literal='FileIO operation'),
+                 Detector('erroneous_write', f'^{ERRORNEOUS_WRITE.pattern}.*', literal='Erroneous write'),
+                 Detector('steps_exceeded', f'^{N_STEPS_EXCEEDED.pattern}.*', literal='Number of steps exceeded'))
+
+class G16LogScanner(LogScanner):
+    '''
+    LogScanner that collects everything evaluate_g16_logfile needs from
+    a Gaussian 16 log file.
+
+    Attributes
+    ----------
+    n_links: int
+        Number of "Entering Link" lines
+
+    job_lines: list[int]
+        0-indexed line numbers where a link or an internal job step starts
+
+    term_lines: list[int]
+        0-indexed line numbers of "Normal termination" lines
+
+    frequencies: list[list[float]]
+        Frequencies of the complete "Frequencies --" blocks of every
+        frequency section (see get_frequencies)
+    '''
+    PROGRAM = 'g16'
+    STRUCTURE = G16_SCAN_STRUCTURE
+    DETECTORS = G16_DETECTORS
+    STAGES = ('job/term lines', 'errors', 'frequency', 'optimization criteria')
+
+    def __init__(self):
+        super().__init__()
+        self.n_links = 0
+        self.frequencies = []
+
+        # Frequencies waiting for their "Red. masses" line
+        self._pending_frequencies = None
+
+    @staticmethod
+    def get_stage(line: str) -> str:
+        if line.startswith((' Harmonic frequencies', ' Frequencies --', ' Red. masses --')):
+            return 'frequency'
+        if 'Maximum Force' in line or 'RMS     Force' in line or 'Maximum Displacement' in line or 'RMS     Displacement' in line:
+            return 'optimization criteria'
+        if LINK_PATTERN.match(line) or PROCEDING_JOB_STEP_PATTERN.match(line) or ' Normal termination of Gaussian 16' in line:
+            return 'job/term lines'
+        return 'errors'
+
+    def _inspect(self, lineno: int, line: str) -> None:
+        '''
+        Applies the individual patterns to a line that passed the prefilter
+        and searches the remaining lines with the detectors.
+        '''
+        if LINK_PATTERN.match(line):
+            self.n_links += 1
+            self.job_lines.append(lineno)
+            self.events.append((lineno, 'ENTER LINK\t\t'))
+        elif PROCEDING_JOB_STEP_PATTERN.match(line):
+            self.job_lines.append(lineno)
+            self.events.append((lineno, 'INTERNAL JOB\t\t'))
+        elif ' Normal termination of Gaussian 16' in line:
+            self.term_lines.append(lineno)
+            self.events.append((lineno, 'NORM TERM\t\t'))
+        elif line.startswith(' Harmonic frequencies'):
+            if not self.frequencies or len(self.frequencies[-1]) != 0:
+                self.frequencies.append([])
+        elif line.startswith(' Frequencies --'):
+            if not line.startswith(' Frequencies ---') and lineno != 0:
+                self._pending_frequencies = line[len(' Frequencies --'):].split()
+        elif line.startswith(' Red. masses --'):
+            if self._pending_frequencies is not None:
+                if not self.frequencies:
+                    self.frequencies.append([])
+                self.frequencies[-1].extend(_to_float(x) for x in self._pending_frequencies)
+                self._pending_frequencies = None
+        elif 'Maximum Force' in line or 'RMS     Force' in line:
+            for pattern, series in ((MAX_FORCE_PATTERN, self.max_force), (RMS_FORCE_PATTERN, self.rms_force)):
+                for raw in pattern.findall(line):
+                    value = _parse_criterion_value(raw)
+                    if value is not None:
+                        series.append(value)
+        elif 'Maximum Displacement' in line or 'RMS     Displacement' in line:
+            for pattern, series in ((MAX_DISPLACEMENT_PATTERN, self.max_displacement), (RMS_DISPLACEMENT_PATTERN, self.rms_displacement)):
+                for raw in pattern.findall(line):
+                    value = _parse_criterion_value(raw)
+                    if value is not None:
+                        series.append(value)
+        else:
+            self._detect(lineno, line)
+
+def add_stage_time(stats: dict | None,
+                   stage: str,
+                   seconds: float,
+                   n_bytes: int = 0) -> None:
+    '''
+    Adds the time spent in a stage of the assessment and the number of
+    bytes it touched to the 'stages' of a stats dict. Does nothing
+    unless the stats dict has 'stages' (see --profile).
+    '''
+    if stats is None or 'stages' not in stats:
+        return
+    entry = stats['stages'].setdefault(stage, [0.0, 0])
+    entry[0] += seconds
+    entry[1] += n_bytes
+
+class ProfilingScannerMixin:
+    '''
+    Mixin for a LogScanner that records the time spent in the prefilter
+    and in each detector in the 'stages' of a stats dict (see
+    add_stage_time). The detectors are timed line by line, which makes
+    scanning a bit slower, so it is only used with --profile.
+    '''
+    def __init__(self, stats: dict | None = None):
+        super().__init__()
+        self.stats = stats
+
+    def get_state(self) -> dict:
+        state = super().get_state()
+        del state['stats']
+        return state
+
+    def feed_buffer(self,
+                    buffer: bytes | mmap.mmap,
+                    start: int = 0,
+                    end: int | None = None) -> LogScanner:
+        stages = self.stats.get('stages', {}) if self.stats is not None else {}
+        inspected = sum(stages.get(x, (0.0,))[0] for x in self.STAGES)
+        t1 = time.perf_counter()
+        super().feed_buffer(buffer, start=start, end=end)
+        seconds = time.perf_counter() - t1
+        seconds -= sum(stages.get(x, (0.0,))[0] for x in self.STAGES) - inspected
+        add_stage_time(self.stats, 'prefilter', seconds, (len(buffer) if end is None else end) - start)
+        return self
+
+    def _read(self, stream: BinaryIO, size: int) -> bytes:
+        t1 = time.perf_counter()
+        chunk = super()._read(stream, size)
+        add_stage_time(self.stats, 'decompress', time.perf_counter() - t1, len(chunk))
+        return chunk
+
+    def _inspect(self, lineno: int, line: str) -> None:
+        t1 = time.perf_counter()
+        super()._inspect(lineno, line)
+        add_stage_time(self.stats, self.get_stage(line), time.perf_counter() - t1, len(line))
+
+@functools.cache
+def get_profiling_scanner_class(scanner_class: type) -> type:
+    '''
+    Gets the profiling version (see ProfilingScannerMixin) of a LogScanner class.
+    '''
+    return type(f'Profiling{scanner_class.__name__}', (ProfilingScannerMixin, scanner_class), {})
+
+def get_scanner(stats: dict | None = None,
+                state: dict | None = None,
+                scanner_class: type = G16LogScanner) -> LogScanner:
+    '''
+    Gets a new scanner or restores one from a checkpointed state.
+    With --profile, the scanner records its stages in stats.
+    '''
+    profile = stats is not None and 'stages' in stats
+    if profile:
+        scanner_class = get_profiling_scanner_class(scanner_class)
+    scanner = scanner_class() if state is None else scanner_class.from_state(state)
+    if profile:
+        scanner.stats = stats
+    return scanner
+
+def scan_logfile(file: Path,
+                 scanner_class: type = G16LogScanner,
+                 stats: dict | None = None,
+                 stop_at_fatal: bool = False) -> LogScanner:
+    '''
+    Scans a log file once with a LogScanner. The file is memory-mapped
+    and scanned as bytes, so it is neither copied into a Python string
+    nor rejected because of invalid UTF-8. Compressed files and members
+    of compressed tar archives are decompressed and scanned as a stream
+    (see LogScanner.feed_stream).
+
+    Parameters
+    ----------
+    file : Path
+        Path to the log file.
+
+    scanner_class : type
+        LogScanner subclass of the program that wrote the file.
+
+    stats : dict | None
+        Receives the time of each stage with --profile (see add_stage_time).
+
+    stop_at_fatal : bool
+        Stop reading at the first match of a fatal detector.
+
+    Returns
+    ----------
+    LogScanner
+        The scanner after consuming the whole file.
+    '''
+    scanner = get_scanner(stats, scanner_class=scanner_class)
+    if stop_at_fatal:
+        scanner.stop_at_fatal = True
+    t1 = time.perf_counter()
+    with map_logfile(file) as mapped:
+        if mapped is not None:
+            buffer, start, end = mapped
+            add_stage_time(stats, 'read', time.perf_counter() - t1, end - start)
+            return scanner.feed_buffer(buffer, start=start, end=end)
+
+    with open_logfile_stream(file) as stream:
+        return scanner.feed_stream(stream)
+
+def _get_prefix_digest(buffer: bytes | mmap.mmap, offset: int) -> str:
+    '''
+    Digest of the start of a file and of the bytes right before offset.
+    Used to detect whether a file was rewritten instead of appended to.
+    '''
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(buffer[:min(CHECKPOINT_DIGEST_SIZE, offset)])
+    digest.update(buffer[max(0, offset - CHECKPOINT_DIGEST_SIZE):offset])
+    return digest.hexdigest()
+
+def resume_scan(file: Path,
+                checkpoint: dict | None = None,
+                scanner_class: type = G16LogScanner,
+                stats: dict | None = None) -> tuple[LogScanner, dict | None]:
+    '''
+    Scans a log file, starting from a checkpoint of a previous scan if
+    the file was only appended to since then. Logs of running jobs then
+    only cost the newly appended bytes.
+
+    A checkpoint is taken after the last complete line, so a partially
+    written last line is scanned again by the next call.
+
+    Parameters
+    ----------
+    file : Path
+        Path to the log file.
+
+    checkpoint : dict | None
+        Checkpoint returned by a previous call for the same file or None.
+
+    scanner_class : type
+        LogScanner subclass of the program that wrote the file.
+
+    stats : dict | None
+        Receives the time of each stage with --profile (see add_stage_time).
+
+    Returns
+    ----------
+    tuple[LogScanner, dict | None]
+        The scanner after consuming the whole file and the new checkpoint
+        (None for empty files, compressed files, archive members and
+        streamed files, which are always scanned in full).
+    '''
+    location = locate_logfile(file)
+    if location is None or location[0] != file or file in _STREAMED_LOGFILES:
+        return scan_logfile(file, scanner_class=scanner_class, stats=stats), None
+
+    with open(file, 'rb') as infile:
+        stat = os.fstat(infile.fileno())
+
+        # Empty files cannot be mapped
+        if stat.st_size == 0:
+            return get_scanner(stats, scanner_class=scanner_class), None
+
+        t1 = time.perf_counter()
+        with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            add_stage_time(stats, 'read', time.perf_counter() - t1, stat.st_size)
+            scanner = None
+            offset = 0
+            if checkpoint is not None \
+               and checkpoint.get('version') == CACHE_VERSION \
+               and checkpoint['inode'] == stat.st_ino \
+               and checkpoint['offset'] <= stat.st_size \
+               and checkpoint['digest'] == _get_prefix_digest(buffer, checkpoint['offset']):
+                scanner = get_scanner(stats, state=checkpoint['state'], scanner_class=scanner_class)
+                offset = checkpoint['offset']
+
+            if scanner is None:
+                scanner = get_scanner(stats, scanner_class=scanner_class)
+
+            # Scan up to the end of the last complete line and checkpoint there
+            complete = buffer.rfind(b'\n', offset) + 1
+            if complete == 0:
+                complete = offset
+            scanner.feed_buffer(buffer, start=offset, end=complete)
+            checkpoint = {'version': CACHE_VERSION,
+                          'inode': stat.st_ino,
+                          'offset': complete,
+                          'digest': _get_prefix_digest(buffer, complete),
+                          'state': scanner.get_state()}
+
+            # Consume the partially written last line (if any)
+            scanner.feed_buffer(buffer, start=complete)
+
+    return scanner, checkpoint
+
+def assess_g16_logfile_tail(file: Path,
+                            check_frequency: bool = True,
+                            imaginary_threshold: float = 0.0,
+                            block_size: int = TAIL_BLOCK_SIZE,
+                            stats: dict | None = None) -> tuple[bool, list] | None:
+    '''
+    Attempts to show that a Gaussian16 log file completed from its last
+    block only, like assess_orca_out_file_tail does for ORCA.
+
+    The tail is conclusive if the last job in it terminated normally,
+    every job that starts in it terminates before the next one starts,
+    it contains no error, the SLURM error file reports no failure and,
+    with check_frequency, every frequency section in it starts in it and
+    has no imaginary frequency. Failed files are left to the full scan,
+    so that their reasons are the same as without tail_first.
+
+    Nothing before the last block is read, so a file is found complete
+    even if the part before it has
+    - error lines of jobs that still terminated normally (e.g., the
+      Erroneous write messages of errorneous_write.log)
+    - imaginary frequencies in the frequency section of an earlier job
+      (e.g., a freq job followed by another --Link1-- job)
+    - matches of site-specific detectors
+    - a job without a normal termination, which only happens if a rerun
+      was appended to the log of a failed run, as a failed job ends the run
+    Oscillations never fail a file on their own, so they need not be
+    checked.
+
+    Parameters
+    ----------
+    file : Path
+        Path to the Gaussian16 .log file to be analyzed.
+
+    check_frequency : bool
+        Whether imaginary frequency checks were requested.
+
+    imaginary_threshold : float
+        Imaginary frequencies smaller in magnitude than this (cm**-1) are ignored.
+
+    block_size : int
+        Number of bytes read from the end of the file.
+
+    stats : dict | None
+        The number of bytes read is added to its 'bytes_scanned' key.
+
+    Returns
+    ----------
+    tuple[bool, list] | None
+        (True, []) if the file completed or None if the full file must
+        be scanned.
+    '''
+    if not is_seekable(file):
+        return None
+
+    tail, is_whole_file = get_file_tail(file, block_size=block_size)
+
+    # Small files are cheaper to scan in full
+    if is_whole_file:
+        return None
+
+    scan = G16LogScanner().feed_buffer(tail)
+    if stats is not None:
+        stats['bytes_scanned'] = stats.get('bytes_scanned', 0) + scan.n_bytes
+
+    detections, error_lines = scan.get_detections()
+    if len(detections) != 0 or len(error_lines) != 0:
+        return None
+
+    # Every job of the tail must terminate before the next one starts
+    if len(scan.term_lines) == 0 or max(scan.job_lines, default=-1) > scan.term_lines[-1]:
+        return None
+    for job_line, next_job_line in zip(scan.job_lines, scan.job_lines[1:]):
+        if not any(job_line < x < next_job_line for x in scan.term_lines):
+            return None
+
+    if check_frequency:
+        # A section cut off by the start of the block may have lost its
+        # lowest (i.e., imaginary) frequencies
+        first_values = tail.find(b' Frequencies --')
+        if first_values != -1 and not -1 < tail.find(b' Harmonic frequencies') < first_values:
+            return None
+        if get_imaginary_frequency_reason(scan.frequencies, threshold=imaginary_threshold) is not None:
+            return None
+
+    if len(get_slurm_failure_reasons(file)) != 0:
+        return None
+    return True, []
+
+def triage_g16_logfile(file: Path,
+                       check_frequency: bool = True,
+                       imaginary_threshold: float = 0.0,
+                       stats: dict | None = None) -> tuple[bool, list]:
+    '''
+    Reaches the verdict of evaluate_g16_logfile with as little reading as
+    possible and reports only the first reason a file failed (see
+    --first-reason). The checks run from cheapest to most expensive and
+    the first one that fails the file ends its assessment:
+
+    1. The SLURM error file (preemption, oom_kill, cancellation)
+    2. The last block of the file (fatal errors, last job not terminated)
+    3. A scan of the file that stops at the first fatal error
+    4. Job starts without a normal termination
+    5. Imaginary frequencies
+
+    Oscillations are not checked because they never fail a file on their own.
+
+    Parameters
+    ----------
+    file : Path
+        Path to the Gaussian16 .log file to be analyzed.
+
+    check_frequency : bool
+        Detect imaginary frequencies in the frequency sections.
+
+    imaginary_threshold : float
+        Imaginary frequencies smaller in magnitude than this (cm**-1) are ignored.
+
+    stats : dict | None
+        The number of bytes scanned is added to its 'bytes_scanned' key.
+
+    Returns
+    ----------
+    tuple[bool, list]
+        Whether or not the logfile terminated successfully and the first
+        reason it failed (empty if it was successful).
+    '''
+    t1 = time.perf_counter()
+    failure_reasons = get_slurm_failure_reasons(file)
+    add_stage_time(stats, 'slurm', time.perf_counter() - t1)
+    if len(failure_reasons) != 0:
+        return False, failure_reasons[:1]
+
+    if is_seekable(file):
+        t1 = time.perf_counter()
+        tail, is_whole_file = get_file_tail(file)
+        if not is_whole_file:
+            scan = G16LogScanner()
+            scan.stop_at_fatal = True
+            scan.feed_buffer(tail)
+            if stats is not None:
+                stats['bytes_scanned'] = stats.get('bytes_scanned', 0) + scan.n_bytes
+            add_stage_time(stats, 'tail', time.perf_counter() - t1, scan.n_bytes)
+
+            # Line numbers in the tail are not those of the file
+            detections, error_lines = scan.get_detections()
+            if len(detections) != 0 or len(error_lines) != 0:
+                return False, (detections + [line for _, line in error_lines])[:1]
+
+            if len(scan.term_lines) == 0 or max(scan.job_lines, default=-1) > scan.term_lines[-1]:
+                return False, ['last job did not terminate normally.']
+
+    scan = scan_logfile(file, stats=stats, stop_at_fatal=True)
+    if stats is not None:
+        stats['bytes_scanned'] = stats.get('bytes_scanned', 0) + scan.n_bytes
+
+    reason = scan.get_first_fatal_reason()
+    if reason is not None:
+        return False, [reason]
+
+    for i, job_start in enumerate(scan.job_lines):
+        if i >= len(scan.term_lines) or job_start > scan.term_lines[i]:
+            return False, [f'job on line {job_start + 1} failed.']
+
+    if check_frequency:
+        t1 = time.perf_counter()
+        reason = get_imaginary_frequency_reason(scan.frequencies, threshold=imaginary_threshold)
+        add_stage_time(stats, 'frequency', time.perf_counter() - t1)
+        if reason is not None:
+            return False, [reason]
+
+    return True, []
+
+def evaluate_g16_logfile(file: Path,
+                         window: int,
+                         tolerance: float,
+                         line_by_line: bool = False,
+                         check_oscillation: bool = True,
+                         check_frequency: bool = True,
+                         imaginary_threshold: float = 0.0,
+                         tail_first: bool = False,
+                         first_reason: bool = False,
+                         stats: dict | None = None) -> tuple[bool, list]:
+    '''
+    Evaluates a Gaussian16 log file to determine whether it completed successfully,
+    encountered an error, or terminated abnormally.
+
+    Parameters
+    ----------
+    file : Path
+        Path to the Gaussian16 .log file to be analyzed.
+
+    window : int
+        Number of optimization steps used to detect oscillations.
+
+    tolerance : float
+        Tolerance used to detect oscillations.
+
+    line_by_line : bool
+        Print a line-by-line analysis of the file.
+
+    check_oscillation : bool
+        Detect oscillating optimization criteria.
+
+    check_frequency : bool
+        Detect imaginary frequencies in the frequency sections.
+
+    imaginary_threshold : float
+        Imaginary frequencies smaller in magnitude than this (cm**-1) are ignored.
+
+    tail_first : bool
+        Try to confirm that the file completed from its last block before
+        running the full scan (see assess_g16_logfile_tail for what this
+        misses).
+
+    first_reason : bool
+        Stop at the first reason the file failed (see triage_g16_logfile).
+        Ignored with line_by_line.
+
+    stats : dict | None
+        The number of bytes scanned is added to its 'bytes_scanned' key.
+
+    Returns
+    ----------
+    tuple[bool, list]
+        Whether or not the logfile terminated successfully and the reasons
+        the logfile failed (empty list if it was successful)
+    '''
+
+    if first_reason and not line_by_line:
+        return triage_g16_logfile(file,
+                                  check_frequency=check_frequency,
+                                  imaginary_threshold=imaginary_threshold,
+                                  stats=stats)
+
+    # Try to reach a verdict from the end of the file
+    if tail_first and not line_by_line:
+        t1 = time.perf_counter()
+        verdict = assess_g16_logfile_tail(file,
+                                          check_frequency=check_frequency,
+                                          imaginary_threshold=imaginary_threshold,
+                                          stats=stats)
+        add_stage_time(stats, 'tail', time.perf_counter() - t1, stats['bytes_scanned'] if stats else 0)
+        if verdict is not None:
+            return verdict
+
+    # Read the file once and collect everything needed below
+    scan = scan_logfile(file, stats=stats)
+    if stats is not None:
+        stats['bytes_scanned'] = stats.get('bytes_scanned', 0) + scan.n_bytes
+
+    # Print line-by-line
+    if line_by_line:
+        print_line_by_line_analysis(file=file, scan=scan)
+
+    return judge_g16_scan(file,
+                          scan,
+                          window=window,
+                          tolerance=tolerance,
+                          check_oscillation=check_oscillation,
+                          check_frequency=check_frequency,
+                          imaginary_threshold=imaginary_threshold,
+                          stats=stats)
+
+def evaluate_g16_logfile_incremental(file: Path,
+                                     checkpoint: dict | None,
+                                     window: int,
+                                     tolerance: float,
+                                     check_oscillation: bool = True,
+                                     check_frequency: bool = True,
+                                     imaginary_threshold: float = 0.0,
+                                     tail_first: bool = False,
+                                     first_reason: bool = False,
+                                     stats: dict | None = None) -> tuple[tuple[bool, list], dict | None]:
+    '''
+    Same as evaluate_g16_logfile, but resumes scanning from a checkpoint
+    of a previous run when the file has only been appended to since then.
+    With first_reason, the checkpoint is returned unchanged.
+
+    Parameters
+    ----------
+    file : Path
+        Path to the Gaussian16 .log file to be analyzed.
+
+    checkpoint : dict | None
+        Checkpoint returned by a previous call for the same file or None.
+
+    Returns
+    ----------
+    tuple[tuple[bool, list], dict | None]
+        The (is_complete, reasons) tuple of evaluate_g16_logfile and the
+        checkpoint to pass to the next call.
+    '''
+    if first_reason:
+        return triage_g16_logfile(file,
+                                  check_frequency=check_frequency,
+                                  imaginary_threshold=imaginary_threshold,
+                                  stats=stats), checkpoint
+
+    if tail_first:
+        t1 = time.perf_counter()
+        verdict = assess_g16_logfile_tail(file,
+                                          check_frequency=check_frequency,
+                                          imaginary_threshold=imaginary_threshold,
+                                          stats=stats)
+        add_stage_time(stats, 'tail', time.perf_counter() - t1, stats['bytes_scanned'] if stats else 0)
+        if verdict is not None:
+            return verdict, checkpoint
+
+    scan, checkpoint = resume_scan(file, checkpoint, stats=stats)
+    if stats is not None:
+        stats['bytes_scanned'] = stats.get('bytes_scanned', 0) + scan.n_bytes
+
+    return judge_g16_scan(file,
+                          scan,
+                          window=window,
+                          tolerance=tolerance,
+                          check_oscillation=check_oscillation,
+                          check_frequency=check_frequency,
+                          imaginary_threshold=imaginary_threshold,
+                          stats=stats), checkpoint
+
+class Assessment:
+    '''
+    Result of the assessment of one log file as returned by assess and
+    iter_assess.
+
+    Attributes
+    ----------
+    path: Path
+        Assessed file
+
+    completed: bool | None
+        Whether every job in the file terminated normally without errors.
+        None if the file was held back because its job is still running
+        (see RunningClassifier).
+
+    reasons: list[str]
+        Reasons the file failed or is running (empty if it completed)
+
+    size: int
+        Size of the file in bytes
+
+    bytes_scanned: int
+        Number of bytes read to reach the verdict (0 if cached)
+
+    seconds: float
+        Time spent on the assessment (0 if cached)
+
+    cached: bool
+        Whether the verdict came from an AssessmentCache
+
+    stages: dict | None
+        Seconds and bytes of every stage when profiled (see add_stage_time)
+    '''
+    __slots__ = ('path', 'completed', 'reasons', 'size', 'bytes_scanned', 'seconds', 'cached', 'stages')
+
+    def __init__(self,
+                 path: Path,
+                 completed: bool | None,
+                 reasons: list[str],
+                 size: int = 0,
+                 bytes_scanned: int = 0,
+                 seconds: float = 0.0,
+                 cached: bool = False,
+                 stages: dict | None = None):
+        self.path = path
+        self.completed = completed
+        self.reasons = reasons
+        self.size = size
+        self.bytes_scanned = bytes_scanned
+        self.seconds = seconds
+        self.cached = cached
+        self.stages = stages
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.path.name}, {self.verdict}, {self.reason_codes})'
+
+    @property
+    def verdict(self) -> str:
+        '''
+        'completed', 'failed' or 'running'
+        '''
+        if self.completed is None:
+            return 'running'
+        return 'completed' if self.completed else 'failed'
+
+    @property
+    def reason_codes(self) -> list[str]:
+        '''
+        Stable codes of the reasons (see get_reason_codes).
+        '''
+        return get_reason_codes(self.reasons)
+
+    @property
+    def line_numbers(self) -> list[int]:
+        '''
+        Line numbers of the failed jobs and error lines in the reasons.
+        '''
+        return sorted({int(x) for reason in self.reasons for x in REASON_LINE_PATTERN.findall(reason)})
+
+    @property
+    def result(self) -> tuple[bool, list]:
+        '''
+        The (is_complete, reasons) tuple of evaluate_g16_logfile.
+        '''
+        return self.completed, self.reasons
+
+    def to_dict(self) -> dict:
+        '''
+        Gets the record of the file as written by RecordWriter.
+        '''
+        return {'path': str(self.path),
+                'verdict': self.verdict,
+                'reason_codes': self.reason_codes,
+                'reasons': self.reasons,
+                'line_numbers': self.line_numbers,
+                'size': self.size,
+                'bytes_scanned': self.bytes_scanned,
+                'seconds': round(self.seconds, 6)}
+
+def estimate_task_memory(file: Path,
+                         checkpoint: dict | None = None,
+                         size: int | None = None,
+                         streamed: bool = False) -> int:
+    '''
+    Estimates the peak memory in bytes needed to assess a log file. The
+    bytes of a memory-mapped file become resident as they are scanned,
+    so they count in full (only the bytes after the checkpoint when the
+    scan resumes). Contents sent to a worker count twice, once in each
+    process. Streamed files only need their chunks.
+
+    Parameters
+    ----------
+    file: Path
+        Log file of the task
+
+    checkpoint: dict | None
+        Checkpoint of the task (see resume_scan)
+
+    size: int | None
+        Number of bytes of the contents sent with the task (see evaluate_task)
+
+    streamed: bool
+        Estimate for streaming the file (see stream_logfile)
+
+    Returns
+    ----------
+    int
+        Estimated number of bytes including SCAN_MEMORY_OVERHEAD
+    '''
+    if size is not None:
+        return 2 * size + SCAN_MEMORY_OVERHEAD
+
+    location = None if streamed else locate_logfile(file)
+    if location is None:
+        return 2 * STREAM_CHUNK_SIZE + SCAN_MEMORY_OVERHEAD
+
+    n_bytes = location[2]
+    if checkpoint is not None and location[0] == file:
+        n_bytes -= min(n_bytes, checkpoint['offset'])
+    return n_bytes + SCAN_MEMORY_OVERHEAD
+
+def evaluate_task(task: tuple[Path, dict | None] | tuple[Path, dict | None, bytes],
+                  evaluate: Callable = None,
+                  evaluate_incremental: Callable = None,
+                  incremental: bool = False,
+                  profile: bool = False,
+                  max_memory: int | None = None,
+                  **kwargs) -> tuple[Assessment, dict | None]:
+    '''
+    Evaluates a (file, checkpoint) task handed out by iter_evaluations.
+    Kept at module level so that it can be sent to multiprocessing workers.
+
+    Parameters
+    ----------
+    task: tuple[Path, dict | None] | tuple[Path, dict | None, bytes]
+        Log file and its checkpoint (see evaluate_g16_logfile_incremental).
+        Members of compressed tar archives come with their decompressed
+        contents (see provide_logfile).
+
+    evaluate: Callable
+        Evaluation function of the program that wrote the file
+        (default=evaluate_g16_logfile)
+
+    evaluate_incremental: Callable
+        Evaluation function that resumes from a checkpoint
+        (default=evaluate_g16_logfile_incremental)
+
+    incremental: bool
+        Whether to use evaluate_incremental instead of evaluate
+
+    profile: bool
+        Record the time and bytes of every stage in the stages of the
+        assessment (see add_stage_time)
+
+    max_memory: int | None
+        Stream files whose estimated memory exceeds this many bytes
+        instead of mapping them (see estimate_task_memory)
+
+    **kwargs
+        Passed on to the evaluation function
+
+    Returns
+    ----------
+    tuple[Assessment, dict | None]
+        The assessment of the file and its new checkpoint (None if not
+        incremental)
+    '''
+    t1 = time.perf_counter()
+    file, checkpoint = task[:2]
+    with contextlib.ExitStack() as stack:
+        if len(task) == 3:
+            stack.enter_context(provide_logfile(file, task[2], len(task[2])))
+        elif max_memory is not None and estimate_task_memory(file, checkpoint) > max_memory:
+            stack.enter_context(stream_logfile(file))
+
+        stats = {'size': get_logfile_size(file), 'bytes_scanned': 0}
+        if profile:
+            stats['stages'] = {}
+
+        if incremental:
+            result, checkpoint = (evaluate_incremental or evaluate_g16_logfile_incremental)(file, checkpoint, stats=stats, **kwargs)
+        else:
+            result = (evaluate or evaluate_g16_logfile)(file, stats=stats, **kwargs)
+
+    return Assessment(file,
+                      completed=result[0],
+                      reasons=result[1],
+                      size=stats['size'],
+                      bytes_scanned=stats['bytes_scanned'],
+                      seconds=time.perf_counter() - t1,
+                      stages=stats.get('stages')), checkpoint
+
+def evaluate_batch(batch: list[tuple],
+                   **kwargs) -> list[tuple[Assessment, dict | None]]:
+    '''
+    Evaluates a batch of tasks (see batch_tasks) with evaluate_task.
+    '''
+    return [evaluate_task(task, **kwargs) for task in batch]
+
+def batch_tasks(tasks: Iterable[tuple | None],
+                max_size: int = SMALL_FILE_BATCH_SIZE,
+                max_length: int = SMALL_FILE_BATCH_LENGTH) -> Iterator[list[tuple]]:
+    '''
+    Groups (file, checkpoint) tasks for the multiprocessing workers.
+    Files of at least SMALL_FILE_SIZE bytes still to be scanned are
+    handed out alone so that a single large file does not hold up a
+    chunk of other files. Smaller files are grouped so that the workers
+    do not spend their time waiting for the next tiny file.
+
+    Parameters
+    ----------
+    tasks: Iterable[tuple | None]
+        Log files and their checkpoints (and contents, see evaluate_task).
+        Pass them largest first to let the large files start early. None
+        hands out the current batch of small files right away.
+
+    max_size: int
+        Maximum number of bytes in a batch of small files
+
+    max_length: int
+        Maximum number of files in a batch of small files
+
+    Yields
+    ----------
+    list[tuple]
+        Batches of tasks
+    '''
+    batch, batch_size = [], 0
+    for task in tasks:
+        if task is None:
+            if len(batch) != 0:
+                yield batch
+                batch, batch_size = [], 0
+            continue
+
+        file, checkpoint = task[:2]
+        size = len(task[2]) if len(task) == 3 else get_logfile_size(file)
+        if checkpoint is not None:
+            size -= min(size, checkpoint['offset'])
+
+        if size >= SMALL_FILE_SIZE:
+            yield [task]
+            continue
+
+        batch.append(task)
+        batch_size += size
+        if batch_size >= max_size or len(batch) >= max_length:
+            yield batch
+            batch, batch_size = [], 0
+
+    if len(batch) != 0:
+        yield batch
+
+def judge_g16_scan(file: Path,
+                   scan: G16LogScanner,
+                   window: int,
+                   tolerance: float,
+                   check_oscillation: bool = True,
+                   check_frequency: bool = True,
+                   imaginary_threshold: float = 0.0,
+                   stats: dict | None = None) -> tuple[bool, list]:
+    '''
+    Turns the result of a G16LogScanner into the verdict returned by
+    evaluate_g16_logfile.
+
+    Parameters
+    ----------
+    file : Path
+        Path to the Gaussian16 .log file that was scanned.
+
+    scan : G16LogScanner
+        Scanner that consumed the whole file.
+
+    stats : dict | None
+        Receives the time of each stage with --profile (see add_stage_time).
+
+    Returns
+    ----------
+    tuple[bool, list]
+        Whether or not the logfile terminated successfully and the
+        reasons it failed (empty if it was successful).
+    '''
+    # Make a list for the reason(s) the logfile failed
+    failure_reasons = []
+
+    # Check for PREEMPTION, oom_kill and cancellation
+    t1 = time.perf_counter()
+    failure_reasons.extend(get_slurm_failure_reasons(file))
+    if stats is not None and 'stages' in stats:
+        slurm_error_file = get_slurm_error_file(file)
+        add_stage_time(stats, 'slurm', time.perf_counter() - t1,
+                       slurm_error_file.stat().st_size if slurm_error_file is not None else 0)
+
+    # Get the lines at which jobs start and normal termination lines appear
+    job_lines = scan.job_lines
+    term_lines = scan.term_lines
+
+    # Check for the errors reported on their own: atomic number out
+    # of range, convergence failure, impossible multiplicity, ...
+    specific_reasons, error_lines = scan.get_detections()
+    failure_reasons.extend(specific_reasons)
+
+    # Check every freq section for imaginary frequencies
+    t1 = time.perf_counter()
+    if check_frequency:
+        frequency_reason = get_imaginary_frequency_reason(scan.frequencies, threshold=imaginary_threshold)
+        if frequency_reason is not None:
+            failure_reasons.append(frequency_reason)
+        add_stage_time(stats, 'frequency', time.perf_counter() - t1)
+
+    # Check for oscillation
+    if check_oscillation:
+
+        # Get the oscillation criteria, but don't return it yet
+        # since an oscillating optimization can eventually converge
+        t1 = time.perf_counter()
+        is_oscillating, oscillation_reason = check_oscillating_series(scan.max_force,
+                                                                      scan.rms_force,
+                                                                      scan.max_displacement,
+                                                                      scan.rms_displacement,
+                                                                      window=window,
+                                                                      tolerance=tolerance,
+                                                                      first_steps=scan.first_steps)
+        add_stage_time(stats, 'oscillation', time.perf_counter() - t1,
+                       8 * sum(map(len, (scan.max_force, scan.rms_force, scan.max_displacement, scan.rms_displacement))))
+
+        if is_oscillating:
+            failure_reasons.append(oscillation_reason)
+
+    # If a specific error can be identified
+    # use the text of the line as the "reason"
+    if len(error_lines) != 0:
+        failure_reasons.append('\t'.join([f'{line} (line {i})' for i, line in error_lines]))
+
+    # Iterate over the lines that indicate a job started
+    for i, job_start in enumerate(job_lines):
+        # Check if a termination line proceeded the job start line
+        # This indicates a failed job
+        try:
+            if job_start > term_lines[i]:
+                failure_reasons.append(f'job on line {job_start + 1} failed.')
+        except IndexError:
+            failure_reasons.append(f'job on line {job_start + 1} failed.')
+
+    # Special case where oscillation is detected but
+    # the optimizer eventually reached a minimum
+    if len(failure_reasons) == 1:
+        if 'is oscillating' in failure_reasons[0]:
+            failure_reasons = []
+
+    if len(failure_reasons) == 0:
+        return True, failure_reasons
+
+    # Matches of non-fatal detectors only explain why a file failed
+    warnings, warning_lines = scan.get_detections(fatal=False)
+    failure_reasons.extend(warnings)
+    if len(warning_lines) != 0:
+        failure_reasons.append('\t'.join([f'{line} (line {i})' for i, line in warning_lines]))
+
+    return False, failure_reasons
+
+def assess(path: Path | str,
+           window: int = 10,
+           tolerance: float = 1e-5,
+           check_oscillation: bool = True,
+           check_frequency: bool = True,
+           imaginary_threshold: float = 0.0,
+           tail_first: bool = False,
+           first_reason: bool = False,
+           profile: bool = False) -> Assessment:
+    '''
+    Assesses a Gaussian 16 log file in this process. Nothing is printed
+    or moved.
+
+    Parameters
+    ----------
+    path: Path | str
+        Log file to assess
+
+    window: int
+        Number of optimization steps used to detect oscillations
+
+    tolerance: float
+        Tolerance used to detect oscillations
+
+    check_oscillation: bool
+        Detect oscillating optimization criteria
+
+    check_frequency: bool
+        Detect imaginary frequencies in the frequency sections
+
+    imaginary_threshold: float
+        Imaginary frequencies smaller in magnitude than this (cm**-1) are ignored
+
+    tail_first: bool
+        Try to reach a verdict from the last block of the file first
+
+    first_reason: bool
+        Stop at the first reason the file failed (see triage_g16_logfile)
+
+    profile: bool
+        Record the time of every stage in the stages of the assessment
+
+    Returns
+    ----------
+    Assessment
+        Verdict, reasons and timings of the file
+    '''
+    return evaluate_task((Path(path), None),
+                         profile=profile,
+                         window=window,
+                         tolerance=tolerance,
+                         check_oscillation=check_oscillation,
+                         check_frequency=check_frequency,
+                         imaginary_threshold=imaginary_threshold,
+                         tail_first=tail_first,
+                         first_reason=first_reason)[0]
+
+def iter_assess(paths: Iterable[Path | str],
+                workers: int | str = 1,
+                window: int = 10,
+                tolerance: float = 1e-5,
+                check_oscillation: bool = True,
+                check_frequency: bool = True,
+                imaginary_threshold: float = 0.0,
+                tail_first: bool = False,
+                first_reason: bool = False,
+                profile: bool = False,
+                line_by_line: bool = False,
+                cache: AssessmentCache | None = None,
+                rebuild_cache: bool = False,
+                ionice: bool = False,
+                run_stats: dict | None = None,
+                include: list[str] | None = None,
+                exclude: list[str] | None = None,
+                max_memory: int | None = None) -> Iterator[Assessment]:
+    '''
+    Assesses Gaussian 16 log files and yields each assessment as soon as
+    it is done. With several workers, large files are sent to the pool
+    one at a time and small files in batches (see batch_tasks), and the
+    assessments come back in the order in which they finish. Nothing is
+    printed or moved.
+
+    Parameters
+    ----------
+    paths: Iterable[Path | str]
+        Log files to assess. Can be a generator (e.g., iter_logfiles).
+        Pass them largest first to let the large files start early.
+
+    workers: int | str
+        Number of worker processes or 'auto' (see get_worker_count).
+        With 1, the files are assessed in this process.
+
+    window, tolerance, check_oscillation, check_frequency, imaginary_threshold, tail_first, first_reason, profile
+        See assess
+
+    line_by_line: bool
+        Print a line-by-line analysis of every file. Only without a cache.
+
+    cache: AssessmentCache | None
+        Cached verdicts are yielded without reading the file and the
+        scan of every other file resumes from its last checkpoint. New
+        verdicts and checkpoints are stored.
+
+    rebuild_cache: bool
+        Reassess files that have a cached verdict
+
+    ionice: bool
+        Lower the I/O priority of the workers
+
+    run_stats: dict | None
+        Receives the time spent in the cache with profile (see add_stage_time)
+
+    include, exclude: list[str] | None
+        fnmatch patterns for the members of tar archives among the paths
+        (see is_selected_member). The paths themselves are not filtered.
+
+    max_memory: int | None
+        Memory budget of the files being assessed in bytes. Files are
+        only handed to the workers while the sum of their estimates fits
+        and files too large for it are streamed (see iter_evaluations).
+
+    Yields
+    ----------
+    Assessment
+        Verdict, reasons and timings of every file
+    '''
+    yield from iter_evaluations(paths,
+                                {'window': window,
+                                 'tolerance': tolerance,
+                                 'check_oscillation': check_oscillation,
+                                 'check_frequency': check_frequency,
+                                 'imaginary_threshold': imaginary_threshold,
+                                 'tail_first': tail_first,
+                                 'first_reason': first_reason,
+                                 'profile': profile,
+                                 'line_by_line': line_by_line},
+                                workers=workers,
+                                cache=cache,
+                                rebuild_cache=rebuild_cache,
+                                ionice=ionice,
+                                run_stats=run_stats,
+                                include=include,
+                                exclude=exclude,
+                                max_memory=max_memory)
+
+def iter_evaluations(paths: Iterable[Path | str],
+                     kwargs: dict,
+                     workers: int | str = 1,
+                     cache: AssessmentCache | None = None,
+                     rebuild_cache: bool = False,
+                     ionice: bool = False,
+                     run_stats: dict | None = None,
+                     suffix: str = '.log',
+                     include: list[str] | None = None,
+                     exclude: list[str] | None = None,
+                     max_memory: int | None = None) -> Iterator[Assessment]:
+    '''
+    Runs evaluate_task on log files and yields each assessment as soon
+    as it is done. This is the engine behind the iter_assess functions
+    of the G16 and ORCA assessors.
+
+    Tar archives among the paths are assessed member by member without
+    extracting them. Members of uncompressed archives are read in place
+    like any other file. Compressed archives can only be read from start
+    to end, so they are decompressed here and their members are sent to
+    the workers as bytes, holding at most ARCHIVE_BUFFER_SIZE bytes at a
+    time. Members of at least ARCHIVE_STREAM_MEMBER_SIZE bytes (and all
+    members with one worker) are scanned here as they are decompressed.
+
+    With max_memory, files are only handed to the workers while the sum
+    of their estimated memory (see estimate_task_memory) fits into it.
+    Files that do not fit on their own are streamed in chunks instead of
+    being memory-mapped.
+
+    Parameters
+    ----------
+    paths: Iterable[Path | str]
+        Log files to assess
+
+    kwargs: dict
+        Passed on to evaluate_task, including the evaluation functions
+        of the program. line_by_line is dropped when a cache is used.
+
+    workers, cache, rebuild_cache, ionice, run_stats
+        See iter_assess
+
+    suffix: str
+        Suffix of the log files in tar archives (e.g., '.out' for ORCA)
+
+    include, exclude: list[str] | None
+        fnmatch patterns applied to the members of tar archives (see
+        is_selected_member)
+
+    max_memory: int | None
+        Memory budget of the assessments in flight in bytes
+
+    Yields
+    ----------
+    Assessment
+        Verdict, reasons and timings of every file
+    '''
+    n_workers = get_worker_count(str(workers))
+
+    # Cached verdicts and the assessments of streamed archive members are
+    # made by the thread that hands out the tasks and yielded in between
+    # the results of the workers
+    cached = collections.deque()
+    streamed = collections.deque()
+
+    # Bytes of archive members and estimated memory of the files handed
+    # out to the workers but not yet assessed
+    in_flight = {}
+    in_flight_totals = [0, 0]
+    in_flight_changed = threading.Condition()
+
+    def admit(file: Path, n_bytes: int = 0, memory: int = 0) -> Iterator[None]:
+        '''
+        Waits until a task fits into the archive buffer and the memory
+        budget next to the tasks in flight and records it. None is yielded
+        before waiting to send off the batch that may still hold some of
+        the tasks in flight (see batch_tasks).
+        '''
+        def is_admitted() -> bool:
+            return len(in_flight) == 0 \
+                   or (in_flight_totals[0] + n_bytes <= ARCHIVE_BUFFER_SIZE
+                       and (max_memory is None or in_flight_totals[1] + memory <= max_memory))
+
+        with in_flight_changed:
+            admitted = is_admitted()
+        if not admitted:
+            yield None
+        with in_flight_changed:
+            in_flight_changed.wait_for(is_admitted)
+            in_flight[file] = n_bytes, memory
+            in_flight_totals[0] += n_bytes
+            in_flight_totals[1] += memory
+
+    def get_task(file: Path, size: int | None = None) -> tuple[Path, dict | None] | None:
+        '''
+        Gets the (file, checkpoint) task of a file or None if its result
+        is cached.
+        '''
+        if cache is None:
+            return file, None
+
+        t1 = time.perf_counter()
+        result = cache.get(file) if not rebuild_cache else None
+        if result is not None:
+            add_stage_time(run_stats, 'cache', time.perf_counter() - t1)
+            cached.append(Assessment(file, completed=result[0], reasons=result[1],
+                                     size=get_logfile_size(file) if size is None else size, cached=True))
+            return None
+
+        checkpoint = cache.get_checkpoint(file)
+        add_stage_time(run_stats, 'cache', time.perf_counter() - t1)
+        return file, checkpoint
+
+    def get_archive_tasks(archive: Path) -> Iterator[tuple[Path, dict | None, bytes] | None]:
+        '''
+        Decompresses a compressed tar archive and yields the tasks of
+        its members with their contents. None is yielded before waiting
+        for the workers (see batch_tasks).
+        '''
+        with open_archive(archive) as tar:
+            for info in tar:
+                if not info.isreg() or not is_selected_member(info.name, suffix, include, exclude):
+                    continue
+
+                task = get_task(archive / get_member_name(info.name), info.size)
+                if task is None:
+                    continue
+
+                memory = estimate_task_memory(task[0], size=info.size)
+                if n_workers == 1 \
+                   or info.size >= ARCHIVE_STREAM_MEMBER_SIZE \
+                   or (max_memory is not None and memory > max_memory):
+                    with provide_logfile(task[0], tar.extractfile(info), info.size):
+                        streamed.append(evaluate_task(task, **kwargs))
+                    continue
+
+                # Wait for the workers to finish earlier members
+                yield from admit(task[0], n_bytes=info.size, memory=memory)
+                yield *task, tar.extractfile(info).read()
+
+    def get_file_tasks() -> Iterator[tuple | None]:
+        '''
+        Yields the tasks of the files without a cached result that are
+        read in place, and the tasks of compressed archives.
+        '''
+        for file in map(Path, paths):
+            if not is_archive_name(file.name) or not file.is_file():
+                task = get_task(file)
+                if task is not None:
+                    yield task
+            elif get_compression(file.name) is not None:
+                yield from get_archive_tasks(file)
+            else:
+                tasks = (get_task(file / name) for name in get_archive_index(file)
+                         if is_selected_member(name, suffix, include, exclude))
+                yield from (x for x in tasks if x is not None)
+
+    def get_tasks() -> Iterator[tuple | None]:
+        '''
+        Yields the tasks of the files without a cached result, holding
+        back files read in place while they do not fit into the memory
+        budget. Files too large for it on their own are streamed by the
+        worker (see evaluate_task).
+        '''
+        if max_memory is None or n_workers == 1:
+            yield from get_file_tasks()
+            return
+
+        for task in get_file_tasks():
+            if task is not None and len(task) == 2:
+                memory = estimate_task_memory(*task)
+                if memory > max_memory:
+                    memory = estimate_task_memory(task[0], streamed=True)
+                yield from admit(task[0], memory=memory)
+            yield task
+
+    kwargs = {**kwargs, 'incremental': cache is not None, 'max_memory': max_memory}
+    if cache is not None:
+        kwargs.pop('line_by_line', None)
+
+    def store(assessment: Assessment, checkpoint: dict | None) -> Assessment:
+        '''
+        Stores a new result in the cache and releases its archive member.
+        '''
+        if assessment.path in in_flight:
+            with in_flight_changed:
+                n_bytes, memory = in_flight.pop(assessment.path)
+                in_flight_totals[0] -= n_bytes
+                in_flight_totals[1] -= memory
+                in_flight_changed.notify()
+
+        if cache is not None:
+            t1 = time.perf_counter()
+            cache.put(assessment.path, assessment.result)
+            cache.put_checkpoint(assessment.path, checkpoint)
+            add_stage_time(run_stats, 'cache', time.perf_counter() - t1)
+        return assessment
+
+    def collect(results: Iterable[tuple[Assessment, dict | None]]) -> Iterator[Assessment]:
+        '''
+        Stores new results in the cache and yields them with the cached
+        and streamed ones.
+        '''
+        def drain() -> Iterator[Assessment]:
+            while cached:
+                yield cached.popleft()
+            while streamed:
+                yield store(*streamed.popleft())
+
+        for assessment, checkpoint in results:
+            yield from drain()
+            yield store(assessment, checkpoint)
+
+        yield from drain()
+
+    if n_workers == 1:
+        yield from collect(map(functools.partial(evaluate_task, **kwargs), get_tasks()))
+        return
+
+    with get_pool(n_workers, ionice=ionice) as p:
+        yield from collect(itertools.chain.from_iterable(p.imap_unordered(functools.partial(evaluate_batch, **kwargs),
+                                                                          batch_tasks(get_tasks()),
+                                                                          chunksize=1)))
+
+def get_default_cache_file() -> Path:
+    '''
+    Gets the default location of the assessment cache, honoring
+    XDG_CACHE_HOME if it is set.
+    '''
+    cache_home = os.environ.get('XDG_CACHE_HOME')
+    if not cache_home:
+        cache_home = Path.home() / '.cache'
+    return Path(cache_home) / 'GaussianLogfileAssessor' / 'assessments.sqlite'
+
+class AssessmentCache:
+    '''
+    On-disk store of (is_complete, reasons) assessments in an SQLite file.
+
+    Results are keyed on the absolute path of the log file and on the
+    analysis parameters. A stored result is only returned if the inode,
+    size and mtime_ns of the log file and of its SLURM error file still
+    match, so unchanged files are never opened.
+
+    The cache may be used from several threads of one process. Writes
+    are kept in memory and stored in one short transaction every
+    CACHE_COMMIT_WRITES writes or CACHE_COMMIT_SECONDS seconds, so other
+    runs sharing the cache file are not locked out and an interrupted
+    run keeps what it stored before.
+
+    Parameters
+    ----------
+    cache_file: Path
+        SQLite file to use. Created if it does not exist.
+
+    params: dict
+        Analysis parameters that influence the assessment
+    '''
+    def __init__(self, cache_file: Path, params: dict):
+        self.params = json.dumps({'version': CACHE_VERSION, **params}, sort_keys=True)
+        self.lock = threading.Lock()
+
+        # Writes not stored yet, by path
+        self.assessments = {}
+        self.checkpoints = {}
+        self.used = {}
+        self.last_flush = time.monotonic()
+
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(cache_file, timeout=60, check_same_thread=False)
+        with self.connection:
+            self.connection.execute('''CREATE TABLE IF NOT EXISTS assessments
+                                       (path TEXT NOT NULL,
+                                        params TEXT NOT NULL,
+                                        identity TEXT NOT NULL,
+                                        is_complete INTEGER NOT NULL,
+                                        reasons TEXT NOT NULL,
+                                        last_used REAL NOT NULL,
+                                        PRIMARY KEY (path, params))''')
+            self.connection.execute('''CREATE TABLE IF NOT EXISTS checkpoints
+                                       (path TEXT PRIMARY KEY,
+                                        checkpoint TEXT NOT NULL,
+                                        last_used REAL NOT NULL)''')
+
+    @staticmethod
+    def get_identity(file: Path) -> str:
+        '''
+        Describes the state of a log file and its SLURM error file
+        without opening either of them. Members of tar archives are
+        described by the state of their archive.
+        '''
+        identity = []
+        member = split_archive_member(file)
+        if member is not None:
+            stat = member[0].stat()
+            return f'{member[0].name}/{member[1]}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}'
+
+        for _file in (file, get_slurm_error_file(file)):
+            if _file is None:
+                continue
+            stat = _file.stat()
+            identity.append(f'{_file.name}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}')
+        return '|'.join(identity)
+
+    def get(self, file: Path) -> tuple[bool, list] | None:
+        '''
+        Gets the stored assessment of an unchanged file.
+
+        Returns
+        ----------
+        tuple[bool, list] | None
+            The stored (is_complete, reasons) or None if the file is
+            not cached or has changed.
+        '''
+        path = str(file.absolute())
+        with self.lock:
+            if path in self.assessments:
+                row = self.assessments[path][2:5]
+            else:
+                row = self.connection.execute('SELECT identity, is_complete, reasons FROM assessments WHERE path = ? AND params = ?',
+                                              (path, self.params)).fetchone()
+
+            if row is None or row[0] != self.get_identity(file):
+                return None
+
+            if path not in self.assessments:
+                self.used[path] = time.time()
+                self._written()
+        return bool(row[1]), json.loads(row[2])
+
+    def put(self, file: Path, result: tuple[bool, list]) -> None:
+        '''
+        Stores the assessment of a file.
+        '''
+        path = str(file.absolute())
+        with self.lock:
+            self.assessments[path] = (path,
+                                      self.params,
+                                      self.get_identity(file),
+                                      int(result[0]),
+                                      json.dumps(result[1]),
+                                      time.time())
+            self.used.pop(path, None)
+            self._written()
+
+    def get_checkpoint(self, file: Path) -> dict | None:
+        '''
+        Gets the scan checkpoint stored for a file (see resume_scan).
+        '''
+        path = str(file.absolute())
+        with self.lock:
+            if path in self.checkpoints:
+                row = self.checkpoints[path][1:2]
+            else:
+                row = self.connection.execute('SELECT checkpoint FROM checkpoints WHERE path = ?', (path,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def put_checkpoint(self, file: Path, checkpoint: dict | None) -> None:
+        '''
+        Stores the scan checkpoint of a file.
+        '''
+        if checkpoint is None:
+            return
+        path = str(file.absolute())
+        with self.lock:
+            self.checkpoints[path] = (path, json.dumps(checkpoint), time.time())
+            self._written()
+
+    def _written(self) -> None:
+        '''
+        Flushes the writes kept in memory once there are
+        CACHE_COMMIT_WRITES of them or CACHE_COMMIT_SECONDS seconds
+        passed since the last flush. Must be called with the lock held.
+        '''
+        n_writes = len(self.assessments) + len(self.checkpoints) + len(self.used)
+        if n_writes >= CACHE_COMMIT_WRITES or time.monotonic() - self.last_flush >= CACHE_COMMIT_SECONDS:
+            self._flush()
+
+    def _flush(self) -> None:
+        '''
+        Stores the writes kept in memory in one transaction. Must be
+        called with the lock held.
+        '''
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO assessments VALUES (?, ?, ?, ?, ?, ?)',
+                                        self.assessments.values())
+            self.connection.executemany('INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)',
+                                        self.checkpoints.values())
+            self.connection.executemany('UPDATE assessments SET last_used = ? WHERE path = ? AND params = ?',
+                                        [(last_used, path, self.params) for path, last_used in self.used.items()])
+        self.assessments.clear()
+        self.checkpoints.clear()
+        self.used.clear()
+        self.last_flush = time.monotonic()
+
+    def prune(self, parent_dir: Path) -> int:
+        '''
+        Evicts results of files below parent_dir that no longer exist
+        (e.g., because they were moved) and results of any file that
+        have not been used for CACHE_MAX_AGE seconds. Files of sibling
+        directories that share the name prefix of parent_dir (e.g.,
+        /a/bc for /a/b) are not touched.
+
+        Returns
+        ----------
+        int
+            Number of evicted results
+        '''
+        prefix = os.path.join(str(parent_dir.absolute()), '')
+        with self.lock:
+            self._flush()
+            rows = self.connection.execute('SELECT DISTINCT path FROM assessments WHERE substr(path, 1, ?) = ?',
+                                           (len(prefix), prefix)).fetchall()
+            rows += self.connection.execute('SELECT path FROM checkpoints WHERE substr(path, 1, ?) = ?',
+                                            (len(prefix), prefix)).fetchall()
+            missing = [(path,) for path in set(path for (path,) in rows) if not logfile_exists(Path(path))]
+            with self.connection:
+                self.connection.executemany('DELETE FROM assessments WHERE path = ?', missing)
+                self.connection.executemany('DELETE FROM checkpoints WHERE path = ?', missing)
+
+                expired = self.connection.execute('DELETE FROM assessments WHERE last_used < ?',
+                                                  (time.time() - CACHE_MAX_AGE,)).rowcount
+                expired += self.connection.execute('DELETE FROM checkpoints WHERE last_used < ?',
+                                                   (time.time() - CACHE_MAX_AGE,)).rowcount
+        return len(missing) + expired
+
+    def close(self) -> None:
+        '''
+        Stores pending writes and closes the cache.
+        '''
+        with self.lock:
+            self._flush()
+        self.connection.close()
+
+class PollingWatcher:
+    '''
+    Reports created or changed files of a set of directories by
+    comparing os.scandir snapshots of the directories.
+
+    Parameters
+    ----------
+    directories: list[Path]
+        Directories to watch. Subdirectories are not watched.
+
+    suffix: str
+        Only files with this suffix are reported
+    '''
+    def __init__(self, directories: list[Path], suffix: str = '.log'):
+        self.directories = directories
+        self.suffix = suffix
+        self.snapshot = None
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        '''
+        Gets the size and mtime_ns of every watched file.
+        '''
+        snapshot = {}
+        for directory in self.directories:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(self.suffix) or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    snapshot[directory / entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def get_changes(self, timeout: float) -> set[Path]:
+        '''
+        Waits up to timeout seconds and returns the files that were
+        created or changed. Every existing file is reported on the
+        first call.
+        '''
+        if self.snapshot is not None:
+            time.sleep(timeout)
+
+        previous = self.snapshot or {}
+        self.snapshot = self._scan()
+        return {file for file, state in self.snapshot.items() if previous.get(file) != state}
+
+    def close(self) -> None:
+        '''
+        Releases the resources of the watcher.
+        '''
+
+class InotifyWatcher(PollingWatcher):
+    '''
+    Same as PollingWatcher, but waits for inotify events of the
+    directories instead of scanning them repeatedly. The inotify API
+    is called through ctypes, so an OSError is raised where it is
+    not available (i.e., outside of Linux).
+    '''
+    def __init__(self, directories: list[Path], suffix: str = '.log'):
+        super().__init__(directories, suffix)
+
+        libc_name = ctypes.util.find_library('c')
+        if libc_name is None:
+            raise OSError('Could not find the C library.')
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify is not available.')
+
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed.')
+
+        self.watches = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd,
+                                        os.fsencode(directory),
+                                        IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {directory}.')
+            self.watches[wd] = directory
+
+    def _read_events(self) -> set[Path]:
+        '''
+        Reads the queued inotify events and returns the files they
+        refer to.
+        '''
+        changes = set()
+        suffix = os.fsencode(self.suffix)
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changes
+
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(buffer, offset)
+                offset += INOTIFY_EVENT.size
+                name = buffer[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                # Events were dropped, so fall back to a full scan
+                if mask & IN_Q_OVERFLOW:
+                    changes.update(self._scan())
+                elif wd in self.watches and name.endswith(suffix):
+                    changes.add(self.watches[wd] / os.fsdecode(name))
+
+    def get_changes(self, timeout: float) -> set[Path]:
+        '''
+        Waits up to timeout seconds for the first event and returns the
+        files that were created or changed. Events that arrive within
+        a second of the first one are reported together, so a file that
+        is being written does not wake the caller for every write.
+        '''
+        if self.snapshot is None:
+            self.snapshot = self._scan()
+            return set(self.snapshot)
+
+        changes = set()
+        deadline = None
+        while True:
+            wait = timeout if deadline is None else deadline - time.monotonic()
+            if wait <= 0 or not select.select([self.fd], [], [], wait)[0]:
+                return changes
+            changes.update(self._read_events())
+            if deadline is None:
+                deadline = time.monotonic() + min(1, timeout)
+
+    def close(self) -> None:
+        '''
+        Closes the inotify file descriptor.
+        '''
+        os.close(self.fd)
+
+def has_terminated(file: Path) -> bool:
+    '''
+    Checks whether the last job in a G16 .log file has terminated
+    (normally or with an error), i.e., whether G16 is done writing it.
+    '''
+    tail, _ = get_file_tail(file, TERMINATION_BLOCK_SIZE)
+    last_termination = max(tail.rfind(b' Normal termination of Gaussian 16'),
+                           tail.rfind(b' Error termination'))
+    last_start = max(tail.rfind(b' Entering Link'),
+                     tail.rfind(b'Link1:'))
+    return last_termination != -1 and last_termination > last_start
+
+def is_verdict_final(file: Path, result: tuple[bool, list]) -> bool:
+    '''
+    Checks whether the assessment of a G16 .log file can no longer
+    change. Completed jobs are final, failed jobs only if G16 terminated
+    or SLURM reported why the job ended. A log file that simply stopped
+    changing may belong to a job that is still running a long step.
+    '''
+    if result[0]:
+        return True
+    return has_terminated(file) or len(get_slurm_failure_reasons(file)) != 0
+
+def get_slurm_file_state(file: Path) -> tuple:
+    '''
+    Gets the name, size and mtime_ns of the SLURM .out and .error files
+    of a log file (see get_slurm_out_file). Changes when one of them
+    appears or is written to.
+    '''
+    state = []
+    for slurm_file in (get_slurm_out_file(file), get_slurm_error_file(file)):
+        try:
+            stat = slurm_file.stat()
+        except (AttributeError, OSError):
+            state.append(None)
+            continue
+        state.append((slurm_file.name, stat.st_size, stat.st_mtime_ns))
+    return tuple(state)
+
+def watch_directories(directories: list[Path],
+                      settle: float = 60,
+                      poll_interval: float = 10,
+                      results_file: Path | None = None,
+                      delete_chk: bool = False,
+                      dry: bool = False,
+                      journal_file: Path | None = None,
+                      max_workers: int = 8,
+                      suffix: str = '.log',
+                      evaluate_incremental: Callable | None = None,
+                      is_final: Callable[[Path, tuple[bool, list]], bool] | None = None,
+                      get_companions: Callable[[Path], list[Path]] | None = None,
+                      **kwargs) -> None:
+    '''
+    Assesses the log files of directories whenever they stop changing
+    until interrupted with Ctrl+C. Uses inotify where available and
+    periodic scans of the directories otherwise.
+
+    A file is assessed once it has not been modified for settle seconds
+    and its size or mtime differ from its last assessment. The scan of a
+    growing file resumes from where its previous assessment stopped.
+    Files that are unfinished (failed without a final verdict, see
+    is_verdict_final) are also reassessed when their SLURM .out or .error
+    file appears or changes. Results are printed (and appended to
+    results_file) as they come in, and files with a final verdict are
+    moved into the completed and failed directories next to them. The
+    moves of every pass go through the move journal (see apply_move_plan),
+    so an interrupted watch can be finished with --resume or reverted with
+    --undo. The journal of the previous pass is replaced.
+
+    Parameters
+    ----------
+    directories: list[Path]
+        Directories to watch
+
+    settle: float
+        Seconds a file must be unchanged before it is assessed
+
+    poll_interval: float
+        Seconds between checks for changed files
+
+    results_file: Path | None
+        File to which results are appended
+
+    delete_chk: bool
+        Whether to delete .chk files instead of moving them
+
+    dry: bool
+        Whether files are moved or not
+
+    journal_file: Path | None
+        Move journal (default=assessment_moves.journal in the first directory)
+
+    max_workers: int
+        Maximum number of concurrent copies between file systems
+
+    suffix: str
+        Suffix of the watched log files
+
+    evaluate_incremental: Callable | None
+        Evaluation function of the program that resumes from a checkpoint
+        (default=evaluate_g16_logfile_incremental)
+
+    is_final: Callable[[Path, tuple[bool, list]], bool] | None
+        Whether a verdict can no longer change (default=is_verdict_final)
+
+    get_companions: Callable[[Path], list[Path]] | None
+        Gets the existing companion files of a log file (see get_move_plan)
+
+    **kwargs
+        Passed on to evaluate_incremental
+
+    Returns
+    ----------
+    None
+    '''
+    evaluate_incremental = evaluate_incremental or evaluate_g16_logfile_incremental
+    is_final = is_final or is_verdict_final
+    if journal_file is None:
+        journal_file = get_journal_file(directories[0])
+
+    try:
+        watcher = InotifyWatcher(directories, suffix)
+    except OSError:
+        watcher = PollingWatcher(directories, suffix)
+
+    print(f'Watching {", ".join(str(x) for x in directories)} ({type(watcher).__name__}). Press Ctrl+C to stop.')
+
+    pending = set()
+    assessed = {}
+    checkpoints = {}
+
+    # SLURM file state of the unfinished files, see get_slurm_file_state
+    unfinished = {}
+    counts = {'completed': 0, 'failed': 0}
+
+    try:
+        while True:
+            pending.update(watcher.get_changes(timeout=poll_interval))
+
+            # Collect the files that stopped changing
+            settled = []
+            now = time.time()
+            for file in sorted(pending):
+                try:
+                    stat = file.stat()
+                except FileNotFoundError:
+                    pending.discard(file)
+                    continue
+
+                if now - stat.st_mtime < settle:
+                    continue
+
+                pending.discard(file)
+                if assessed.get(file) != (stat.st_size, stat.st_mtime_ns):
+                    assessed[file] = (stat.st_size, stat.st_mtime_ns)
+                    settled.append(file)
+
+            # Companion and SLURM files may have appeared since the last pass
+            for directory in set(file.parent for file in settled):
+                get_directory_index(directory, refresh=True)
+
+            # A SLURM file that appears after the log stopped changing
+            # may tell why the job ended
+            for file, state in list(unfinished.items()):
+                if not file.exists():
+                    del unfinished[file]
+                elif file not in settled and get_slurm_file_state(file) != state:
+                    settled.append(file)
+
+            failed, completed = {}, []
+            for file in settled:
+                result, checkpoints[file] = evaluate_incremental(file, checkpoints.get(file), **kwargs)
+
+                reasons = '\t'.join(result[1])
+                if result[0]:
+                    verdict, color, message = 'completed', bcolors.OKGREEN, 'completed'
+                elif is_final(file, result):
+                    verdict, color, message = 'failed', bcolors.FAIL, f'failed because {reasons}'
+                else:
+                    verdict, color, message = 'unfinished', bcolors.WARNING, 'stopped changing but has not terminated'
+
+                if verdict == 'unfinished':
+                    unfinished[file] = get_slurm_file_state(file)
+                else:
+                    unfinished.pop(file, None)
+                    counts[verdict] += 1
+
+                print(f'{time.strftime("%Y-%m-%d %H:%M:%S")} {color}{file.name}{bcolors.ENDC} {message}', flush=True)
+                if results_file is not None:
+                    with open(results_file, 'a', encoding='utf-8') as outfile:
+                        outfile.write(f'{time.strftime("%Y-%m-%d %H:%M:%S")}\t{file.absolute()}\t{verdict}\t{message}\n')
+
+                if verdict == 'completed':
+                    completed.append(file)
+                elif verdict == 'failed':
+                    failed[file] = reasons
+
+            if not dry and (failed or completed):
+                plan = get_move_plan(failed, completed=completed, delete_chk=delete_chk, get_companions=get_companions)
+                apply_move_plan(plan, journal_file, max_workers=max_workers)
+                for file in itertools.chain(failed, completed):
+                    del assessed[file], checkpoints[file]
+
+    except KeyboardInterrupt:
+        print('\n')
+        print(f'{bcolors.BOLD}COMPLETED{bcolors.ENDC}:\t{counts["completed"]}')
+        print(f'{bcolors.BOLD}FAILED{bcolors.ENDC}:\t\t{counts["failed"]}')
+        print(f'{bcolors.BOLD}UNFINISHED{bcolors.ENDC}:\t{len(unfinished)}')
+        print('\n')
+    finally:
+        watcher.close()
+
+def parse_shard(shard: str) -> tuple[int, int]:
+    '''
+    Parses the I/N argument of --shard. Used as the argparse type, so
+    invalid arguments end in a usage error.
+
+    Returns
+    ----------
+    tuple[int, int]
+        Index I (0 <= I < N) and number of shards N
+    '''
+    try:
+        index, count = (int(x) for x in shard.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'must be given as I/N (e.g., 0/8), not {shard!r}')
+    if count < 1:
+        raise argparse.ArgumentTypeError(f'the number of shards must be at least 1, not {count}')
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f'the shard index is 0-based and must be between 0 and {count - 1}, not {index}')
+    return index, count
+
+def parse_memory_size(size: str) -> int:
+    '''
+    Parses the SIZE argument of --max-memory (e.g., 8G, 512M or 1.5GB).
+    Sizes without a unit are in MB.
+
+    Returns
+    ----------
+    int
+        Number of bytes
+    '''
+    match = re.fullmatch(r'\s*(\d+(?:\.\d*)?)\s*([KMGT]?)(?:i?B)?\s*', size, flags=re.IGNORECASE)
+    if match is None:
+        raise argparse.ArgumentTypeError(f'invalid size {size!r}, use e.g. 8G or 512M')
+    unit = match.group(2).upper() or 'M'
+    return int(float(match.group(1)) * 1024 ** ' KMGT'.index(unit))
+
+def get_relative_path(file: Path, parent_dir: Path) -> str:
+    '''
+    Gets the path of a file relative to the input directory in POSIX form.
+    '''
+    if not parent_dir.is_dir():
+        return file.name
+    return Path(os.path.relpath(file, parent_dir)).as_posix()
+
+def is_in_shard(file: Path, parent_dir: Path, shard: tuple[int, int]) -> bool:
+    '''
+    Checks whether a file belongs to a shard. Files are assigned to
+    shards by a hash of their path relative to the input directory, so
+    every node of an array job gets the same partition without
+    communicating with the others.
+
+    Parameters
+    ----------
+    file: Path
+        Log file
+
+    parent_dir: Path
+        Input directory
+
+    shard: tuple[int, int]
+        Index and number of shards (see parse_shard)
+
+    Returns
+    ----------
+    bool
+        Whether the file belongs to the shard
+    '''
+    digest = hashlib.blake2b(get_relative_path(file, parent_dir).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % shard[1] == shard[0]
+
+def get_partial_file(parent_dir: Path, shard: tuple[int, int]) -> Path:
+    '''
+    Gets the default partial result file of a shard.
+    '''
+    directory = parent_dir if parent_dir.is_dir() else parent_dir.parent
+    return directory / f'assessment_shard_{shard[0]}_of_{shard[1]}.json'
+
+def write_partial_results(partial_file: Path,
+                          parent_dir: Path,
+                          shard: tuple[int, int],
+                          recursive: bool,
+                          params: dict,
+                          failed: dict,
+                          completed: list[Path]) -> None:
+    '''
+    Writes the results of one shard to a JSON file that is read by the
+    merge subcommand. The file is replaced atomically, so a half-written
+    file is never merged.
+
+    Parameters
+    ----------
+    partial_file: Path
+        File to write
+
+    parent_dir: Path
+        Input directory
+
+    shard: tuple[int, int]
+        Index and number of shards
+
+    recursive: bool
+        Whether the input directory was walked recursively
+
+    params: dict
+        Analysis parameters. Only partials with equal parameters are merged.
+
+    failed: dict
+        Dictionary of Path:reason pairs
+
+    completed: list[Path]
+        List of completed files
+
+    Returns
+    ----------
+    None
+    '''
+    partial = {'version': CACHE_VERSION,
+               'input': str(parent_dir.absolute()),
+               'shard': list(shard),
+               'recursive': recursive,
+               'params': params,
+               'completed': [get_relative_path(file, parent_dir) for file in completed],
+               'failed': {get_relative_path(file, parent_dir): reason for file, reason in failed.items()}}
+
+    tmp_file = partial_file.with_name(f'.{partial_file.name}.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as outfile:
+        json.dump(partial, outfile, indent=1)
+    os.replace(tmp_file, partial_file)
+
+def merge_partial_results(partial_files: list[Path]) -> tuple[Path, dict, list[Path], list[Path]]:
+    '''
+    Combines the partial result files of all shards of a run.
+
+    The files are put in the order of the relative paths recorded in the
+    partial results, which includes compressed log files and members of
+    tar archives (e.g., 'runs.tar/mol1.log').
+
+    Parameters
+    ----------
+    partial_files: list[Path]
+        Partial result files written with --shard
+
+    Returns
+    ----------
+    tuple[Path, dict, list[Path], list[Path]]
+        The input directory, the failed dict, the completed list and
+        the list of all files
+    '''
+    partials = []
+    for partial_file in partial_files:
+        with open(partial_file, 'r', encoding='utf-8') as infile:
+            partials.append(json.load(infile))
+
+    first = partials[0]
+    for partial_file, partial in zip(partial_files, partials):
+        for key in ('version', 'input', 'recursive', 'params'):
+            if partial[key] != first[key]:
+                raise ValueError(f'{partial_file} has a different {key} than {partial_files[0]}.')
+        if partial['shard'][1] != first['shard'][1]:
+            raise ValueError(f'{partial_file} is one of {partial["shard"][1]} shards, not {first["shard"][1]}.')
+
+    indices = sorted(partial['shard'][0] for partial in partials)
+    if indices != list(range(first['shard'][1])):
+        missing = sorted(set(range(first['shard'][1])) - set(indices))
+        raise ValueError(f'Partial results must cover every shard exactly once (missing: {missing}, given: {indices}).')
+
+    parent_dir = Path(first['input'])
+    directory = parent_dir if parent_dir.is_dir() else parent_dir.parent
+
+    completed = set()
+    reasons = {}
+    for partial in partials:
+        completed.update(partial['completed'])
+        reasons.update(partial['failed'])
+
+    names = sorted(completed | set(reasons))
+
+    files = [directory / name for name in names]
+    failed = {directory / name: reasons[name] for name in names if name in reasons}
+    completed = [directory / name for name in names if name in completed]
+    return parent_dir, failed, completed, files
+
+def get_journal_file(parent_dir: Path) -> Path:
+    '''
+    Gets the default move journal of an input directory or file.
+    '''
+    directory = parent_dir if parent_dir.is_dir() else parent_dir.parent
+    return directory / 'assessment_moves.journal'
+
+def get_move_plan(failed: dict,
+                  completed: list[Path],
+                  delete_chk: bool = False,
+                  get_companions: Callable[[Path], list[Path]] | None = None) -> list[dict]:
+    '''
+    Plans the moves of the processed G16 log files and their companion
+    files (see get_companion_files) into the completed and failed
+    directories next to them, followed by the .chk deletions of
+    --deletechk. Members of tar archives are left where they are.
+
+    Parameters
+    ----------
+    failed: dict
+        Dictionary of Path:reason pairs
+
+    completed: list[Path]
+        List of completed G16 .log files
+
+    delete_chk: bool
+        Whether to delete .chk files instead of moving them
+
+    get_companions: Callable[[Path], list[Path]] | None
+        Gets the existing companion files of a log file, e.g., those
+        of ORCA .out files (default=get_companion_files)
+
+    Returns
+    ----------
+    list[dict]
+        Entries with the keys 'i' (position in the plan), 'op' ('move' or
+        'delete'), 'verdict', 'src' and, for moves, 'dst'. Paths are
+        absolute so that the plan can be resumed from any directory.
+    '''
+    if get_companions is None:
+        get_companions = functools.partial(get_companion_files, include_chk=not delete_chk)
+
+    plan = []
+    completed = [x for x in completed if split_archive_member(x) is None]
+    failed = {x: y for x, y in failed.items() if split_archive_member(x) is None}
+    for verdict, files in (('completed', completed), ('failed', failed.keys())):
+        for file in files:
+            for _file in [file, *get_companions(file)]:
+                plan.append({'i': len(plan),
+                             'op': 'move',
+                             'verdict': verdict,
+                             'src': str(_file.absolute()),
+                             'dst': str((file.parent / verdict / _file.name).absolute())})
+
+    if delete_chk:
+        for file in itertools.chain(failed.keys(), completed):
+            chk_file = file.with_name(f'{get_log_stem(file)}.chk')
+            if get_directory_index(file.parent).has(chk_file.name):
+                plan.append({'i': len(plan),
+                             'op': 'delete',
+                             'verdict': 'completed' if file in completed else 'failed',
+                             'src': str(chk_file.absolute())})
+    return plan
+
+def read_journal(journal_file: Path) -> tuple[list[dict], set[int], set[int], list[str]]:
+    '''
+    Reads a move journal. A torn last line (e.g., after a crash) is ignored.
+
+    Returns
+    ----------
+    tuple[list[dict], set[int], set[int], list[str]]
+        The plan (see get_move_plan), the positions of the entries that
+        were carried out, the positions of the entries that were undone
+        and the directories created while moving
+    '''
+    plan, done, undone, created = [], set(), set(), []
+    with open(journal_file, 'r', encoding='utf-8') as infile:
+        for line in infile:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            if 'op' in record:
+                plan.append(record)
+            elif 'done' in record:
+                done.add(record['done'])
+            elif 'undone' in record:
+                undone.add(record['undone'])
+            elif 'mkdir' in record:
+                created.append(record['mkdir'])
+    return plan, done, undone, created
+
+def open_journal(journal_file: Path) -> TextIO:
+    '''
+    Opens a move journal for appending. A torn last line (see
+    read_journal) is cut off first, so that the records appended after it
+    can be read.
+    '''
+    with open(journal_file, 'rb+') as infile:
+        contents = infile.read()
+        if contents and not contents.endswith(b'\n'):
+            infile.truncate(contents.rfind(b'\n') + 1)
+    return open(journal_file, 'a', encoding='utf-8')
+
+def is_journal_finished(journal_file: Path) -> bool:
+    '''
+    Checks whether the moves of a journal were either all carried out
+    or undone. True if there is no journal.
+    '''
+    if not journal_file.exists():
+        return True
+    plan, done, undone, _ = read_journal(journal_file)
+    return len(undone) == 0 and all(entry['i'] in done for entry in plan)
+
+def _move_across_devices(src: Path, dst: Path, i: int) -> int:
+    '''
+    Copies a file to another file system and removes the original.
+    Returns i so that finished copies can be marked in the journal.
+    '''
+    shutil.move(src, dst)
+    return i
+
+def _run_moves(moves: list[tuple[int, Path, Path]],
+               mark,
+               max_workers: int) -> None:
+    '''
+    Moves files with os.rename if source and destination are on the same
+    file system and with shutil.move on a pool of threads otherwise.
+    Every finished move is passed to mark.
+
+    Parameters
+    ----------
+    moves: list[tuple[int, Path, Path]]
+        Position in the plan, source and destination of every move
+
+    mark: Callable[[int], None]
+        Called with the position of every finished move
+
+    max_workers: int
+        Maximum number of concurrent copies between file systems
+    '''
+    devices = {}
+    def get_device(directory: Path) -> int:
+        if directory not in devices:
+            devices[directory] = os.stat(directory).st_dev
+        return devices[directory]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for i, src, dst in moves:
+            if get_device(src.parent) == get_device(dst.parent):
+                os.rename(src, dst)
+                mark(i)
+            else:
+                futures.append(executor.submit(_move_across_devices, src, dst, i))
+
+        for future in as_completed(futures):
+            mark(future.result())
+
+def resume_moves(journal_file: Path, max_workers: int = 8) -> int:
+    '''
+    Carries out the entries of a move journal that were not carried out
+    yet. Used both for new plans (see apply_move_plan) and to finish the
+    moves of an interrupted run (--resume). A file that is already at its
+    destination counts as moved.
+
+    Parameters
+    ----------
+    journal_file: Path
+        Move journal
+
+    max_workers: int
+        Maximum number of concurrent copies between file systems
+
+    Returns
+    ----------
+    int
+        Number of entries carried out
+    '''
+    plan, done, undone, _ = read_journal(journal_file)
+    if len(undone) != 0:
+        raise RuntimeError(f'{journal_file} is being undone. Finish with --undo.')
+
+    pending = [entry for entry in plan if entry['i'] not in done]
+
+    with open_journal(journal_file) as journal:
+        lock = threading.Lock()
+        def write(record: dict) -> None:
+            with lock:
+                journal.write(json.dumps(record) + '\n')
+
+        for directory in sorted(set(Path(entry['dst']).parent for entry in pending if entry['op'] == 'move')):
+            try:
+                directory.mkdir()
+                write({'mkdir': str(directory)})
+            except FileExistsError:
+                pass
+
+        moves = []
+        for entry in pending:
+            src = Path(entry['src'])
+            if entry['op'] == 'delete':
+                src.unlink(missing_ok=True)
+                write({'done': entry['i']})
+            elif not os.path.lexists(src):
+                # Moved before the interruption or removed by someone else
+                if not os.path.lexists(entry['dst']):
+                    print(f'[WARNING] {src} no longer exists.')
+                write({'done': entry['i']})
+            else:
+                moves.append((entry['i'], src, Path(entry['dst'])))
+
+        _run_moves(moves, mark=lambda i: write({'done': i}), max_workers=max_workers)
+
+        journal.flush()
+        os.fsync(journal.fileno())
+
+    return len(pending)
+
+def apply_move_plan(plan: list[dict], journal_file: Path, max_workers: int = 8) -> None:
+    '''
+    Writes a move plan to a journal and carries it out. The plan is on
+    disk before the first file is moved, so an interrupted run can be
+    finished with --resume or reverted with --undo. The journal of the
+    previous run is replaced.
+
+    Parameters
+    ----------
+    plan: list[dict]
+        Move plan (see get_move_plan)
+
+    journal_file: Path
+        Move journal
+
+    max_workers: int
+        Maximum number of concurrent copies between file systems
+
+    Returns
+    ----------
+    None
+    '''
+    if not is_journal_finished(journal_file):
+        raise RuntimeError(f'The moves in {journal_file} were interrupted. Finish them with --resume or revert them with --undo.')
+
+    tmp_file = journal_file.with_name(f'.{journal_file.name}.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as journal:
+        for entry in plan:
+            journal.write(json.dumps(entry) + '\n')
+        journal.flush()
+        os.fsync(journal.fileno())
+    os.replace(tmp_file, journal_file)
+
+    resume_moves(journal_file, max_workers=max_workers)
+
+def undo_moves(journal_file: Path, max_workers: int = 8) -> int:
+    '''
+    Moves the files of a move journal back to where they came from,
+    removes the directories the moves created (if empty) and deletes the
+    journal. Deleted .chk files cannot be restored.
+
+    Parameters
+    ----------
+    journal_file: Path
+        Move journal
+
+    max_workers: int
+        Maximum number of concurrent copies between file systems
+
+    Returns
+    ----------
+    int
+        Number of files moved back
+    '''
+    plan, done, undone, created = read_journal(journal_file)
+
+    moves = []
+    with open_journal(journal_file) as journal:
+        lock = threading.Lock()
+        def write(record: dict) -> None:
+            with lock:
+                journal.write(json.dumps(record) + '\n')
+
+        for entry in reversed(plan):
+            if entry['i'] not in done or entry['i'] in undone:
+                continue
+            if entry['op'] == 'delete':
+                print(f'[WARNING] {entry["src"]} was deleted and cannot be restored.')
+            elif os.path.lexists(entry['dst']) and not os.path.lexists(entry['src']):
+                moves.append((entry['i'], Path(entry['dst']), Path(entry['src'])))
+                continue
+            write({'undone': entry['i']})
+
+        _run_moves(moves, mark=lambda i: write({'undone': i}), max_workers=max_workers)
+
+    for directory in reversed(created):
+        try:
+            Path(directory).rmdir()
+        except OSError:
+            pass
+
+    journal_file.unlink()
+    return len(moves)
+
+def get_reason_codes(reasons: list[str]) -> list[str]:
+    '''
+    Translates failure reasons into the codes of REASON_CODES or into the
+    names of the site-specific detectors whose literal they contain.
+    Reasons that consist of several tab-separated error lines can yield
+    several codes. Unknown reasons are coded as 'other'.
+
+    Parameters
+    ----------
+    reasons: list[str]
+        Failure reasons of evaluate_g16_logfile
+
+    Returns
+    ----------
+    list[str]
+        Codes in the order of the reasons, without duplicates
+    '''
+    codes = []
+    site_detectors = get_site_detectors()
+    for reason in reasons:
+        for part in reason.split('\t'):
+            code = next((code for code, pattern in REASON_CODES if pattern.search(part)), None)
+            if code is None:
+                code = next((x.name for x in site_detectors if x.literal in part or x.message and x.message in part), 'other')
+            if code not in codes:
+                codes.append(code)
+    return codes
+
+class RecordWriter:
+    '''
+    Writes one record per assessed file to a stream as JSON lines, CSV
+    or TSV. Every record is flushed when it is written and nothing is
+    kept, so memory use does not depend on the number of files.
+
+    Parameters
+    ----------
+    stream: TextIO
+        Stream to write to (e.g., sys.stdout)
+
+    format: str
+        One of 'jsonl', 'csv' and 'tsv'
+    '''
+    FIELDS = ('path', 'verdict', 'reason_codes', 'reasons', 'line_numbers', 'size', 'bytes_scanned', 'seconds')
+
+    def __init__(self, stream, format: str):
+        self.stream = stream
+        self.format = format
+        self.writer = None
+
+        if format in ('csv', 'tsv'):
+            self.writer = csv.writer(stream, delimiter=',' if format == 'csv' else '\t', lineterminator='\n')
+            self.writer.writerow(self.FIELDS)
+
+    def write(self, assessment: Assessment) -> None:
+        '''
+        Writes the record of a file.
+
+        Parameters
+        ----------
+        assessment: Assessment
+            Assessment of the file
+        '''
+        record = assessment.to_dict()
+
+        if self.writer is None:
+            self.stream.write(json.dumps(record) + '\n')
+        else:
+            record['reason_codes'] = ';'.join(record['reason_codes'])
+            record['line_numbers'] = ';'.join(map(str, record['line_numbers']))
+            record['reasons'] = '; '.join(x.replace('\t', '; ') for x in record['reasons'])
+            self.writer.writerow(record[field] for field in self.FIELDS)
+        self.stream.flush()
+
+def print_analysis_and_move_files(failed: dict,
+                                  completed: list[Path],
+                                  files: list[Path],
+                                  delete_chk: bool = False,
+                                  dry: bool = False,
+                                  journal_file: Path | None = None,
+                                  max_workers: int = 8,
+                                  get_companions: Callable[[Path], list[Path]] | None = None) -> None:
+    '''
+    Prints a colorful analysis of the processed G16 log files. Files
+    are moved into completed and failed directories next to them
+    (see apply_move_plan).
+
+    Parameters
+    ----------
+    failed: dict
+        Dictionary of Path:reason pairs where reason is a string
+        containing an explanation of what went wrong.
+
+    completed: list[Path]
+        List of completed G16 .log files as pathlib.Path objects
+
+    files: list[Path]
+        List of all G16 .log files
+
+    delete_chk: bool
+        Whether to delete .chk files instead of moving them
+
+    dry: bool
+        Whether files are moved or not
+
+    journal_file: Path | None
+        Move journal (default=assessment_moves.journal next to the
+        first file)
+
+    max_workers: int
+        Maximum number of concurrent copies between file systems
+
+    get_companions: Callable[[Path], list[Path]] | None
+        Gets the existing companion files of a log file, e.g., those
+        of ORCA .out files (see get_move_plan)
+
+    Returns
+    ----------
+    None
+    '''
+    plan = get_move_plan(failed, completed=completed, delete_chk=delete_chk, get_companions=get_companions)
+
+    print('-----------------------FILES MOVED TO COMPLETED DIRECTORY-----------------------')
+    for entry in plan:
+        if entry['op'] == 'move' and entry['verdict'] == 'completed':
+            print(f'{bcolors.OKGREEN}{Path(entry["src"]).name}{bcolors.ENDC}')
+
+    print('-------------------------FILES MOVED TO FAILED DIRECTORY------------------------')
+    for entry in plan:
+        if entry['op'] == 'move' and entry['verdict'] == 'failed':
+            print(f'{bcolors.FAIL}{Path(entry["src"]).name}{bcolors.ENDC}')
+
+    if delete_chk:
+        print('-------------------------------DELETING CHK FILES-------------------------------')
+        for entry in plan:
+            if entry['op'] == 'delete':
+                print(Path(entry['src']).name)
+
+    if not dry and len(plan) != 0:
+        if journal_file is None:
+            journal_file = get_journal_file(files[0].parent)
+        apply_move_plan(plan, journal_file, max_workers=max_workers)
+
+    print_totals(len(failed), n_completed=len(completed), n_files=len(files))
+
+def print_summary(failed: dict,
+                  completed: list[Path],
+                  files: list[Path]):
+    '''
+    Prints a colorful analysis of only the failed files including
+    a reason. Also prints a summary of all files (total number completed
+    or failed).
+
+    Parameters
+    ----------
+    failed: dict
+        Dictionary of Path:reason pairs where reason is a string
+        containing an explanation of what went wrong.
+
+    completed: list[Path]
+        List of completed G16 .log files as pathlib.Path objects
+
+    files: list[Path]
+        List of all G16 .log files
+
+    Returns
+    ----------
+    None
+    '''
+    print('------------------------------------OVERVIEW------------------------------------')
+    if len(failed) != 0:
+        for file, reason in failed.items():
+            print_failure(file, reason)
+
+    print_totals(len(failed), n_completed=len(completed), n_files=len(files))
+
+def print_failure(file: Path, reason: str) -> None:
+    '''
+    Prints the overview line of a failed file.
+    '''
+    print(f'{bcolors.FAIL}{file.name}{bcolors.ENDC} failed because {reason}', flush=True)
+
+def print_running(file: Path, reason: str) -> None:
+    '''
+    Prints the overview line of a file whose job is still running.
+    '''
+    print(f'{bcolors.WARNING}{file.name}{bcolors.ENDC} is {reason}', flush=True)
+
+def print_totals(n_failed: int,
+                 n_completed: int,
+                 n_files: int,
+                 n_running: int = 0) -> None:
+    '''
+    Prints the total number of completed, failed and running files.
+    '''
+    print('\n')
+    print(f'{bcolors.BOLD}TOTAL{bcolors.ENDC}:\t\t{n_files}')
+    print(f'{bcolors.BOLD}COMPLETED{bcolors.ENDC}:\t{n_completed} ({n_completed} of {n_files})')
+    print(f'{bcolors.BOLD}FAILED{bcolors.ENDC}:\t\t{n_failed} ({n_failed} of {n_files})')
+    if n_running != 0:
+        print(f'{bcolors.BOLD}RUNNING{bcolors.ENDC}:\t{n_running} ({n_running} of {n_files})')
+    print('\n')
+
+def print_peak_memory(pool: bool = False) -> None:
+    '''
+    Prints the peak memory of this process and, if a pool of workers was
+    used, of the largest worker. Without a pool, the only children are
+    short-lived helper subprocesses, which are not reported.
+    '''
+    peak = get_peak_memory()
+    if peak is None:
+        return
+    line = f'Peak memory (MB): {peak[0] / 1024 / 1024:.0f}'
+    if pool and peak[1] != 0:
+        line += f' (largest worker: {peak[1] / 1024 / 1024:.0f})'
+    print(line)
+
+def print_profile(stages: dict,
+                  slowest: list[tuple[float, str, Assessment]]) -> None:
+    '''
+    Prints the stages of the assessment ranked by the time spent in them
+    and the slowest files.
+
+    Parameters
+    ----------
+    stages: dict
+        Total seconds, bytes and number of files of every stage
+
+    slowest: list[tuple[float, str, Assessment]]
+        Seconds, path and assessment of the slowest files
+    '''
+    total = sum(x[0] for x in stages.values()) or 1
+    print('------------------------------------PROFILE-------------------------------------')
+    print(f'{"STAGE":<24}{"TIME (s)":>10}{"SHARE":>8}{"FILES":>8}{"MB":>10}{"MB/s":>10}')
+    for stage, (seconds, n_bytes, n_files) in sorted(stages.items(), key=lambda x: x[1][0], reverse=True):
+        rate = f'{n_bytes / 1024 / 1024 / seconds:10.1f}' if n_bytes and seconds else f'{"":>10}'
+        print(f'{stage:<24}{seconds:>10.3f}{seconds / total:>8.1%}{n_files:>8}{n_bytes / 1024 / 1024:>10.1f}{rate}')
+
+    # Cached assessments are not timed
+    if slowest:
+        print(f'\n{bcolors.BOLD}SLOWEST FILES{bcolors.ENDC}')
+        print(f'{"TIME (s)":>10}{"MB":>10}  {"SLOWEST STAGE":<24}FILE')
+        for seconds, file, assessment in sorted(slowest, reverse=True):
+            stage = max(assessment.stages.items(), key=lambda x: x[1][0])[0] if assessment.stages else ''
+            print(f'{seconds:>10.3f}{assessment.size / 1024 / 1024:>10.1f}  {stage:<24}{file}')
+    print('\n')
+
+def dump_profile(files: list[Path],
+                 dump_file: Path,
+                 evaluate: Callable | None = None,
+                 **kwargs) -> None:
+    '''
+    Reassesses files with cProfile, writes the combined statistics to
+    dump_file and prints the functions with the highest own time.
+
+    Parameters
+    ----------
+    files: list[Path]
+        Files to profile
+
+    dump_file: Path
+        Output file in pstats format (e.g., for python -m pstats or snakeviz)
+
+    evaluate: Callable | None
+        Evaluation function of the program (default=evaluate_g16_logfile)
+
+    **kwargs
+        Passed on to evaluate
+    '''
+    profiler = cProfile.Profile()
+    for file in files:
+        profiler.runcall(evaluate or evaluate_g16_logfile, file, **kwargs)
+    profiler.dump_stats(dump_file)
+
+    print(f'cProfile statistics of the {len(files)} slowest files written to {dump_file}')
+    pstats.Stats(profiler, stream=sys.stdout).sort_stats('tottime').print_stats(15)
+
+def run_assessment(args: argparse.Namespace,
+                   options: dict,
+                   program: str = 'g16',
+                   **kwargs) -> None:
+    '''
+    Runs a command line assessment: loads the site-specific detectors and
+    sends the records of a machine-readable --format to stdout while all
+    other output goes to stderr.
+
+    Parameters
+    ----------
+    args: argparse.Namespace
+        Command line arguments of the assessor of the program
+
+    options: dict
+        Evaluation options of the program (see assess_and_move)
+
+    program: str
+        Program that wrote the files ('g16' or 'orca')
+
+    **kwargs
+        Passed on to assess_and_move
+    '''
+    # Site-specific detectors are used by every scanner, also in the workers
+    detector_file = Path(args.detectors) if args.detectors else get_default_detector_file()
+    if args.detectors or detector_file.exists():
+        set_site_detectors(load_detectors(detector_file))
+
+    if args.format == 'text':
+        return assess_and_move(args, options, program=program, **kwargs)
+
+    writer = RecordWriter(sys.stdout, args.format)
+    with contextlib.redirect_stdout(sys.stderr):
+        return assess_and_move(args, options, program=program, writer=writer, **kwargs)
+
+def assess_and_move(args: argparse.Namespace,
+                    options: dict,
+                    program: str = 'g16',
+                    writer: RecordWriter | None = None,
+                    suffix: str = '.log',
+                    evaluate: Callable | None = None,
+                    evaluate_incremental: Callable | None = None,
+                    is_final: Callable[[Path, tuple[bool, list]], bool] | None = None,
+                    get_companions: Callable[[Path], list[Path]] | None = None) -> None:
+    '''
+    Assesses the files selected on the command line and moves them. This
+    is the driver behind the G16 and ORCA assessors, which only differ in
+    their evaluation functions, options and companion files.
+
+    Parameters
+    ----------
+    args: argparse.Namespace
+        Command line arguments
+
+    options: dict
+        Evaluation options (e.g., window and tolerance) passed on to the
+        evaluation functions. They are also the parameters of the cache
+        and of the partial results of --shard.
+
+    program: str
+        Program that wrote the files. Selects its site-specific detectors.
+
+    writer: RecordWriter | None
+        Receives the record of every file as soon as it is assessed
+
+    suffix: str
+        Suffix of the log files
+
+    evaluate, evaluate_incremental: Callable | None
+        Evaluation functions of the program (see evaluate_task)
+
+    is_final: Callable[[Path, tuple[bool, list]], bool] | None
+        Whether a verdict can no longer change in watch mode
+        (default=is_verdict_final)
+
+    get_companions: Callable[[Path], list[Path]] | None
+        Gets the existing companion files of a log file
+        (default=get_companion_files)
+    '''
+    # Note the time
+    t1 = time.time()
+
+    # Input parsing
+    if args.input is None:
+        parent_dir = Path().cwd()
+    else:
+        parent_dir = Path(args.input)
+
+    # Finish or revert the file moves of an earlier run
+    journal_file = Path(args.journal) if args.journal else get_journal_file(parent_dir)
+    if args.resume or args.undo:
+        if not journal_file.exists():
+            raise FileNotFoundError(f'No move journal found at {journal_file.absolute()}')
+        if args.resume:
+            print(f'Finished {resume_moves(journal_file, max_workers=args.move_threads)} moves from {journal_file}.')
+        else:
+            print(f'Moved {undo_moves(journal_file, max_workers=args.move_threads)} files back using {journal_file}.')
+        return
+
+    if not args.dry and args.shard is None and not is_journal_finished(journal_file):
+        raise RuntimeError(f'The moves in {journal_file} were interrupted. Finish them with --resume or revert them with --undo.')
+
+    if not args.parallel:
+        set_single_proc_affinity()
+        if args.ionice:
+            lower_io_priority()
+
+    if args.watch is not None:
+        directories = [Path(x) for x in args.watch] or [parent_dir]
+        for directory in directories:
+            if not directory.is_dir():
+                raise NotADirectoryError(f'{directory.absolute()} is not a directory.')
+
+        watch_directories(directories,
+                          settle=args.settle,
+                          poll_interval=args.poll_interval,
+                          results_file=Path(args.results_file) if args.results_file else None,
+                          delete_chk=bool(args.deletechk),
+                          dry=bool(args.dry),
+                          journal_file=journal_file,
+                          max_workers=args.move_threads,
+                          suffix=suffix,
+                          evaluate_incremental=evaluate_incremental,
+                          is_final=is_final,
+                          get_companions=get_companions,
+                          **options)
+        return
+
+    # Get the logfiles. Files found while walking a tree are handed to
+    # the workers right away instead of waiting for the walk to finish.
+    if args.recursive:
+        files = iter_logfiles(parent_dir, include=args.include, exclude=args.exclude, suffix=suffix)
+        if args.shard is not None:
+            files = (file for file in files if is_in_shard(file, parent_dir, args.shard))
+        print(f'Analyzing files below {parent_dir}...')
+    else:
+        files = get_logfiles(parent_dir, include=args.include, exclude=args.exclude, suffix=suffix)
+        if args.shard is not None:
+            files = [file for file in files if is_in_shard(file, parent_dir, args.shard)]
+            print(f'Shard {args.shard[0]} of {args.shard[1]}.')
+
+        # Index the directory once for the companion file lookups. A
+        # shard may be left without files.
+        get_directory_index(files[0].parent if files else parent_dir, refresh=True)
+        print(f'Analyzing {len(files)} files...')
+
+        if len(files) >= 200:
+            print('This may take a minute.')
+
+        # Start the largest files first so that they do not
+        # run alone at the end of a parallel run
+        if args.parallel:
+            files.sort(key=lambda x: x.stat().st_size, reverse=True)
+
+    # Hold back the files of running jobs before anything reads them
+    running_classifier = None
+    if args.skip_running or args.running_jobs:
+        running_classifier = RunningClassifier(job_ids=read_job_list(Path(args.running_jobs)) if args.running_jobs else None,
+                                               max_age=args.running_age,
+                                               directories=[parent_dir if parent_dir.is_dir() else parent_dir.parent])
+        files = running_classifier.filter(files)
+        if not args.recursive:
+            files = list(files)
+
+    # Sort into failed dicts with files as keys and reasons as values.
+    # Completed is just a list of Paths. Both are only needed to move
+    # the files or print them at the end, otherwise only counts are kept.
+    failed = {}
+    completed = []
+    n_failed = 0
+    n_completed = 0
+    keep_files = not args.dry or args.shard is not None or args.line_by_line
+
+    # Reuse the results of files that did not change since the last run.
+    # G16 results were cached before the program was recorded.
+    params = dict(options)
+    if program != 'g16':
+        params['program'] = program
+    if len(get_site_detectors(program)) != 0:
+        params['detectors'] = [x.to_dict() for x in get_site_detectors(program)]
+    cache = None
+    if args.cache and not args.line_by_line:
+        if args.cache_file:
+            cache_file = Path(args.cache_file)
+        else:
+            cache_file = get_default_cache_file()
+
+            # Shards of an array job run concurrently. Give each its own
+            # SQLite file instead of sharing one on a network file system.
+            if args.shard is not None:
+                cache_file = cache_file.with_name(f'{cache_file.stem}_shard_{args.shard[0]}_of_{args.shard[1]}{cache_file.suffix}')
+
+        cache = AssessmentCache(cache_file, params=params)
+
+    # Failed files are printed as soon as their result comes in, except
+    # when the line-by-line analysis is printed during the assessment
+    if not args.line_by_line:
+        print('------------------------------------OVERVIEW------------------------------------')
+
+    n_cached = 0
+
+    # Stages of the assessed files, stages of the run (cache, move)
+    # and the slowest files for --profile
+    file_stages = {}
+    run_stats = {'stages': {}} if args.profile else None
+    slowest = []
+
+    if args.debug:
+        files = (print(f'[DEBUG] Working on {file.name}') or file for file in files)
+
+    assessments = iter_evaluations(files,
+                                   {'evaluate': evaluate,
+                                    'evaluate_incremental': evaluate_incremental,
+                                    **options,
+                                    'profile': args.profile,
+                                    'line_by_line': args.line_by_line},
+                                   workers=args.jobs if args.parallel else 1,
+                                   cache=cache,
+                                   rebuild_cache=args.rebuild_cache,
+                                   ionice=args.ionice,
+                                   run_stats=run_stats,
+                                   suffix=suffix,
+                                   include=args.include,
+                                   exclude=args.exclude,
+                                   max_memory=args.max_memory)
+
+    # Record the results in the order in which they finish
+    for assessment in assessments:
+        file = assessment.path
+        n_cached += assessment.cached
+
+        if assessment.stages is not None:
+            for stage, (seconds, n_bytes) in assessment.stages.items():
+                entry = file_stages.setdefault(stage, [0.0, 0, 0])
+                entry[0] += seconds
+                entry[1] += n_bytes
+                entry[2] += 1
+            heapq.heappush(slowest, (assessment.seconds, str(file), assessment))
+            if len(slowest) > args.profile_top:
+                heapq.heappop(slowest)
+
+        if assessment.completed:
+            n_completed += 1
+            if keep_files:
+                completed.append(file)
+        else:
+            n_failed += 1
+            reason = '\t'.join(assessment.reasons)
+            if keep_files:
+                failed[file] = reason
+            if not args.line_by_line:
+                print_failure(file, reason)
+
+        if writer is not None:
+            writer.write(assessment)
+
+    # Running files are neither cached nor moved
+    n_running = 0
+    if running_classifier is not None:
+        n_running = len(running_classifier.running)
+        for assessment in running_classifier.running:
+            print_running(assessment.path, assessment.reasons[0])
+            if writer is not None:
+                writer.write(assessment)
+
+    files = completed + list(failed)
+    if n_completed + n_failed + n_running == 0 and args.shard is None:
+        raise FileNotFoundError(f'No log files found below {parent_dir.absolute()}')
+
+    if args.line_by_line:
+        print_summary(failed,
+                      completed=completed,
+                      files=files)
+        if n_running != 0:
+            print(f'{bcolors.BOLD}RUNNING{bcolors.ENDC}:\t{n_running}\n')
+    else:
+        print_totals(n_failed,
+                     n_completed=n_completed,
+                     n_files=n_completed + n_failed + n_running,
+                     n_running=n_running)
+
+    if n_cached != 0:
+        print(f'Reused {n_cached} cached assessments.')
+
+    # Profile before the files are moved
+    if args.profile_dump and slowest:
+        dump_profile([Path(x[1]) for x in sorted(slowest, reverse=True)],
+                     Path(args.profile_dump),
+                     evaluate=evaluate,
+                     **options)
+
+    # Files of a shard are moved by the merge subcommand. A dry run only
+    # writes the partial results to a file given explicitly.
+    if args.shard is not None:
+        if args.dry and not args.partial_file:
+            print('Partial results not written (--dry). Give --partial-file to write them.')
+        else:
+            partial_file = Path(args.partial_file) if args.partial_file else get_partial_file(parent_dir, args.shard)
+            write_partial_results(partial_file,
+                                  parent_dir=parent_dir,
+                                  shard=args.shard,
+                                  recursive=args.recursive,
+                                  params=params,
+                                  failed=failed,
+                                  completed=completed)
+            print(f'Partial results written to {partial_file}')
+
+    # Print out the overall analysis
+    elif not args.dry:
+        n_bytes = sum(file.stat().st_size for file in files) if args.profile else 0
+        t2 = time.perf_counter()
+        print_analysis_and_move_files(failed,
+                                      completed=completed,
+                                      files=files,
+                                      delete_chk=bool(args.deletechk),
+                                      dry=bool(args.dry),
+                                      journal_file=journal_file,
+                                      max_workers=args.move_threads,
+                                      get_companions=get_companions)
+        add_stage_time(run_stats, 'move', time.perf_counter() - t2, n_bytes)
+
+    # Forget files that were moved or deleted
+    if cache is not None:
+        cache.prune(parent_dir if parent_dir.is_dir() else parent_dir.parent)
+        cache.close()
+
+    if args.profile:
+        # The stages of the run are not counted per file
+        print_profile({**file_stages, **{stage: [*entry, 0] for stage, entry in run_stats['stages'].items()}},
+                      slowest=slowest)
+
+    print_peak_memory(pool=args.parallel)
+    print(f'Total analysis time (s): {round(time.time() - t1,2)}')
+
+def merge_and_move(args: argparse.Namespace,
+                   get_companions: Callable[[Path], list[Path]] | None = None) -> None:
+    '''
+    Combines the partial result files of a sharded run (see
+    merge_partial_results), prints the summary and moves the files.
+
+    Parameters
+    ----------
+    args: argparse.Namespace
+        Command line arguments of the merge subcommand
+
+    get_companions: Callable[[Path], list[Path]] | None
+        Gets the existing companion files of a log file
+        (default=get_companion_files)
+    '''
+    t1 = time.time()
+
+    print(f'Merging {len(args.partial_files)} partial result files...')
+    parent_dir, failed, completed, files = merge_partial_results(args.partial_files)
+
+    print_summary(failed,
+                  completed=completed,
+                  files=files)
+
+    if not args.dry:
+        for directory in set(file.parent for file in files):
+            get_directory_index(directory, refresh=True)
+
+        print_analysis_and_move_files(failed,
+                                      completed=completed,
+                                      files=files,
+                                      delete_chk=bool(args.deletechk),
+                                      dry=bool(args.dry),
+                                      journal_file=Path(args.journal) if args.journal else get_journal_file(parent_dir),
+                                      get_companions=get_companions)
+
+    print(f'Total analysis time (s): {round(time.time() - t1,2)}')
@@ -0,0 +1,48 @@
+'''
+Shared fixtures of the tests. The scripts are not installed, so the
+repository directory is put on sys.path.
+'''
+
+import sys
+import shutil
+
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_DIR))
+
+import logfileAssessor as engine  # noqa: E402
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path_factory, monkeypatch):
+    '''
+    Keeps the default cache and detector files out of the home directory.
+    '''
+    home = tmp_path_factory.mktemp('home')
+    monkeypatch.setenv('XDG_CACHE_HOME', str(home / 'cache'))
+    monkeypatch.setenv('XDG_CONFIG_HOME', str(home / 'config'))
+
+@pytest.fixture(autouse=True)
+def no_site_detectors():
+    '''
+    Removes site-specific detectors set by a test.
+    '''
+    yield
+    engine.set_site_detectors({})
+
+@pytest.fixture
+def data_dir() -> Path:
+    return REPO_DIR / 'data'
+
+@pytest.fixture
+def orca_data_dir() -> Path:
+    return REPO_DIR / 'orca_data'
+
+@pytest.fixture
+def data_copy(tmp_path, data_dir) -> Path:
+    '''
+    Copy of data/ that tests may move files in.
+    '''
+    return Path(shutil.copytree(data_dir, tmp_path / 'data'))
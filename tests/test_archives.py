@@ -0,0 +1,73 @@
+'''
+Tests of the assessment of compressed log files and of the members of
+tar archives.
+'''
+
+import bz2
+import gzip
+import lzma
+import tarfile
+
+from pathlib import Path
+
+import pytest
+
+import logfileAssessor as engine
+
+NAMES = ['illegal_multiplicity.log', 'james.log', 'oscillating_2_but_incomplete_term.log']
+
+def get_results(paths, **kwargs):
+    return {x.path: x.result for x in engine.iter_assess(paths, window=10, tolerance=1e-5, **kwargs)}
+
+@pytest.mark.parametrize('suffix, compress', [('.gz', gzip.compress), ('.bz2', bz2.compress), ('.xz', lzma.compress)])
+def test_compressed_logfiles(data_dir, tmp_path, suffix, compress):
+    for name in NAMES:
+        (tmp_path / f'{name}{suffix}').write_bytes(compress((data_dir / name).read_bytes()))
+        assert engine.evaluate_g16_logfile(tmp_path / f'{name}{suffix}', window=10, tolerance=1e-5) == \
+            engine.evaluate_g16_logfile(data_dir / name, window=10, tolerance=1e-5)
+        assert engine.evaluate_g16_logfile(tmp_path / f'{name}{suffix}', window=10, tolerance=1e-5, tail_first=True) == \
+            engine.evaluate_g16_logfile(data_dir / name, window=10, tolerance=1e-5)
+
+def test_compressed_logfile_names():
+    assert engine.get_log_stem(Path('a.b.log.gz')) == 'a.b'
+    assert engine.get_uncompressed_name('runs.tar.gz') == 'runs.tar.gz'
+    assert engine.is_logfile_name('a.log.xz') and engine.is_logfile_name('runs.tgz')
+    assert not engine.is_logfile_name('a.com.gz')
+
+@pytest.mark.parametrize('name, mode', [('runs.tar', 'w'), ('runs.tar.gz', 'w:gz'), ('runs.tar.xz', 'w:xz')])
+@pytest.mark.parametrize('workers', [1, 2])
+def test_archive_members(data_dir, tmp_path, name, mode, workers):
+    archive = tmp_path / name
+    with tarfile.open(archive, mode) as tar:
+        for member in NAMES:
+            tar.add(data_dir / member, arcname=f'./sub/{member}')
+        tar.add(data_dir / 'james.com', arcname='sub/james.com')
+
+    expected = get_results([data_dir / x for x in NAMES])
+    results = get_results([archive], workers=workers)
+    assert results == {archive / 'sub' / x: expected[data_dir / x] for x in NAMES}
+
+    assert get_results([archive], include=['james*']) == {archive / 'sub' / 'james.log': (True, [])}
+    assert list(get_results([archive], exclude=['sub/*'])) == []
+
+def test_split_archive_member(tmp_path):
+    archive = tmp_path / 'runs.tar.gz'
+    with tarfile.open(archive, 'w:gz'):
+        pass
+    assert engine.split_archive_member(archive / 'sub' / 'a.log') == (archive, 'sub/a.log')
+    assert engine.split_archive_member(tmp_path / 'a.log') is None
+
+    # Members are never moved
+    assert engine.get_companion_files(archive / 'a.log') == []
+    assert engine.get_move_plan({archive / 'a.log': 'reason'}, []) == []
+
+def test_compressed_logfile_companions(data_copy):
+    file = data_copy / 'sulfide0792_lec_new.log.gz'
+    file.write_bytes(gzip.compress((data_copy / 'sulfide0792_lec_new.log').read_bytes()))
+    (data_copy / 'sulfide0792_lec_new.log').unlink()
+    assert engine.get_companion_files(file) == [data_copy / 'sulfide0792_lec_new.com', data_copy / 'sulfide0792_lec_new.chk']
+
+    plan = engine.get_move_plan({file: 'reason'}, [], delete_chk=True)
+    engine.apply_move_plan(plan, engine.get_journal_file(data_copy))
+    assert sorted(x.name for x in (data_copy / 'failed').iterdir()) == ['sulfide0792_lec_new.com', 'sulfide0792_lec_new.log.gz']
+    assert not (data_copy / 'sulfide0792_lec_new.chk').exists()
@@ -0,0 +1,75 @@
+'''
+Tests of the assessment cache.
+'''
+
+import os
+import shutil
+
+from pathlib import Path
+
+import logfileAssessor as engine
+
+def test_cache_roundtrip(data_copy, tmp_path):
+    file = data_copy / 'james.log'
+    cache = engine.AssessmentCache(tmp_path / 'cache.sqlite', params={'window': 10})
+    assert cache.get(file) is None
+
+    cache.put(file, (False, ['reason']))
+    assert cache.get(file) == (False, ['reason'])
+
+    # Other analysis parameters do not see the result
+    other = engine.AssessmentCache(tmp_path / 'cache.sqlite', params={'window': 5})
+    assert other.get(file) is None
+    other.close()
+
+    # Neither does a changed file
+    with open(file, 'a', encoding='utf-8') as outfile:
+        outfile.write(' Entering Link 1\n')
+    assert cache.get(file) is None
+    cache.close()
+
+def test_iter_assess_reuses_cached_results(data_dir, tmp_path):
+    files = sorted(data_dir.glob('*.log'))
+    cache = engine.AssessmentCache(tmp_path / 'cache.sqlite', params={})
+    first = {x.path: x.result for x in engine.iter_assess(files, cache=cache)}
+    assert all(not x.cached for x in engine.iter_assess(files, cache=cache, rebuild_cache=True))
+
+    second = list(engine.iter_assess(files, cache=cache))
+    assert all(x.cached for x in second)
+    assert {x.path: x.result for x in second} == first
+    cache.close()
+
+def test_results_are_committed_while_running(data_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, 'CACHE_COMMIT_WRITES', 2)
+    cache_file = tmp_path / 'cache.sqlite'
+    cache = engine.AssessmentCache(cache_file, params={})
+    files = sorted(data_dir.glob('*.log'))
+    for file in files[:3]:
+        cache.put(file, (True, []))
+
+    # Another run sees the committed results and is not locked out
+    other = engine.AssessmentCache(cache_file, params={})
+    assert [other.get(file) for file in files[:3]] == [(True, []), (True, []), None]
+    other.put(files[3], (False, ['reason']))
+    other.close()
+
+    cache.close()
+    cache = engine.AssessmentCache(cache_file, params={})
+    assert [cache.get(file) for file in files[:4]] == [(True, []), (True, []), (True, []), (False, ['reason'])]
+    cache.close()
+
+def test_prune_keeps_sibling_directories(data_dir, tmp_path):
+    files = []
+    for name in ('b', 'bc'):
+        (tmp_path / name).mkdir()
+        files.append(shutil.copy(data_dir / 'james.log', tmp_path / name / 'james.log'))
+
+    cache = engine.AssessmentCache(tmp_path / 'cache.sqlite', params={})
+    for file in files:
+        cache.put(Path(file), (True, []))
+        os.remove(file)
+
+    assert cache.prune(tmp_path / 'b') == 1
+    paths = [x for (x,) in cache.connection.execute('SELECT path FROM assessments')]
+    assert paths == [str(tmp_path / 'bc' / 'james.log')]
+    cache.close()
@@ -0,0 +1,56 @@
+'''
+Tests of the parsing of the frequency sections and of the imaginary
+frequency check.
+'''
+
+import pytest
+
+import logfileAssessor as engine
+
+FIRST_FREQUENCIES = ' Frequencies --     32.4969                99.4399               198.7373\n'
+
+@pytest.mark.parametrize('name, n_frequencies', [('90000042_noNi_00000.log', 111),
+                                                 ('MAHT26_clust-3.log', 75),
+                                                 ('james.log', 54),
+                                                 ('oscillating_but_converges.log', 210)])
+def test_read_frequencies(data_dir, name, n_frequencies):
+    file = data_dir / name
+    sections = engine.read_frequencies(file)
+    assert [len(x) for x in sections] == [n_frequencies]
+
+    # Same values as the original pattern
+    expected = [float(x) for match in engine.FREQ_START_PATTERN.findall(file.read_text()) for x in match.split()]
+    assert list(sections[0]) == expected
+
+    text = file.read_text()
+    assert engine.get_frequencies(text) == engine.get_frequencies(text.encode()) == sections
+
+def test_no_frequencies(data_dir):
+    assert engine.read_frequencies(data_dir / 'illegal_multiplicity.log') == []
+    assert engine.get_imaginary_frequency_reason([]) is None
+
+def test_block_without_red_masses_is_ignored():
+    text = ' Harmonic frequencies\n Frequencies --    -12.0   5.0   6.0\n'
+    assert engine.get_frequencies(text) == []
+    assert list(engine.get_frequencies(text + ' Red. masses --  1.0   1.0   1.0\n')[0]) == [-12.0, 5.0, 6.0]
+
+def write_imaginary(data_dir, file, frequencies):
+    text = (data_dir / 'james.log').read_text()
+    assert text.count(FIRST_FREQUENCIES) == 1
+    file.write_text(text.replace(FIRST_FREQUENCIES, f' Frequencies --{frequencies}\n'))
+
+def test_imaginary_frequency(data_dir, tmp_path):
+    file = tmp_path / 'james.log'
+    write_imaginary(data_dir, file, '    -32.4969                99.4399               198.7373')
+    assert engine.get_imaginary_frequency_reason(engine.read_frequencies(file)) == 'imaginary freq -32.4969'
+    assert engine.evaluate_g16_logfile(file, window=10, tolerance=1e-5) == (False, ['imaginary freq -32.4969'])
+    assert engine.evaluate_g16_logfile(file, window=10, tolerance=1e-5, check_frequency=False) == (True, [])
+
+def test_imaginary_threshold(data_dir, tmp_path):
+    file = tmp_path / 'james.log'
+    write_imaginary(data_dir, file, '    -32.4969               -12.3456               198.7373')
+    sections = engine.read_frequencies(file)
+    assert engine.get_imaginary_frequency_reason(sections) == 'imaginary freq -32.4969 (2 imaginary modes)'
+    assert engine.get_imaginary_frequency_reason(sections, threshold=20) == 'imaginary freq -32.4969'
+    assert engine.get_imaginary_frequency_reason(sections, threshold=50) is None
+    assert engine.evaluate_g16_logfile(file, window=10, tolerance=1e-5, imaginary_threshold=50) == (True, [])
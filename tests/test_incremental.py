@@ -0,0 +1,55 @@
+'''
+Tests of the checkpoints that let logs of running jobs be scanned
+from where the previous run stopped.
+'''
+
+import pytest
+
+import logfileAssessor as engine
+import checkORCALogFiles as orca
+
+def write_in_two_parts(source, file):
+    '''
+    Writes the first part of source to file, ending in the middle of a
+    line, and returns the rest.
+    '''
+    raw = source.read_bytes()
+    cut = raw.index(b'\n', len(raw) // 2) - 5
+    file.write_bytes(raw[:cut])
+    return raw[cut:]
+
+@pytest.mark.parametrize('name', ['errorneous_write.log', 'james.log', 'oscillating_2_but_incomplete_term.log'])
+def test_resumed_scan_agrees_with_full_scan(data_dir, tmp_path, name):
+    file = tmp_path / name
+    rest = write_in_two_parts(data_dir / name, file)
+    _, checkpoint = engine.resume_scan(file)
+    assert checkpoint is not None
+
+    with open(file, 'ab') as outfile:
+        outfile.write(rest)
+    scan, _ = engine.resume_scan(file, checkpoint)
+    assert scan.get_state() == engine.scan_logfile(file).get_state()
+
+    result, _ = engine.evaluate_g16_logfile_incremental(file, checkpoint, window=10, tolerance=1e-5)
+    assert result == engine.evaluate_g16_logfile(file, window=10, tolerance=1e-5)
+
+def test_checkpoint_of_rewritten_file_is_ignored(data_dir, tmp_path):
+    file = tmp_path / 'james.log'
+    rest = write_in_two_parts(data_dir / 'illegal_multiplicity.log', file)
+    _, checkpoint = engine.resume_scan(file)
+
+    # Same size, other contents: the checkpoint no longer applies
+    raw = (data_dir / 'james.log').read_bytes()
+    file.write_bytes(raw[:file.stat().st_size] + rest)
+    scan, _ = engine.resume_scan(file, checkpoint)
+    assert scan.get_state() == engine.scan_logfile(file).get_state()
+
+def test_orca_resumed_scan_agrees_with_full_scan(orca_data_dir, tmp_path):
+    file = tmp_path / 'geometry_not_converged.out'
+    rest = write_in_two_parts(orca_data_dir / file.name, file)
+    _, checkpoint = orca.evaluate_orca_out_file_incremental(file, None, window=10, tolerance=1e-5)
+
+    with open(file, 'ab') as outfile:
+        outfile.write(rest)
+    result, _ = orca.evaluate_orca_out_file_incremental(file, checkpoint, window=10, tolerance=1e-5)
+    assert result == orca.evaluate_orca_out_file(file, window=10, tolerance=1e-5) == (False, ['incomplete geometry optimization'])
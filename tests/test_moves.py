@@ -0,0 +1,142 @@
+'''
+Tests of the journaled moves into the completed and failed directories.
+'''
+
+import json
+import shutil
+import itertools
+
+from pathlib import Path
+
+import pytest
+
+import logfileAssessor as engine
+import checkORCALogFiles as orca
+
+def get_names(directory):
+    return sorted(x.name for x in directory.iterdir())
+
+def test_move_plan_and_undo(data_copy):
+    before = get_names(data_copy)
+    failed = {data_copy / 'sulfide0792_lec_new.log': 'Atomic number out of range for 6-31G basis set.'}
+    completed = [data_copy / 'james.log']
+    plan = engine.get_move_plan(failed, completed)
+    assert [(x['verdict'], x['src']) for x in plan] == [('completed', str(data_copy / 'james.log')),
+                                                        ('completed', str(data_copy / 'james.com')),
+                                                        ('failed', str(data_copy / 'sulfide0792_lec_new.log')),
+                                                        ('failed', str(data_copy / 'sulfide0792_lec_new.com')),
+                                                        ('failed', str(data_copy / 'sulfide0792_lec_new.chk'))]
+
+    journal_file = engine.get_journal_file(data_copy)
+    engine.apply_move_plan(plan, journal_file)
+    assert engine.is_journal_finished(journal_file)
+    assert get_names(data_copy / 'completed') == ['james.com', 'james.log']
+    assert get_names(data_copy / 'failed') == ['sulfide0792_lec_new.chk', 'sulfide0792_lec_new.com', 'sulfide0792_lec_new.log']
+
+    assert engine.undo_moves(journal_file) == 5
+    assert not journal_file.exists()
+    assert get_names(data_copy) == before
+
+def test_delete_chk(data_copy):
+    failed = {data_copy / 'sulfide0792_lec_new.log': 'Atomic number out of range for 6-31G basis set.'}
+    plan = engine.get_move_plan(failed, [], delete_chk=True)
+    assert [(x['op'], x['src']) for x in plan] == [('move', str(data_copy / 'sulfide0792_lec_new.log')),
+                                                   ('move', str(data_copy / 'sulfide0792_lec_new.com')),
+                                                   ('delete', str(data_copy / 'sulfide0792_lec_new.chk'))]
+
+    journal_file = engine.get_journal_file(data_copy)
+    engine.apply_move_plan(plan, journal_file)
+    assert not (data_copy / 'sulfide0792_lec_new.chk').exists()
+    assert get_names(data_copy / 'failed') == ['sulfide0792_lec_new.com', 'sulfide0792_lec_new.log']
+
+def test_resume_interrupted_moves(data_copy):
+    before = get_names(data_copy)
+    failed = {data_copy / 'aldehyde16_clust-35.log': 'job on line 6 failed.'}
+    plan = engine.get_move_plan(failed, [data_copy / 'james.log'])
+
+    # A run that was killed after writing the plan and moving one file
+    journal_file = engine.get_journal_file(data_copy)
+    with open(journal_file, 'w', encoding='utf-8') as journal:
+        for entry in plan:
+            journal.write(json.dumps(entry) + '\n')
+        journal.write('{"done": 0}\n{"do')
+    (data_copy / 'completed').mkdir()
+    shutil.move(data_copy / 'james.log', data_copy / 'completed' / 'james.log')
+    assert not engine.is_journal_finished(journal_file)
+
+    with pytest.raises(RuntimeError):
+        engine.apply_move_plan([], journal_file)
+
+    assert engine.resume_moves(journal_file) == len(plan) - 1
+    assert engine.is_journal_finished(journal_file)
+    assert get_names(data_copy / 'failed') == ['aldehyde16_clust-35.chk', 'aldehyde16_clust-35.com', 'aldehyde16_clust-35.log']
+
+    # The directory made by hand is not recorded in the journal, so undo keeps it
+    engine.undo_moves(journal_file)
+    assert get_names(data_copy) == sorted(before + ['completed'])
+    assert get_names(data_copy / 'completed') == []
+
+def test_directory_index_sees_new_files(data_copy):
+    assert not engine.get_directory_index(data_copy).has('MAHT26_clust-3.com')
+    (data_copy / 'MAHT26_clust-3.com').touch()
+    assert engine.get_directory_index(data_copy).has('MAHT26_clust-3.com')
+    assert engine.get_companion_files(data_copy / 'MAHT26_clust-3.log') == [data_copy / 'MAHT26_clust-3.com']
+
+def test_orca_companion_files(orca_data_dir, tmp_path):
+    file = Path(shutil.copy(orca_data_dir / 'geometry_not_converged.out', tmp_path))
+    for name in ('geometry_not_converged.inp', 'geometry_not_converged.gbw', 'geometry_not_converged.inp.xyz', 'other.gbw'):
+        (tmp_path / name).touch()
+
+    companions = orca.get_orca_companion_files(file)
+    assert sorted(x.name for x in companions) == ['geometry_not_converged.gbw', 'geometry_not_converged.inp', 'geometry_not_converged.inp.xyz']
+
+    plan = engine.get_move_plan({file: 'incomplete geometry optimization'}, [], get_companions=orca.get_orca_companion_files)
+    engine.apply_move_plan(plan, engine.get_journal_file(tmp_path))
+    assert get_names(tmp_path / 'failed') == ['geometry_not_converged.gbw', 'geometry_not_converged.inp',
+                                              'geometry_not_converged.inp.xyz', 'geometry_not_converged.out']
+
+def run_watch(monkeypatch, directory, passes, **kwargs):
+    '''
+    Runs watch_directories with one pass per function in passes, each
+    called before the pass looks for changes.
+    '''
+    passes = iter(passes)
+
+    class Watcher(engine.PollingWatcher):
+        def get_changes(self, timeout):
+            action = next(passes)
+            if action is not None:
+                action()
+            return super().get_changes(0)
+
+    def stop():
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(engine, 'InotifyWatcher', Watcher)
+    passes = itertools.chain(passes, [stop])
+    engine.watch_directories([directory], settle=0, poll_interval=0, **kwargs)
+
+def test_watch_moves_are_journaled(data_dir, tmp_path, monkeypatch):
+    for name in ('james.log', 'james.com', 'illegal_multiplicity.log'):
+        shutil.copy(data_dir / name, tmp_path)
+
+    run_watch(monkeypatch, tmp_path, [None], window=10, tolerance=1e-5)
+    assert get_names(tmp_path / 'completed') == ['james.com', 'james.log']
+    assert get_names(tmp_path / 'failed') == ['illegal_multiplicity.log']
+
+    journal_file = engine.get_journal_file(tmp_path)
+    assert engine.is_journal_finished(journal_file)
+    assert engine.undo_moves(journal_file) == 3
+    assert get_names(tmp_path) == ['illegal_multiplicity.log', 'james.com', 'james.log']
+
+def test_watch_reassesses_when_slurm_file_appears(data_dir, tmp_path, monkeypatch):
+    text = (data_dir / 'james.log').read_text()
+    (tmp_path / 'james.log').write_text(text[:len(text) // 2])
+
+    def cancel():
+        (tmp_path / 'james.4296022.error').write_text('slurmstepd: error: *** JOB 4296022 CANCELLED AT 2024-01-01T00:00:00 ***\n')
+
+    results_file = tmp_path / 'results.tsv'
+    run_watch(monkeypatch, tmp_path, [None, cancel], results_file=results_file, window=10, tolerance=1e-5)
+    assert [x.split('\t')[2] for x in results_file.read_text().splitlines()] == ['unfinished', 'failed']
+    assert get_names(tmp_path / 'failed') == ['james.log']
@@ -0,0 +1,80 @@
+'''
+Tests of the detection of oscillating optimizations with and without
+NumPy.
+'''
+
+import random
+
+import pytest
+
+import logfileAssessor as engine
+
+def find_oscillation(series, window, tolerance):
+    '''
+    Reference implementation that tests every window on its own.
+    '''
+    def is_steady(start):
+        diffs = [abs(series[i] - series[i - 1]) for i in range(start + 1, start + window)]
+        return all(abs(diffs[i] - diffs[i - 1]) < tolerance for i in range(1, len(diffs)))
+
+    if len(series) < window or not is_steady(len(series) - window):
+        return None
+    onset = len(series) - window
+    while onset > 0 and is_steady(onset - 1):
+        onset -= 1
+    return onset, len(series) - onset
+
+def get_random_series(rng, length):
+    '''
+    Gets a series of random values that ends with an oscillation between
+    two values of random length.
+    '''
+    a, b = rng.random(), rng.random()
+    tail = rng.randrange(length + 1)
+    return [rng.random() for _ in range(length - tail)] + [(a, b)[i % 2] for i in range(tail)]
+
+@pytest.fixture
+def without_numpy(monkeypatch):
+    monkeypatch.setattr(engine, 'np', None)
+
+@pytest.mark.parametrize('window', [2, 3, 5, 10])
+def test_backends_agree_on_random_series(monkeypatch, window):
+    pytest.importorskip('numpy')
+    rng = random.Random(window)
+    for _ in range(50):
+        series = [get_random_series(rng, rng.randrange(30)) for _ in range(4)]
+        expected = [find_oscillation(x, window, 1e-4) for x in series]
+        assert engine.detect_oscillations(series, window=window, tolerance=1e-4) == expected
+        with monkeypatch.context() as patch:
+            patch.setattr(engine, 'np', None)
+            assert engine.detect_oscillations(series, window=window, tolerance=1e-4) == expected
+
+@pytest.mark.parametrize('window', [3, 5, 10])
+def test_pure_python_on_random_series(without_numpy, window):
+    rng = random.Random(window)
+    for _ in range(50):
+        series = [get_random_series(rng, rng.randrange(30)) for _ in range(4)]
+        assert engine.detect_oscillations(series, window=window, tolerance=1e-4) == [find_oscillation(x, window, 1e-4) for x in series]
+
+@pytest.mark.parametrize('backend', ['numpy', 'python'])
+def test_oscillating_log(data_dir, monkeypatch, backend):
+    if backend == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(engine, 'np', None)
+
+    scan = engine.scan_logfile(data_dir / 'oscillating_2_but_incomplete_term.log')
+    series = (scan.max_force, scan.rms_force, scan.max_displacement, scan.rms_displacement)
+    assert engine.check_oscillating_series(*series, window=10, tolerance=1e-5) == \
+        (True, 'MAX FORCE is oscillating between {3e-06, 0.000179} since step 44 (38 steps)')
+
+    # Oscillates at the end but converged, which only the assessment knows
+    scan = engine.scan_logfile(data_dir / 'oscillating_but_converges.log')
+    series = (scan.max_force, scan.rms_force, scan.max_displacement, scan.rms_displacement)
+    assert engine.check_oscillating_series(*series, window=10, tolerance=1e-5)[1].endswith('since step 28 (10 steps)')
+    assert engine.check_oscillating_series(*series, window=11, tolerance=1e-5) == (False, None)
+
+def test_dropped_steps_are_counted(data_dir):
+    scan = engine.scan_logfile(data_dir / 'oscillating_2_but_incomplete_term.log')
+    series = (scan.max_force[20:], scan.rms_force[20:], scan.max_displacement[20:], scan.rms_displacement[20:])
+    assert engine.check_oscillating_series(*series, window=10, tolerance=1e-5, first_steps=(20, 20, 20, 20))[1].endswith('since step 44 (38 steps)')
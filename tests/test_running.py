@@ -0,0 +1,39 @@
+'''
+Tests of the detection of log files of jobs that are still running.
+'''
+
+import os
+import shutil
+import time
+
+import logfileAssessor as engine
+
+def make_logs(data_dir, directory):
+    for name in ('live.log', 'done.log'):
+        shutil.copy(data_dir / 'aldehyde16_clust-35.log', directory / name)
+    old = time.time() - 3600
+    os.utime(directory / 'done.log', (old, old))
+    (directory / 'slurm-111.out').touch()
+
+def test_unlisted_job_still_gets_the_metadata_checks(data_dir, tmp_path):
+    make_logs(data_dir, tmp_path)
+    classifier = engine.RunningClassifier(job_ids={'222'}, growth_interval=0.01, directories=[tmp_path])
+    assert list(classifier.filter([tmp_path / 'live.log', tmp_path / 'done.log'])) == [tmp_path / 'done.log']
+    assert [(x.path, x.reasons[0].split(' (')[0]) for x in classifier.running] == [(tmp_path / 'live.log', 'running')]
+
+def test_shared_slurm_out_files_are_not_used(data_dir, tmp_path):
+    make_logs(data_dir, tmp_path)
+    assert engine.get_slurm_job_ids(tmp_path / 'done.log') == []
+
+    # A listed job of another log in the directory holds back nothing
+    classifier = engine.RunningClassifier(job_ids={'111'}, growth_interval=0.01, directories=[tmp_path])
+    assert list(classifier.filter([tmp_path / 'done.log'])) == [tmp_path / 'done.log']
+
+def test_listed_job_is_running(data_dir, tmp_path):
+    make_logs(data_dir, tmp_path)
+    (tmp_path / 'done.4296022.out').touch()
+    assert engine.get_slurm_job_ids(tmp_path / 'done.log') == ['4296022']
+
+    classifier = engine.RunningClassifier(job_ids={'4296022'}, growth_interval=0.01, directories=[tmp_path])
+    assert list(classifier.filter([tmp_path / 'done.log'])) == []
+    assert classifier.running[0].reasons == ['running (SLURM job 4296022 is in the job list)']
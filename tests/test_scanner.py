@@ -0,0 +1,112 @@
+'''
+Tests of the single-pass scanners and of the detector registry.
+'''
+
+import json
+
+from pathlib import Path
+
+import pytest
+
+import logfileAssessor as engine
+import checkORCALogFiles as orca
+
+# Verdicts of the original (regex per check) assessment with window=10 and tolerance=1e-5
+EXPECTED = {
+    '90000042_noNi_00000.log': (False, ['Convergence failure -- run terminated.', 'job on line 34550 failed.']),
+    'MAHT26_clust-3.log': (True, []),
+    'MAHT4_clust-19.log': (False, ['job on line 6 failed.']),
+    'MAHT6_clust-14.log': (False, ['job on line 6 failed.']),
+    'aldehyde16_clust-35.log': (False, ['job on line 6 failed.']),
+    'aldehyde22_conf-1.log': (False, ['job on line 2688 failed.']),
+    'errorneous_write.log': (False, ['Erroneous write. Write -1 instead of 800. (line 202)\tFileIO operation on non-existent file. (line 304)\tFileIO operation on non-existent file. (line 363)',
+                                     'job on line 6 failed.',
+                                     'job on line 111 failed.',
+                                     'job on line 209 failed.']),
+    'illegal_multiplicity.log': (False, ['The combination of multiplicity 2 and 96 electrons is impossible', 'job on line 6 failed.']),
+    'james.log': (True, []),
+    'oscillating_2_but_incomplete_term.log': (False, ['MAX FORCE is oscillating between {3e-06, 0.000179} since step 44 (38 steps)', 'job on line 6 failed.']),
+    'oscillating_but_converges.log': (True, []),
+    'sulfide0792_lec_new.log': (False, ['Atomic number out of range for 6-31G basis set.', 'job on line 6 failed.']),
+    'sulfide1333_lec_new.log': (False, ['Atomic number out of range for 6-31G basis set.', 'job on line 6 failed.']),
+}
+
+@pytest.mark.parametrize('name', sorted(EXPECTED))
+def test_evaluate_g16_logfile(data_dir, name):
+    is_complete, reasons = engine.evaluate_g16_logfile(data_dir / name, window=10, tolerance=1e-5)
+    assert (is_complete, reasons) == EXPECTED[name]
+
+@pytest.mark.parametrize('name', sorted(EXPECTED))
+def test_tail_first_agrees_with_full_scan(data_dir, name):
+    assert engine.evaluate_g16_logfile(data_dir / name, window=10, tolerance=1e-5, tail_first=True) == EXPECTED[name]
+
+def test_tail_first_reads_the_last_block_only(data_dir):
+    stats = {}
+    assert engine.evaluate_g16_logfile(data_dir / 'MAHT26_clust-3.log', window=10, tolerance=1e-5, tail_first=True, stats=stats) == (True, [])
+    assert stats['bytes_scanned'] <= engine.TAIL_BLOCK_SIZE
+
+def test_tail_with_cut_frequency_section_is_not_conclusive(data_dir):
+    # The last block of james.log starts in the middle of its frequency section
+    assert engine.assess_g16_logfile_tail(data_dir / 'james.log') is None
+    assert engine.assess_g16_logfile_tail(data_dir / 'james.log', check_frequency=False) == (True, [])
+
+def test_tail_first_misses_errors_before_the_last_block(data_dir, tmp_path):
+    lines = (data_dir / 'MAHT26_clust-3.log').read_text().splitlines(keepends=True)
+    file = tmp_path / 'MAHT26_clust-3.log'
+    file.write_text(''.join(lines[:100] + ['Erroneous write. Write -1 instead of 800.\n'] + lines[100:]))
+    assert engine.evaluate_g16_logfile(file, window=10, tolerance=1e-5) == (False, ['Erroneous write. Write -1 instead of 800. (line 100)'])
+    assert engine.evaluate_g16_logfile(file, window=10, tolerance=1e-5, tail_first=True) == (True, [])
+
+@pytest.mark.parametrize('name', ['errorneous_write.log', 'james.log', 'oscillating_2_but_incomplete_term.log'])
+def test_feed_methods_agree(data_dir, name):
+    raw = (data_dir / name).read_bytes()
+    middle = raw.index(b'\n', len(raw) // 2) + 1
+
+    lines = engine.G16LogScanner().feed(raw.decode('utf-8', errors='replace').splitlines(keepends=True))
+    buffer = engine.G16LogScanner().feed_buffer(raw)
+    halves = engine.G16LogScanner().feed_buffer(raw[:middle]).feed_buffer(raw[middle:])
+    assert lines.get_state() == buffer.get_state() == halves.get_state()
+
+def test_detector_validation():
+    with pytest.raises(ValueError):
+        engine.Detector('named_group', r'(?P<x>error)')
+    with pytest.raises(ValueError):
+        engine.Detector('invalid', r'error (')
+    with pytest.raises(ValueError):
+        engine.Detector('no_literal', r'\d+')
+    with pytest.raises(ValueError):
+        engine.Detector('severity', 'error', severity='fatal')
+
+def test_pattern_literal():
+    assert engine.get_pattern_literal(r'\s+--\s+Number of steps exceeded,\s+NStep= \d+') == 'Number of steps exceeded,'
+
+def test_site_detectors(data_dir, tmp_path):
+    detector_file = tmp_path / 'detectors.json'
+    detector_file.write_text(json.dumps({'detectors': [{'program': 'g16',
+                                                        'name': 'rotational_constants',
+                                                        'pattern': r'Rotational constants \(GHZ\)',
+                                                        'once': True}]}))
+    engine.set_site_detectors(engine.load_detectors(detector_file))
+
+    assessment = engine.assess(data_dir / 'james.log')
+    assert assessment.verdict == 'failed'
+    assert assessment.reason_codes == ['rotational_constants']
+
+    # Non-fatal detectors only annotate files that failed anyway
+    engine.set_site_detectors({'g16': [engine.Detector('rotational_constants', r'Rotational constants \(GHZ\)',
+                                                       severity='warning', fatal=False, once=True)]})
+    assert engine.assess(data_dir / 'james.log').verdict == 'completed'
+    assessment = engine.assess(data_dir / 'illegal_multiplicity.log')
+    assert assessment.reasons[-1] == 'warning: Rotational constants (GHZ)'
+    assert assessment.reason_codes == ['illegal_multiplicity', 'job_failed', 'rotational_constants']
+
+@pytest.mark.parametrize('name', ['geometry_not_converged.out', 'geometry_not_converged_2.out'])
+def test_evaluate_orca_out_file(orca_data_dir, name):
+    assert orca.evaluate_orca_out_file(orca_data_dir / name, window=10, tolerance=1e-5) == (False, ['incomplete geometry optimization'])
+
+def test_orca_steps_exceeded_needs_error_banner(orca_data_dir, tmp_path):
+    lines = (orca_data_dir / 'geometry_not_converged.out').read_text().splitlines(keepends=True)
+    banner = next(i for i, line in enumerate(lines) if 'ERROR !!!' in line)
+    file = Path(tmp_path / 'no_banner.out')
+    file.write_text(''.join(lines[:banner] + lines[banner + 1:]))
+    assert orca.evaluate_orca_out_file(file, window=10, tolerance=1e-5) == (True, [])
@@ -0,0 +1,71 @@
+'''
+Tests of the partition of the input into shards and of the merge of
+their partial results.
+'''
+
+import argparse
+
+import pytest
+
+import logfileAssessor as engine
+
+@pytest.mark.parametrize('shard', ['3/3', '-1/3', '0/0', 'a', '1'])
+def test_parse_invalid_shard(shard):
+    with pytest.raises(argparse.ArgumentTypeError):
+        engine.parse_shard(shard)
+
+def test_parse_shard():
+    assert engine.parse_shard('0/1') == (0, 1)
+    assert engine.parse_shard('7/8') == (7, 8)
+
+def test_every_file_is_in_one_shard(data_dir, data_copy):
+    files = sorted(data_dir.glob('*.log'))
+    shards = [[file for file in files if engine.is_in_shard(file, data_dir, (i, 3))] for i in range(3)]
+    assert sorted(sum(shards, [])) == files
+
+    # The partition depends on the relative paths only
+    for i, shard in enumerate(shards):
+        assert [data_copy / x.name for x in shard] == [x for x in sorted(data_copy.glob('*.log')) if engine.is_in_shard(x, data_copy, (i, 3))]
+
+def write_shards(data_dir, tmp_path, count, params):
+    partial_files = []
+    for i in range(count):
+        failed, completed = {}, []
+        for file in sorted(data_dir.glob('*.log')):
+            if not engine.is_in_shard(file, data_dir, (i, count)):
+                continue
+            is_complete, reasons = engine.evaluate_g16_logfile(file, **params)
+            if is_complete:
+                completed.append(file)
+            else:
+                failed[file] = '\t'.join(reasons)
+        partial_files.append(tmp_path / f'assessment_shard_{i}_of_{count}.json')
+        engine.write_partial_results(partial_files[-1], data_dir, (i, count), False, params, failed, completed)
+    return partial_files
+
+def test_merge_partial_results(data_dir, tmp_path):
+    params = {'window': 10, 'tolerance': 1e-5}
+    partial_files = write_shards(data_dir, tmp_path, 3, params)
+    parent_dir, failed, completed, files = engine.merge_partial_results(partial_files[::-1])
+
+    assert parent_dir == data_dir
+    assert files == sorted(data_dir.glob('*.log'))
+    assert completed == [data_dir / x for x in ('MAHT26_clust-3.log', 'james.log', 'oscillating_but_converges.log')]
+    assert failed[data_dir / 'illegal_multiplicity.log'] == 'The combination of multiplicity 2 and 96 electrons is impossible\tjob on line 6 failed.'
+    assert len(failed) + len(completed) == len(files)
+
+def test_merge_needs_every_shard(data_dir, tmp_path):
+    params = {'window': 10, 'tolerance': 1e-5}
+    partial_files = write_shards(data_dir, tmp_path, 3, params)
+    with pytest.raises(ValueError, match='missing: \\[1\\]'):
+        engine.merge_partial_results([partial_files[0], partial_files[2]])
+    with pytest.raises(ValueError):
+        engine.merge_partial_results(partial_files + partial_files[:1])
+
+def test_merge_needs_equal_parameters(data_dir, tmp_path):
+    for name in ('a', 'b'):
+        (tmp_path / name).mkdir()
+    partial_files = write_shards(data_dir, tmp_path / 'a', 2, {'window': 10, 'tolerance': 1e-5})
+    other = write_shards(data_dir, tmp_path / 'b', 2, {'window': 5, 'tolerance': 1e-5})
+    with pytest.raises(ValueError, match='params'):
+        engine.merge_partial_results([partial_files[0], other[1]])